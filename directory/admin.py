@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin
+from django.core.urlresolvers import reverse
+from django.shortcuts import redirect
 
 from . import models
-from .management.commands.emailimportedusers import send_email
+from .invitations import create_invitation_job, prepare_to_resume
 
 class ContentChannelInline(admin.TabularInline):
     model = models.ContentChannel
@@ -36,20 +38,11 @@ class MembershipUserAdmin(UserAdmin):
     actions = UserAdmin.actions + ['email_imported_users']
 
     def email_imported_users(self, request, queryset):
-        for user in queryset:
-            if not user.email:
-                self.message_user(
-                    request,
-                    "The user '%s' was not invited because they have no "
-                    "email address." % user.username
-                )
-                continue
-            info, created = models.ImportedUserInfo.objects.get_or_create(
-                user=user
-            )
-            send_email(user.email, info)
-            self.message_user(request,
-                              "Sent an invite to '%s'." % user.username)
+        job = create_invitation_job(queryset, created_by=request.user)
+        self.message_user(request,
+                          "Inviting %d users in the background." % job.total)
+        return redirect(reverse('admin:directory_invitationjob_change',
+                                args=(job.pk,)))
 
     email_imported_users.short_description = '''\
     Invite selected users to join the site
@@ -63,5 +56,37 @@ class MembershipUserAdmin(UserAdmin):
                 continue
             yield inline.get_formset(request, obj)
 
+class InvitationJobItemInline(admin.TabularInline):
+    model = models.InvitationJobItem
+    fields = ('user', 'status', 'error')
+    readonly_fields = fields
+    can_delete = False
+    extra = 0
+    max_num = 0
+
+class InvitationJobAdmin(admin.ModelAdmin):
+    list_display = ('created', 'created_by', 'status', 'progress')
+    list_filter = ('status',)
+    fields = ('created_by', 'status', 'progress', 'started', 'finished')
+    readonly_fields = fields
+    inlines = (InvitationJobItemInline,)
+    actions = ['resume_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    def resume_jobs(self, request, queryset):
+        for job in queryset:
+            if not prepare_to_resume(job):
+                self.message_user(request, "%s is still running." % job)
+                continue
+            self.message_user(request, "Resumed %s." % job)
+
+    resume_jobs.short_description = '''\
+    Resume selected jobs, retrying failed invitations
+    '''
+
+admin.site.register(models.InvitationJob, InvitationJobAdmin)
+
 admin.site.unregister(User)
 admin.site.register(User, MembershipUserAdmin)
@@ -0,0 +1,79 @@
+'''
+Support for conditional GETs of directory pages, so that clients can
+revalidate pages cheaply instead of re-downloading them.
+'''
+
+import hashlib
+from functools import wraps
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+def get_viewer_key(request):
+    '''
+    Return a string identifying everything about the current user that
+    affects the page chrome, e.g. the navigation bar.
+    '''
+
+    user = request.user
+    if not user.is_authenticated():
+        return 'anonymous'
+    parts = [user.pk, user.username, user.is_staff, user.is_superuser]
+    switched_from = request.session.get('user_switched_from')
+    if switched_from or user.is_superuser:
+        # These users get forms with CSRF tokens in them.
+        parts.extend([switched_from, get_token(request)])
+    return u':'.join(unicode(part) for part in parts)
+
+def strip_gzip_etags(view):
+    '''
+    Decorator for views inside gzip_page, whose middleware appends
+    ";gzip" to the ETags of the responses it compresses. Clients send
+    those ETags back, so this removes the suffix from If-None-Match for
+    the view to compare against its own ETags.
+    '''
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            request.META['HTTP_IF_NONE_MATCH'] = if_none_match.replace(
+                ';gzip"', '"'
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+def make_etag(*parts):
+    return hashlib.md5(u':'.join(
+        unicode(part) for part in parts
+    ).encode('utf-8')).hexdigest()
+
+def conditional_page(get_etag):
+    '''
+    Decorator that makes a view respond to conditional GETs. The given
+    function takes the view's arguments and returns an ETag for the
+    page, or None. Pages with pending messages are never considered
+    unmodified.
+
+    Pages aren't given a Last-Modified date, since a page can change
+    without anything on it getting newer, e.g. when a record is deleted
+    or a different user views it.
+    '''
+
+    def etag_func(request, *args, **kwargs):
+        if len(get_messages(request)):
+            return None
+        return get_etag(request, *args, **kwargs)
+
+    def decorator(view):
+        @condition(etag_func=etag_func)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, no_cache=True)
+            if request.user.is_authenticated():
+                patch_cache_control(response, private=True)
+            return response
+        return wrapper
+    return decorator
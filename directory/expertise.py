@@ -0,0 +1,84 @@
+'''
+Faceted search over the expertise of listed, active members.
+'''
+
+from django.db.models import Count, Q
+
+from .models import Expertise, Membership
+
+CATEGORY_LABELS = dict(Expertise.CATEGORY_CHOICES)
+
+def listed_expertise():
+    return Expertise.objects.filter(
+        user__is_active=True,
+        user__membership__is_listed=True
+    )
+
+class ExpertiseSearch(object):
+    '''
+    Represents a search for members with expertise in any of the given
+    categories, whose details or category names contain the given text.
+    '''
+
+    def __init__(self, categories=(), text=''):
+        self.categories = [category for category in categories
+                           if category in CATEGORY_LABELS]
+        self.text = text.strip()
+
+        skills = listed_expertise()
+        if self.text:
+            text_categories = [
+                category for category, label in Expertise.CATEGORY_CHOICES
+                if self.text.lower() in label.lower()
+            ]
+            skills = skills.filter(Q(details__icontains=self.text) |
+                                   Q(category__in=text_categories))
+        self.text_matches = skills
+        if self.categories:
+            skills = skills.filter(category__in=self.categories)
+        self.skills = skills
+
+    def facets(self):
+        '''
+        Return a list of dictionaries describing every category, the
+        number of members with matching expertise in it, and whether
+        it's selected. Counts ignore the category filter, so that they
+        reflect what selecting each category would add.
+        '''
+
+        counts = dict(
+            self.text_matches.order_by().values_list('category')
+            .annotate(count=Count('user', distinct=True))
+        )
+        return [{
+            'category': category,
+            'label': label,
+            'count': counts.get(category, 0),
+            'selected': category in self.categories
+        } for category, label in Expertise.CATEGORY_CHOICES]
+
+    def memberships(self):
+        '''
+        Return a queryset of the memberships of matching members.
+        '''
+
+        return Membership.objects.filter(
+            user__in=self.skills.values('user')
+        ).select_related(
+            'user', 'organization'
+        ).order_by('user__last_name', 'user__first_name', 'pk')
+
+    def attach_skills(self, memberships):
+        '''
+        Set a ``matching_skills`` attribute on each of the given
+        memberships, using a single query.
+        '''
+
+        skills = {}
+        for skill in self.skills.filter(
+            user__in=[membership.user_id for membership in memberships]
+        ).order_by('category', 'pk'):
+            skills.setdefault(skill.user_id, []).append(skill)
+        for membership in memberships:
+            membership.matching_skills = skills.get(membership.user_id, [])
+        return memberships
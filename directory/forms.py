@@ -1,3 +1,4 @@
+from django import forms
 from django.forms import ModelForm
 from django.forms.models import inlineformset_factory
 from django.contrib.auth.models import User
@@ -58,3 +59,73 @@ class OrganizationForm(ModelForm):
         model = Organization
         fields = ['name', 'website', 'address', 'twitter_name',
                   'mission']
+
+class YouthAgeFilterForm(forms.Form):
+    '''
+    Filters organizations by the ages of youth their programs target.
+    A single ``age`` finds organizations that serve it; ``min_age``
+    and/or ``max_age`` find organizations whose audience overlaps the
+    given range.
+    '''
+
+    age = forms.IntegerField(min_value=0, required=False)
+    min_age = forms.IntegerField(min_value=0, required=False)
+    max_age = forms.IntegerField(min_value=0, required=False)
+
+    def clean(self):
+        cleaned_data = super(YouthAgeFilterForm, self).clean()
+        if cleaned_data.get('age') is not None:
+            cleaned_data['min_age'] = cleaned_data['age']
+            cleaned_data['max_age'] = cleaned_data['age']
+        min_age = cleaned_data.get('min_age')
+        max_age = cleaned_data.get('max_age')
+        if min_age is not None and max_age is not None and min_age > max_age:
+            raise forms.ValidationError('Minimum age may not be greater '
+                                        'than maximum age.')
+        return cleaned_data
+
+    def filter(self, orgs):
+        '''
+        Filter the given organization queryset. The form must be valid.
+        '''
+
+        min_age = self.cleaned_data.get('min_age')
+        max_age = self.cleaned_data.get('max_age')
+        if max_age is not None:
+            orgs = orgs.filter(min_youth_audience_age__lte=max_age)
+        if min_age is not None:
+            orgs = orgs.filter(max_youth_audience_age__gte=min_age)
+        return orgs
+
+    def query_items(self):
+        '''
+        Return a list of the query parameters that reproduce the
+        filter, for use in pagination links. Invalid filters are
+        ignored, so this is empty if the form isn't valid.
+        '''
+
+        if not self.is_valid():
+            return []
+        if self.cleaned_data.get('age') is not None:
+            return [('age', self.cleaned_data['age'])]
+        return [(name, self.cleaned_data[name])
+                for name in ['min_age', 'max_age']
+                if self.cleaned_data.get(name) is not None]
+
+    def get_range_value(self, name):
+        '''
+        Return the value to show in the ``min_age`` or ``max_age`` input,
+        which is the single ``age`` if one was given.
+        '''
+
+        if self.is_valid() and self.cleaned_data.get('age') is not None:
+            return self.cleaned_data['age']
+        return self[name].value()
+
+    @property
+    def min_age_value(self):
+        return self.get_range_value('min_age')
+
+    @property
+    def max_age_value(self):
+        return self.get_range_value('max_age')
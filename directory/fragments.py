@@ -0,0 +1,104 @@
+'''
+Caching of the rendered ``directory/organization.html`` partial.
+
+Each organization's fragment is keyed on its own modification time,
+on the newest modification time and count of its content channels and
+memberships, and on the viewer's tier, since the Edit and Login-as
+buttons depend on who's looking.
+'''
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+
+from .models import ContentChannel, Membership, load_directories
+from .viewer import get_viewer
+
+FRAGMENT_NAME = 'organization'
+
+def get_related_stats(model, orgs):
+    '''
+    Return a dictionary mapping the ids of the given organizations to
+    the newest modification time and number of their related objects
+    of the given model. Organizations without any are omitted.
+    '''
+
+    return dict(
+        (org_id, (modified, count))
+        for org_id, modified, count in model.objects.filter(
+            organization__in=orgs
+        ).order_by().values_list('organization').annotate(
+            Max('modified'), Count('id')
+        )
+    )
+
+def get_fragment_key(request, org, show_privileged_info, channel_stats,
+                     membership_stats):
+    return ':'.join([
+        str(org.pk),
+        org.modified.isoformat()
+    ] + [
+        '%s,%d' % (stats[org.pk][0].isoformat(), stats[org.pk][1])
+        if org.pk in stats else ''
+        for stats in [channel_stats, membership_stats]
+    ] + [
+        get_viewer_tier(request, org, show_privileged_info)
+    ])
+
+def get_viewer_tier(request, org, show_privileged_info):
+    '''
+    Return a string identifying everyone who sees the same rendering
+    of the given organization as the current user.
+    '''
+
+    user = request.user
+    if not user.is_authenticated():
+        return 'anonymous'
+    if user.is_superuser:
+        # Superusers get forms with CSRF tokens in them.
+        return 'superuser-%d-%s' % (user.pk, get_token(request))
+    if get_viewer(request).organization_id == org.pk:
+        return 'member-%d' % user.pk
+    if show_privileged_info:
+        return 'privileged'
+    return 'anonymous'
+
+def get_directory_stats(orgs, show_privileged_info):
+    '''
+    Return the content channel and membership stats of the given
+    organizations that their fragment keys depend on.
+    '''
+
+    return (get_related_stats(ContentChannel, orgs),
+            get_related_stats(Membership, orgs)
+            if show_privileged_info else {})
+
+def prepare_organizations(request, orgs, show_privileged_info,
+                          directory_stats=None):
+    '''
+    Set the ``fragment_key`` attribute used by the organization partial
+    on each of the given organizations, and load the directories of
+    those whose fragment isn't already cached. Returns a list of the
+    organizations.
+    '''
+
+    orgs = list(orgs)
+    channel_stats, membership_stats = (
+        directory_stats or get_directory_stats(orgs, show_privileged_info)
+    )
+    for org in orgs:
+        org.fragment_key = get_fragment_key(request, org,
+                                            show_privileged_info,
+                                            channel_stats, membership_stats)
+    cached = cache.get_many([
+        make_template_fragment_key(FRAGMENT_NAME, [org.fragment_key])
+        for org in orgs
+    ])
+    load_directories(
+        [org for org in orgs if make_template_fragment_key(
+            FRAGMENT_NAME, [org.fragment_key]
+        ) not in cached],
+        include_memberships=show_privileged_info
+    )
+    return orgs
@@ -0,0 +1,241 @@
+'''
+Background invitation of imported users, as started from the admin.
+
+create_invitation_job() records which users to invite, and the
+runinvitationjobs management command picks up pending jobs and invites
+their users in batches, updating the jobs' progress as it goes. Since a
+job's items record who has been invited, a job that was interrupted,
+e.g. by a server restart, is simply picked up again once it's stale.
+Items are marked as being sent before they're sent, so invitations that
+were in flight at the time aren't sent again; they're marked as failed
+instead, and can be retried from the admin.
+'''
+
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from hive import bulk_mail, replicas
+from .models import ImportedUserInfo, InvitationJob, InvitationJobItem
+from .management.commands.emailimportedusers import ImportedUserEmails
+
+BATCH_SIZE = 50
+
+# A running job whose progress hasn't been updated for this long was
+# most likely interrupted.
+STALE_AFTER = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
+def get_or_create_imported_user_infos(users):
+    '''
+    Make sure each of the given users has an ImportedUserInfo, using a
+    constant number of queries.
+    '''
+
+    existing = set(ImportedUserInfo.objects.filter(
+        user__in=users
+    ).values_list('user_id', flat=True))
+    ImportedUserInfo.objects.bulk_create([
+        ImportedUserInfo(user=user) for user in users
+        if user.pk not in existing
+    ])
+
+def create_invitation_job(users, created_by=None):
+    users = list(users)
+    with transaction.atomic():
+        get_or_create_imported_user_infos(users)
+        job = InvitationJob.objects.create(created_by=created_by,
+                                           total=len(users))
+        InvitationJobItem.objects.bulk_create([
+            InvitationJobItem(job=job, user=user) for user in users
+        ])
+    return job
+
+def get_skip_reason(user):
+    # PasswordResetForm wouldn't email these users.
+    if not user.email:
+        return 'The user has no email address.'
+    if not user.is_active:
+        return 'The user is inactive.'
+    if not user.has_usable_password():
+        return 'The user has no usable password.'
+
+def update_job_counts(job, **counts):
+    InvitationJob.objects.filter(pk=job.pk).update(
+        modified=timezone.now(),
+        **dict((name, F(name) + count) for name, count in counts.items()
+               if count)
+    )
+
+def claim_item(item):
+    '''
+    Mark the pending item as being sent. Returns whether it was claimed;
+    this is atomic, so that a runner that takes over a job while another
+    is still sending doesn't send the same invitation again.
+    '''
+
+    return InvitationJobItem.objects.filter(
+        pk=item.pk,
+        status=InvitationJobItem.PENDING
+    ).update(status=InvitationJobItem.SENDING) == 1
+
+def finish_item(item, status, error=''):
+    '''
+    Record the outcome of sending the item. Returns False, and does
+    nothing, if the item has since been given up on as interrupted.
+    '''
+
+    return InvitationJobItem.objects.filter(
+        pk=item.pk,
+        status=InvitationJobItem.SENDING
+    ).update(status=status, error=error) == 1
+
+def invite_batch(job, items, emails, max_workers):
+    skipped = []
+    sendable = []
+    for item in items:
+        if not claim_item(item):
+            continue
+        reason = get_skip_reason(item.user)
+        if reason:
+            item.error = reason
+            skipped.append(item)
+        else:
+            sendable.append(item)
+    update_job_counts(job)
+    results = bulk_mail.send_individually(
+        sendable,
+        lambda item: emails.make_message(item.user),
+        max_workers
+    )
+    sent = [item for item, error in results if error is None]
+    failed = [(item, error) for item, error in results if error is not None]
+
+    ImportedUserInfo.objects.filter(
+        user__in=[item.user_id for item in sent]
+    ).update(was_sent_email=True, modified=timezone.now())
+    update_job_counts(
+        job,
+        sent=len([item for item in sent
+                  if finish_item(item, InvitationJobItem.SENT)]),
+        failed=len([item for item, error in failed
+                    if finish_item(item, InvitationJobItem.FAILED, error)]),
+        skipped=len([item for item in skipped
+                     if finish_item(item, InvitationJobItem.SKIPPED,
+                                    item.error)])
+    )
+
+def fail_interrupted_items(job):
+    '''
+    Mark the items that an interrupted run of the job was sending as
+    failed, since we can't tell whether they were sent.
+    '''
+
+    update_job_counts(job, failed=job.items.filter(
+        status=InvitationJobItem.SENDING
+    ).update(
+        status=InvitationJobItem.FAILED,
+        error='The invitation was interrupted, and may have been sent.'
+    ))
+
+def get_runnable_jobs():
+    '''
+    Return the jobs that are pending, or whose last run was interrupted.
+    '''
+
+    return InvitationJob.objects.filter(
+        Q(status=InvitationJob.PENDING) |
+        Q(status=InvitationJob.RUNNING,
+          modified__lt=timezone.now() - STALE_AFTER)
+    )
+
+def claim_job(job_id):
+    '''
+    Mark the job as running, if it's runnable. Returns whether it was
+    claimed; this is atomic, so at most one caller gets to run a job at
+    a time.
+    '''
+
+    now = timezone.now()
+    return get_runnable_jobs().filter(pk=job_id).update(
+        status=InvitationJob.RUNNING,
+        started=now,
+        finished=None,
+        modified=now
+    ) == 1
+
+def run_invitation_job(job_id, batch_size=BATCH_SIZE,
+                       max_workers=bulk_mail.DEFAULT_MAX_WORKERS):
+    '''
+    Run the given job, unless it's already running elsewhere. Returns
+    whether the job was run.
+    '''
+
+    # The job may have only just been created, so replicas may not have
+    # it yet, and we need to see our own progress updates.
+    replicas.pin_to_primary()
+    if not claim_job(job_id):
+        return False
+    job = InvitationJob.objects.get(pk=job_id)
+    status = InvitationJob.FAILED
+    try:
+        fail_interrupted_items(job)
+        emails = ImportedUserEmails()
+        last_pk = 0
+        while True:
+            items = list(job.items.filter(
+                status=InvitationJobItem.PENDING,
+                pk__gt=last_pk
+            ).select_related('user').order_by('pk')[:batch_size])
+            if not items:
+                break
+            last_pk = items[-1].pk
+            invite_batch(job, items, emails, max_workers)
+        status = InvitationJob.DONE
+    except Exception:
+        logger.exception('invitation job %d failed', job.pk)
+    finally:
+        InvitationJob.objects.filter(pk=job.pk).update(
+            status=status,
+            finished=timezone.now(),
+            modified=timezone.now()
+        )
+    return True
+
+def prepare_to_resume(job):
+    '''
+    Make the job pending again, along with its failed invitations, so
+    that starting the job retries them. Returns False, and does nothing,
+    if the job is still running.
+    '''
+
+    with transaction.atomic():
+        if not InvitationJob.objects.filter(pk=job.pk).exclude(
+            status=InvitationJob.RUNNING,
+            modified__gte=timezone.now() - STALE_AFTER
+        ).update(status=InvitationJob.PENDING, modified=timezone.now()):
+            return False
+        failed = job.items.filter(status=InvitationJobItem.FAILED).update(
+            status=InvitationJobItem.PENDING,
+            error=''
+        )
+        InvitationJob.objects.filter(pk=job.pk).update(
+            failed=F('failed') - failed
+        )
+    return True
+
+def run_invitation_jobs(**kwargs):
+    '''
+    Run every runnable job, oldest first, passing the given keyword
+    arguments to run_invitation_job(). Returns the number of jobs run.
+    '''
+
+    job_ids = list(get_runnable_jobs().order_by('created').values_list(
+        'pk',
+        flat=True
+    ))
+    return len([job_id for job_id in job_ids
+                if run_invitation_job(job_id, **kwargs)])
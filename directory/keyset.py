@@ -0,0 +1,102 @@
+'''
+Keyset pagination over querysets of models ordered by name and primary
+key, e.g. organizations.
+
+Unlike Django's Paginator, this doesn't count rows or use OFFSET, so
+every page costs the same to fetch. Pages are identified by opaque
+cursors that point just after or just before a given row.
+'''
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = 'directory.keyset.cursor'
+
+AFTER = 'after'
+
+BEFORE = 'before'
+
+def make_cursor(direction, name, pk):
+    return signing.dumps([direction, name, pk], salt=CURSOR_SALT)
+
+def parse_cursor(cursor):
+    '''
+    Return the direction, name and primary key encoded in the given
+    cursor, raising ValueError if the cursor is invalid.
+    '''
+
+    try:
+        direction, name, pk = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if (direction not in (AFTER, BEFORE) or
+        not isinstance(name, basestring) or not isinstance(pk, int)):
+        raise ValueError('invalid cursor')
+    return direction, name, pk
+
+class KeysetPage(object):
+    '''
+    Represents a page of results, along with cursors for the pages
+    before and after it, if there are any.
+
+    ``position`` is the name and primary key of the row that the page
+    was fetched after or before, if any. An empty page, e.g. one after
+    the last row, still links back to the rows on the other side of it.
+    '''
+
+    def __init__(self, object_list, has_previous, has_next, position=None):
+        self.object_list = object_list
+        self.position = position
+        self.has_previous = has_previous and bool(object_list or position)
+        self.has_next = has_next and bool(object_list or position)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous:
+            return None
+        if self.object_list:
+            first = self.object_list[0]
+            return make_cursor(BEFORE, first.name, first.pk)
+        # Primary keys are integers, so this includes the row the page
+        # was fetched after.
+        name, pk = self.position
+        return make_cursor(BEFORE, name, pk + 1)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        if self.object_list:
+            last = self.object_list[-1]
+            return make_cursor(AFTER, last.name, last.pk)
+        name, pk = self.position
+        return make_cursor(AFTER, name, pk - 1)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+def paginate(queryset, cursor, per_page):
+    '''
+    Return the KeysetPage of at most ``per_page`` objects in the given
+    queryset that the given cursor points to, or the first page if the
+    cursor is empty. Raises ValueError if the cursor is invalid.
+    '''
+
+    if not cursor:
+        objects = list(queryset.order_by('name', 'pk')[:per_page + 1])
+        return KeysetPage(objects[:per_page], False, len(objects) > per_page)
+    direction, name, pk = parse_cursor(cursor)
+    if direction == AFTER:
+        objects = list(queryset.filter(
+            Q(name__gt=name) | Q(name=name, pk__gt=pk)
+        ).order_by('name', 'pk')[:per_page + 1])
+        return KeysetPage(objects[:per_page], True, len(objects) > per_page,
+                          (name, pk))
+    objects = list(queryset.filter(
+        Q(name__lt=name) | Q(name=name, pk__lt=pk)
+    ).order_by('-name', '-pk')[:per_page + 1])
+    return KeysetPage(objects[:per_page][::-1], len(objects) > per_page, True,
+                      (name, pk))
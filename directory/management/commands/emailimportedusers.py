@@ -2,14 +2,30 @@ import urlparse
 from optparse import make_option
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sites.models import Site
+from django.core.mail import EmailMessage
+from django.template import Context
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
 from django.conf import settings
 
 from directory.models import ImportedUserInfo
+from hive import bulk_mail
 
 CONSOLE_EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+SUBJECT_TEMPLATE_NAME = 'directory/importeduser_subject.txt'
+
+EMAIL_TEMPLATE_NAME = 'directory/importeduser_email.html'
+
+def is_origin_https():
+    return urlparse.urlparse(settings.ORIGIN).scheme == 'https'
+
 def send_email(email, info, dry_run=False):
-    use_https = urlparse.urlparse(settings.ORIGIN).scheme == 'https'
     form = PasswordResetForm({'email': email})
     if not form.is_valid(): raise AssertionError('Form is not valid')
     if dry_run:
@@ -17,9 +33,9 @@ def send_email(email, info, dry_run=False):
         settings.EMAIL_BACKEND = CONSOLE_EMAIL_BACKEND
     try:
         form.save(
-            use_https=use_https,
-            subject_template_name='directory/importeduser_subject.txt',
-            email_template_name='directory/importeduser_email.html'
+            use_https=is_origin_https(),
+            subject_template_name=SUBJECT_TEMPLATE_NAME,
+            email_template_name=EMAIL_TEMPLATE_NAME
         )
         if not dry_run:
             info.was_sent_email = True
@@ -28,6 +44,85 @@ def send_email(email, info, dry_run=False):
         if dry_run:
             settings.EMAIL_BACKEND = original_backend
 
+class ImportedUserEmails(object):
+    '''
+    Makes the same emails as send_email(), but only loads the templates
+    and looks up the site once, and doesn't query the database per
+    email, so emails can be made in any thread.
+    '''
+
+    def __init__(self):
+        site = Site.objects.get_current()
+        self.site_name = site.name
+        self.domain = site.domain
+        self.protocol = 'https' if is_origin_https() else 'http'
+        self.subject_template = get_template(SUBJECT_TEMPLATE_NAME)
+        self.email_template = get_template(EMAIL_TEMPLATE_NAME)
+
+    def make_message(self, user):
+        context = Context({
+            'email': user.email,
+            'domain': self.domain,
+            'site_name': self.site_name,
+            'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+            'user': user,
+            'token': default_token_generator.make_token(user),
+            'protocol': self.protocol,
+        })
+        # Email subject *must not* contain newlines.
+        subject = ''.join(self.subject_template.render(context).splitlines())
+        return EmailMessage(subject, self.email_template.render(context),
+                            to=[user.email])
+
+def send_emails_in_bulk(infos, batch_size, max_workers, max_per_second,
+                        dry_run=False, write=lambda message: None):
+    '''
+    Email the users of the given ImportedUserInfo queryset in batches,
+    marking each batch's successfully emailed users as such with a
+    single query. Since users are marked as soon as their batch is
+    done, an interrupted run can simply be restarted, and at most one
+    batch's worth of users will be emailed again.
+
+    Returns the number of users who were emailed and who failed to be.
+    '''
+
+    emails = ImportedUserEmails()
+    backend = CONSOLE_EMAIL_BACKEND if dry_run else None
+    total_sent = total_failed = 0
+    last_pk = 0
+    while True:
+        batch = list(infos.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            return total_sent, total_failed
+        last_pk = batch[-1].pk
+        # PasswordResetForm also skips users whose passwords can't be
+        # identified, which can't be filtered for in the database.
+        batch = [info for info in batch if info.user.has_usable_password()]
+        results = bulk_mail.send_individually(
+            batch,
+            lambda info: emails.make_message(info.user),
+            max_workers,
+            max_per_second,
+            backend
+        )
+        sent = []
+        for info, error in results:
+            if error is None:
+                sent.append(info.pk)
+            else:
+                write("  Failed to email %s <%s>: %s" % (
+                    info.user.get_full_name(), info.user.email, error
+                ))
+        if sent and not dry_run:
+            ImportedUserInfo.objects.filter(pk__in=sent).update(
+                was_sent_email=True,
+                modified=timezone.now()
+            )
+        total_sent += len(sent)
+        total_failed += len(results) - len(sent)
+        write("  Emailed %d of %d users in batch." % (len(sent),
+                                                      len(results)))
+
 class Command(BaseCommand):
     option_list = BaseCommand.option_list + (
         make_option('--dry-run',
@@ -41,6 +136,30 @@ class Command(BaseCommand):
             default=False,
             help='send emails even to those who were already emailed',
             action='store_true'
+        ),
+        make_option('--bulk',
+            dest='bulk',
+            default=False,
+            help='send emails in parallel batches',
+            action='store_true'
+        ),
+        make_option('--batch-size',
+            dest='batch_size',
+            default=100,
+            type='int',
+            help='number of users per batch, with --bulk'
+        ),
+        make_option('--workers',
+            dest='workers',
+            default=bulk_mail.DEFAULT_MAX_WORKERS,
+            type='int',
+            help='number of emails to send at once, with --bulk'
+        ),
+        make_option('--rate',
+            dest='rate',
+            default=None,
+            type='float',
+            help='maximum number of emails to send per second, with --bulk'
         )
     )
 
@@ -56,18 +175,39 @@ class Command(BaseCommand):
     args = '[email1] [email2] ...'
 
     def handle(self, *args, **kwargs):
-        criteria = {}
-        if not kwargs['force']: criteria['was_sent_email'] = False
-        non_emailed_userinfo = ImportedUserInfo.objects.filter(**criteria)
+        non_emailed_userinfo = ImportedUserInfo.objects.select_related('user')
+        if not kwargs['force']:
+            non_emailed_userinfo = non_emailed_userinfo.filter(
+                was_sent_email=False
+            )
         if args:
-            non_emailed_userinfo = [
-                info for info in non_emailed_userinfo
-                if info.user.email in args
-            ]
+            non_emailed_userinfo = non_emailed_userinfo.filter(
+                user__email__in=args
+            )
         write = self.stdout.write
-        if len(non_emailed_userinfo) == 0:
+        if kwargs['bulk']:
+            # These are the users PasswordResetForm would email.
+            non_emailed_userinfo = non_emailed_userinfo.filter(
+                user__is_active=True
+            ).exclude(user__email='').exclude(user__password='').exclude(
+                user__password__startswith=UNUSABLE_PASSWORD_PREFIX
+            )
+        if not non_emailed_userinfo.exists():
             write('No users need to be emailed.')
             return
+        if kwargs['bulk']:
+            if kwargs['batch_size'] < 1 or kwargs['workers'] < 1:
+                raise CommandError('batch size and workers must be positive')
+            sent, failed = send_emails_in_bulk(
+                non_emailed_userinfo,
+                batch_size=kwargs['batch_size'],
+                max_workers=kwargs['workers'],
+                max_per_second=kwargs['rate'],
+                dry_run=kwargs['dry_run'],
+                write=write
+            )
+            write('Emailed %d users, %d failed.' % (sent, failed))
+            return
         for info in non_emailed_userinfo:
             user = info.user
             write("  Emailing %s <%s>" % (user.get_full_name(), user.email))
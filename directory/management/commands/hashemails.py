@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from directory.models import Membership, get_email_hash
+
+class Command(BaseCommand):
+    help = '''\
+    Recompute the stored Gravatar hash of every member's email address,
+    e.g. after users were changed without going through the ORM.
+    '''
+
+    def handle(self, *args, **kwargs):
+        changed = 0
+        memberships = Membership.objects.select_related('user')
+        for membership in memberships:
+            if get_email_hash(membership.user.email) != membership.email_hash:
+                # Saving recomputes the hash, and invalidates anything
+                # cached on the basis of the membership.
+                membership.save()
+                changed += 1
+        self.stdout.write('Updated %d of %d membership email hashes.' % (
+            changed,
+            len(memberships)
+        ))
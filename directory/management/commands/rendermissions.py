@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from directory.models import Organization
+from directory.richtext import render_markdown
+
+class Command(BaseCommand):
+    help = '''\
+    Re-render the stored HTML of every organization's mission. Run this
+    whenever the markdown sanitization policy changes.
+    '''
+
+    def handle(self, *args, **kwargs):
+        changed = 0
+        for org in Organization.objects.all():
+            if render_markdown(org.mission) != org.mission_html:
+                # Saving updates the modification time, which invalidates
+                # anything cached on its basis.
+                org.save()
+                changed += 1
+        self.stdout.write('Re-rendered %d of %d organization missions.' % (
+            changed,
+            Organization.objects.count()
+        ))
@@ -0,0 +1,53 @@
+import time
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from hive import bulk_mail
+from directory import invitations
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+            dest='batch_size',
+            default=invitations.BATCH_SIZE,
+            type='int',
+            help='number of users to invite at a time'
+        ),
+        make_option('--workers',
+            dest='max_workers',
+            default=bulk_mail.DEFAULT_MAX_WORKERS,
+            type='int',
+            help='number of threads sending invitations'
+        ),
+        make_option('--interval',
+            dest='interval',
+            default=5,
+            type='float',
+            help='seconds to wait between checks for new jobs'
+        ),
+        make_option('--once',
+            dest='once',
+            default=False,
+            help='exit once there are no more jobs to run',
+            action='store_true'
+        )
+    )
+
+    help = '''\
+    Run the invitation jobs started from the admin, and resume any that
+    were interrupted. Any number of these workers may run at once.
+    '''
+
+    def handle(self, *args, **kwargs):
+        while True:
+            close_old_connections()
+            ran = invitations.run_invitation_jobs(
+                batch_size=kwargs['batch_size'],
+                max_workers=kwargs['max_workers']
+            )
+            if ran:
+                self.stdout.write('Ran %d invitation jobs.' % ran)
+            if kwargs['once']:
+                return
+            time.sleep(kwargs['interval'])
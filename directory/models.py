@@ -1,14 +1,18 @@
+import hashlib
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.query import prefetch_related_objects
+from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from registration.signals import user_activated
 
 from .twitter import TwitterNameField
 from .phonenumber import PhoneNumberField
+from . import richtext
 
 def is_user_vouched_for(user, organization=None):
     '''
@@ -31,6 +35,14 @@ def is_user_privileged(user):
 
     return is_user_vouched_for(user) or (user.is_active and user.is_staff)
 
+def get_email_hash(email):
+    '''
+    Returns the MD5 hash of the given email address, trimmed and
+    lowercased, as used in Gravatar URLs.
+    '''
+
+    return hashlib.md5(email.lower().strip().encode('utf-8')).hexdigest()
+
 class Organization(models.Model):
     '''
     Represents a Hive organization.
@@ -76,6 +88,11 @@ class Organization(models.Model):
                   "and basic HTML tags are allowed.",
         blank=True,
     )
+    mission_html = models.TextField(
+        help_text="The organization's mission, rendered as sanitized HTML.",
+        blank=True,
+        editable=False
+    )
     min_youth_audience_age = models.SmallIntegerField(
         help_text="Minimum age of youth, in years, that the organization's "
                   "programs target.",
@@ -95,6 +112,12 @@ class Organization(models.Model):
         default=True
     )
 
+    class Meta:
+        index_together = [
+            ('is_active', 'min_youth_audience_age', 'max_youth_audience_age'),
+            ('is_active', 'name', 'id')
+        ]
+
     def __unicode__(self):
         return self.name
 
@@ -102,6 +125,8 @@ class Organization(models.Model):
         return reverse('organization_detail', args=(str(self.slug),))
 
     def membership_directory(self):
+        if hasattr(self, '_membership_directory'):
+            return self._membership_directory
         return self.memberships.filter(
             is_listed=True,
             user__is_active=True
@@ -156,6 +181,9 @@ class Expertise(models.Model):
         related_name='skills'
     )
 
+    class Meta:
+        index_together = [('category', 'user')]
+
 class ContentChannel(models.Model):
     '''
     Represents a content channel for a Hive organization.
@@ -264,6 +292,12 @@ class Membership(models.Model):
         help_text="Whether the person is listed under their organization in "
                   "the Hive directory."
     )
+    email_hash = models.CharField(
+        help_text="The Gravatar hash of the person's email address.",
+        max_length=32,
+        blank=True,
+        editable=False
+    )
 
     def get_absolute_url(self):
         return reverse('user_detail', args=(str(self.user.username),))
@@ -271,6 +305,28 @@ class Membership(models.Model):
     def __unicode__(self):
         return u'Membership for %s' % self.user.username
 
+def load_directories(orgs, include_memberships=True):
+    '''
+    Fetch the content channels and, optionally, the membership
+    directories of the given organizations, along with their users,
+    using a constant number of queries. Returns a list of the
+    organizations.
+    '''
+
+    orgs = list(orgs)
+    prefetch_related_objects(orgs, ['content_channels'])
+    if include_memberships:
+        directories = dict((org.pk, []) for org in orgs)
+        for membership in Membership.objects.filter(
+            organization__in=orgs,
+            is_listed=True,
+            user__is_active=True
+        ).select_related('user').order_by('user__last_name'):
+            directories[membership.organization_id].append(membership)
+        for org in orgs:
+            org._membership_directory = directories[org.pk]
+    return orgs
+
 class ImportedUserInfo(models.Model):
     '''
     Represents book-keeping about users who were imported from another
@@ -289,6 +345,87 @@ class ImportedUserInfo(models.Model):
     def __unicode__(self):
         return u'Imported user info for %s' % self.user.username
 
+class InvitationJob(models.Model):
+    '''
+    Represents a wave of emails inviting imported users to join the
+    site, sent in the background.
+    '''
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(User, null=True, blank=True,
+                                   on_delete=models.SET_NULL,
+                                   related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+
+    def __unicode__(self):
+        return u'Invitation of %d users' % self.total
+
+    def is_finished(self):
+        return self.status in [self.DONE, self.FAILED]
+
+    def progress(self):
+        return u'%d of %d sent, %d failed, %d skipped' % (
+            self.sent, self.total, self.failed, self.skipped
+        )
+
+class InvitationJobItem(models.Model):
+    '''
+    Represents the invitation of a single user as part of an
+    invitation job.
+    '''
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+        (SKIPPED, 'Skipped'),
+    )
+
+    job = models.ForeignKey(InvitationJob, related_name='items')
+    user = models.ForeignKey(User, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = [('job', 'user')]
+
+    def __unicode__(self):
+        return self.user.username
+
+@receiver(pre_save, sender=Organization)
+def render_organization_mission(sender, instance, **kwargs):
+    # This also happens on raw saves, so that fixtures don't need to
+    # include rendered HTML.
+    instance.mission_html = richtext.render_markdown(instance.mission)
+
 @receiver(post_save, sender=User)
 def create_membership_for_user(sender, raw, instance, **kwargs):
     if raw: return
@@ -296,6 +433,36 @@ def create_membership_for_user(sender, raw, instance, **kwargs):
         membership = Membership(user=instance)
         membership.save()
 
+@receiver(pre_save, sender=Membership)
+def hash_membership_email(sender, raw, instance, **kwargs):
+    if raw:
+        # Fixtures may be loaded before the user is, in which case
+        # sync_membership_for_user() hashes the email once it is.
+        email = User.objects.filter(pk=instance.user_id).values_list(
+            'email',
+            flat=True
+        ).first()
+    else:
+        email = instance.user.email
+    instance.email_hash = get_email_hash(email or '')
+
+@receiver(post_save, sender=User)
+def sync_membership_for_user(sender, raw, instance, update_fields,
+                             **kwargs):
+    if update_fields == frozenset(['last_login']): return
+    if raw:
+        # Fixtures set their own modification times.
+        Membership.objects.filter(user=instance).update(
+            email_hash=get_email_hash(instance.email)
+        )
+        return
+    # Caches of organization directories are keyed on the modification
+    # times of memberships, which display information about their users.
+    Membership.objects.filter(user=instance).update(
+        modified=timezone.now(),
+        email_hash=get_email_hash(instance.email)
+    )
+
 @receiver(user_activated)
 def auto_register_user_with_organization(sender, user, request, **kwargs):
     if not (user.email and '@' in user.email): return
@@ -306,3 +473,7 @@ def auto_register_user_with_organization(sender, user, request, **kwargs):
     org = orgs[0]
     user.membership.organization = org
     user.membership.save()
+
+# Keep the search content version and the generation of cached pages in
+# sync with changes to these models, regardless of which process makes them.
+from . import search, pagecache
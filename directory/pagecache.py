@@ -0,0 +1,118 @@
+'''
+A full-response cache for directory pages viewed by anonymous users.
+
+Cached pages are keyed on a generation number which changes whenever
+an organization, content channel, membership or user is saved or
+deleted. It's stored in the cache so that it can be shared between
+processes, and if the cache isn't shared, e.g. a locmem cache, pages
+aren't cached at all, since other processes would never see it change.
+'''
+
+import time
+import urllib
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from directory.models import Organization, ContentChannel, Membership
+
+GENERATION_CACHE_KEY = 'directory:pages:generation'
+
+PAGE_CACHE_KEY = 'directory:pages:page:%s'
+
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+def get_generation():
+    '''
+    Return the current generation of cached pages.
+    '''
+
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        # As with search content versions, seed the generation with the
+        # current time so that it's unlikely to repeat.
+        seed = int(time.time() * 1000)
+        cache.add(GENERATION_CACHE_KEY, seed, None)
+        generation = cache.get(GENERATION_CACHE_KEY, seed)
+    return generation
+
+def bump_generation(update_fields=None, **kwargs):
+    if update_fields == frozenset(['last_login']): return
+    try:
+        cache.incr(GENERATION_CACHE_KEY)
+    except ValueError:
+        get_generation()
+
+def is_cacheable_request(request):
+    return (settings.CACHE_IS_SHARED and
+            request.method in ('GET', 'HEAD') and
+            not request.user.is_authenticated() and
+            not len(get_messages(request)))
+
+def is_cacheable_response(request, response):
+    # A page containing a CSRF token, or one that sets cookies, is
+    # specific to the visitor it was rendered for.
+    return (response.status_code == 200 and
+            not response.cookies and
+            not request.META.get('CSRF_COOKIE_USED') and
+            not len(get_messages(request)))
+
+def is_not_modified(request, response):
+    if not response.has_header('ETag'): return False
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return response['ETag'] in [quote_etag(etag) for etag in etags]
+
+def get_page_key(request, query_params):
+    '''
+    Return the cache key of the page at the request's path, with the
+    given query parameters. Any others are ignored, so that arbitrary
+    query strings can't fill the cache with copies of the same page.
+    '''
+
+    query = urllib.urlencode([
+        (name, value.encode('utf-8')) for name in query_params
+        for value in request.GET.getlist(name)
+    ])
+    return PAGE_CACHE_KEY % hashlib.md5(':'.join([
+        str(get_generation()),
+        request.path.encode('utf-8'),
+        query
+    ])).hexdigest()
+
+def cache_anonymous_page(*query_params):
+    '''
+    Decorator that caches the responses a view gives anonymous users
+    until the current generation of cached pages changes. Responses are
+    keyed on the given query parameters, which must include every one
+    that the view reads. Cached responses with an ETag also answer
+    conditional GETs.
+    '''
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+            key = get_page_key(request, query_params)
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if is_cacheable_response(request, response):
+                    cache.set(key, response, PAGE_CACHE_TIMEOUT)
+            elif is_not_modified(request, response):
+                return HttpResponseNotModified()
+            return response
+        return wrapper
+    return decorator
+
+for model in [Organization, ContentChannel, Membership, User]:
+    post_save.connect(bump_generation, sender=model,
+                      dispatch_uid='directory.pagecache.bump_generation')
+    post_delete.connect(bump_generation, sender=model,
+                        dispatch_uid='directory.pagecache.bump_generation')
@@ -0,0 +1,32 @@
+'''
+Rendering of user-supplied markdown/HTML into sanitized HTML.
+
+Changing the sanitization policy here doesn't affect HTML that's
+already stored; run ``manage.py rendermissions`` afterwards.
+'''
+
+import markdown
+import bleach
+
+ALLOWED_TAGS = bleach.ALLOWED_TAGS + [
+    'p',
+    'pre',
+    'img'
+]
+
+ALLOWED_ATTRIBUTES = bleach.ALLOWED_ATTRIBUTES.copy()
+
+ALLOWED_ATTRIBUTES.update(**{
+    'img': ['src', 'alt']
+})
+
+def render_markdown(text):
+    '''
+    Render the given markdown/HTML text as sanitized HTML.
+    '''
+
+    return bleach.clean(
+        text=markdown.markdown(text),
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES
+    )
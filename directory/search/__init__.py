@@ -0,0 +1,138 @@
+'''
+Typeahead search over organizations and people.
+
+The backend that does the actual matching is configured via the
+SEARCH_BACKEND setting, which is derived from the SEARCH_BACKEND_URL
+environment variable.
+
+This module also maintains a content version for search results, which
+changes whenever an organization, membership or user is saved or
+deleted. It's stored in the cache so that it can be shared between
+processes.
+'''
+
+import time
+import hashlib
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_by_path
+
+from directory.models import Organization, Membership
+
+DEFAULT_LIMIT = 10
+
+MAX_LIMIT = 50
+
+CURSOR_SALT = 'directory.search.cursor'
+
+VERSION_CACHE_KEY = 'directory:search:version'
+
+RESULTS_CACHE_KEY = 'directory:search:results:%s'
+
+RESULTS_CACHE_TIMEOUT = 60 * 10
+
+_backends = {}
+
+def get_backend(path=None):
+    '''
+    Return an instance of the search backend at the given dotted path,
+    defaulting to settings.SEARCH_BACKEND. Instances are shared for the
+    lifetime of the process.
+    '''
+
+    path = path or settings.SEARCH_BACKEND
+    if path not in _backends:
+        _backends[path] = import_by_path(path)()
+    return _backends[path]
+
+def normalize_query(query):
+    '''
+    >>> normalize_query(u'  WNYC   Radio ')
+    u'wnyc radio'
+    '''
+
+    return u' '.join(query.lower().split())
+
+def find(query, include_people=False, limit=DEFAULT_LIMIT, offset=0):
+    '''
+    Return a list of up to ``limit`` results for the given query,
+    ordered by relevance and starting at ``offset``, along with a boolean
+    indicating whether there are more results.
+
+    If the backend asks for it, results are cached until the search
+    content version changes. That version only changes in other
+    processes if the cache is shared between them, so results aren't
+    cached otherwise.
+    '''
+
+    backend = get_backend()
+    query = normalize_query(query)
+    if not query: return [], False
+    if not (backend.cache_results and settings.CACHE_IS_SHARED):
+        return backend.find(query, include_people=include_people,
+                            limit=limit, offset=offset)
+    key = RESULTS_CACHE_KEY % hashlib.md5(u':'.join([
+        unicode(get_version()), unicode(include_people), unicode(limit),
+        unicode(offset), query
+    ]).encode('utf-8')).hexdigest()
+    results = cache.get(key)
+    if results is None:
+        results = backend.find(query, include_people=include_people,
+                               limit=limit, offset=offset)
+        cache.set(key, results, RESULTS_CACHE_TIMEOUT)
+    return results
+
+def make_cursor(query, offset):
+    '''
+    Return an opaque token that can be passed to parse_cursor() to
+    continue the given query from the given offset.
+    '''
+
+    return signing.dumps([query, offset], salt=CURSOR_SALT)
+
+def parse_cursor(query, cursor):
+    '''
+    Return the offset encoded in the given cursor, raising ValueError if
+    the cursor is invalid or belongs to a different query.
+    '''
+
+    try:
+        cursor_query, offset = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if (cursor_query != query or not isinstance(offset, int)
+        or offset < 0):
+        raise ValueError('invalid cursor')
+    return offset
+
+def get_version():
+    '''
+    Return the current content version of search results.
+    '''
+
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # Seed the version with the current time, rather than zero, so
+        # that it's unlikely to repeat a version from before the cache
+        # was cleared.
+        seed = int(time.time() * 1000)
+        cache.add(VERSION_CACHE_KEY, seed, None)
+        version = cache.get(VERSION_CACHE_KEY, seed)
+    return version
+
+def bump_version(raw=False, update_fields=None, **kwargs):
+    # Fixture loading and logins don't change anything that's searched.
+    if raw or update_fields == frozenset(['last_login']): return
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        get_version()
+
+for model in [Organization, Membership, User]:
+    post_save.connect(bump_version, sender=model,
+                      dispatch_uid='directory.search.bump_version')
+    post_delete.connect(bump_version, sender=model,
+                        dispatch_uid='directory.search.bump_version')
@@ -0,0 +1,92 @@
+import re
+from django.core.urlresolvers import reverse
+
+from directory.models import Membership
+
+# Relevance ranks, from most to least relevant.
+EXACT, PREFIX, SUBSTRING, MISSION = range(4)
+
+def org_result(org):
+    return {'value': org.name,
+            'url': reverse('organization_detail', args=(str(org.slug),))}
+
+def person_result(user):
+    return {'value': user.get_full_name(),
+            'url': reverse('user_detail', args=(str(user.username),))}
+
+def words(text):
+    '''
+    >>> words(u'Radio Rookies, for teens!')
+    [u'radio', u'rookies', u'for', u'teens']
+    '''
+
+    return re.findall(r'\w+', text.lower(), re.UNICODE)
+
+def escape_like(query):
+    '''
+    >>> escape_like('50%_off')
+    '50\\\\%\\\\_off'
+    '''
+
+    for char in ['\\', '%', '_']:
+        query = query.replace(char, '\\' + char)
+    return query
+
+def listed_memberships():
+    return Membership.objects.filter(
+        is_listed=True,
+        user__is_active=True
+    ).select_related('user')
+
+class BaseSearchBackend(object):
+    '''
+    Base class for search backends.
+
+    Organizations match a query if their name contains it, or if their
+    mission contains all of its words. People match if their first or
+    last name contains it.
+
+    Subclasses return at most ``limit`` matches as a list of
+    ``(rank, result)`` tuples, ordered by rank and then by name.
+
+    Backends that are slower than a cache lookup should set
+    ``cache_results`` so that their results are cached, and backends
+    with per-process state can build it in ``warm_up()``.
+    '''
+
+    cache_results = False
+
+    def warm_up(self):
+        '''
+        Prepare the backend to answer queries quickly, e.g. when a worker
+        process starts. Does nothing by default.
+        '''
+
+        pass
+
+    def find_organizations(self, query, limit):
+        raise NotImplementedError()
+
+    def find_people(self, query, limit):
+        raise NotImplementedError()
+
+    def find(self, query, include_people=False, limit=10, offset=0):
+        '''
+        Return a list of up to ``limit`` JSON-serializable dictionaries
+        for the active organizations (and, optionally, listed people)
+        that match the given query, starting at ``offset``, along with
+        a boolean indicating whether there are more results.
+
+        Results are ordered by relevance; organizations come before
+        people of the same rank.
+        '''
+
+        count = offset + limit + 1
+        ranked = [(rank, 0, i, result) for i, (rank, result)
+                  in enumerate(self.find_organizations(query, count))]
+        if include_people:
+            ranked.extend((rank, 1, i, result) for i, (rank, result)
+                          in enumerate(self.find_people(query, count)))
+        ranked.sort(key=lambda item: item[:3])
+        results = [item[3] for item in ranked[offset:offset + limit]]
+        return results, len(ranked) > offset + limit
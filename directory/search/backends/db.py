@@ -0,0 +1,85 @@
+'''
+A search backend that uses portable ORM lookups. It works on any
+database, including SQLite, but every query scans the tables involved.
+'''
+
+import operator
+from django.db import connection
+from django.db.models import Q
+
+from directory.models import Organization
+from .base import BaseSearchBackend, org_result, person_result, words, \
+                  escape_like, listed_memberships, EXACT, PREFIX, \
+                  SUBSTRING, MISSION
+
+WORD_BOUNDARIES = {
+    'postgresql': (r'\y', r'\y'),
+    'mysql': ('[[:<:]]', '[[:>:]]'),
+}
+
+def mission_contains_words(query):
+    start, end = WORD_BOUNDARIES.get(connection.vendor, (r'\b', r'\b'))
+    return reduce(operator.and_, [
+        Q(mission__iregex=start + word + end) for word in words(query)
+    ])
+
+def rank_select(columns, query, default_rank):
+    '''
+    Return an ``extra()`` select clause and its parameters that rank
+    rows by how closely any of the given columns match the query.
+    '''
+
+    columns = ['UPPER(%s)' % '.'.join(connection.ops.quote_name(part)
+                                      for part in column.split('.'))
+               for column in columns]
+    criteria = [
+        (EXACT, '%s = UPPER(%%s)', query),
+        (PREFIX, "%s LIKE UPPER(%%s) ESCAPE '\\'", escape_like(query) + '%'),
+        (SUBSTRING, "%s LIKE UPPER(%%s) ESCAPE '\\'",
+         '%' + escape_like(query) + '%'),
+    ]
+    whens = []
+    params = []
+    for rank, template, param in criteria:
+        whens.append('WHEN %s THEN %d' % (
+            ' OR '.join(template % column for column in columns),
+            rank
+        ))
+        params.extend([param] * len(columns))
+    sql = 'CASE %s ELSE %d END' % (' '.join(whens), default_rank)
+    return {'search_rank': sql}, params
+
+class SearchBackend(BaseSearchBackend):
+    cache_results = True
+
+    def find_organizations(self, query, limit):
+        criteria = Q(name__icontains=query)
+        if words(query):
+            criteria |= mission_contains_words(query)
+        select, select_params = rank_select(
+            ['directory_organization.name'], query, MISSION
+        )
+        orgs = Organization.objects.filter(
+            criteria,
+            is_active=True
+        ).extra(
+            select=select,
+            select_params=select_params
+        ).order_by('search_rank', 'name', 'pk')[:limit]
+        return [(org.search_rank, org_result(org)) for org in orgs]
+
+    def find_people(self, query, limit):
+        select, select_params = rank_select(
+            ['auth_user.first_name', 'auth_user.last_name'], query,
+            SUBSTRING
+        )
+        memberships = listed_memberships().filter(
+            Q(user__first_name__icontains=query) |
+            Q(user__last_name__icontains=query)
+        ).extra(
+            select=select,
+            select_params=select_params
+        ).order_by('search_rank', 'user__first_name', 'user__last_name',
+                   'pk')[:limit]
+        return [(membership.search_rank, person_result(membership.user))
+                for membership in memberships]
@@ -0,0 +1,257 @@
+'''
+A search backend that keeps an in-process index of the names that the
+directory's typeahead search can match, so that it doesn't need to scan
+the organization and user tables on every keystroke.
+
+Each worker process builds its own index the first time it's queried,
+and keeps it up-to-date by listening to model signals. Changes made by
+other processes only reach it through the shared search content
+version, so the index remembers the version it was built at and is
+rebuilt when that version moves on.
+'''
+
+import threading
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from directory.models import Organization, Membership
+from directory.search import get_version
+from .base import BaseSearchBackend, org_result, person_result, words, \
+                  listed_memberships, EXACT, PREFIX, SUBSTRING, MISSION
+
+NGRAM_LENGTH = 3
+
+def normalize(text):
+    return text.lower()
+
+def ngrams(text):
+    '''
+    >>> sorted(ngrams(u'abcd'))
+    [u'abc', u'bcd']
+    '''
+
+    return set(text[i:i + NGRAM_LENGTH]
+               for i in range(len(text) - NGRAM_LENGTH + 1))
+
+class Entry(object):
+    '''
+    Represents a single searchable organization or person.
+    '''
+
+    def __init__(self, result, keys, text='', is_person=False):
+        self.result = result
+        self.keys = tuple(normalize(key) for key in keys if key)
+        self.words = frozenset(words(text))
+        self.is_person = is_person
+
+    def rank(self, query):
+        '''
+        Return the relevance rank of the entry for the given normalized
+        query, or None if it doesn't match.
+        '''
+
+        if query in self.keys: return EXACT
+        for key in self.keys:
+            if key.startswith(query): return PREFIX
+        for key in self.keys:
+            if query in key: return SUBSTRING
+        query_words = words(query)
+        if query_words and self.words.issuperset(query_words):
+            return MISSION
+        return None
+
+def org_entry(org):
+    return Entry(result=org_result(org), keys=[org.name], text=org.mission)
+
+def person_entry(user):
+    return Entry(result=person_result(user),
+                 keys=[user.first_name, user.last_name],
+                 is_person=True)
+
+class SearchIndex(object):
+    '''
+    A trigram index of active organization names and listed, active
+    members' names, along with a word index of organization missions.
+
+    Entries are keyed by ``('org', org.pk)`` or ``('person', user.pk)``.
+    Queries shorter than a trigram are answered by scanning every entry,
+    which is still far cheaper than a database round-trip.
+    '''
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    @property
+    def is_built(self):
+        return self._entries is not None
+
+    def reset(self):
+        with self._lock:
+            self._entries = None
+            self._ngrams = {}
+            self._words = {}
+            self.version = None
+
+    def build(self):
+        with self._lock:
+            # The version is read before the database, so that a change
+            # made while we're reading will bump it past ours.
+            version = get_version()
+            self.reset()
+            entries = {}
+            for org in Organization.objects.filter(is_active=True):
+                entries[('org', org.pk)] = org_entry(org)
+            for membership in listed_memberships():
+                entries[('person', membership.user_id)] = \
+                    person_entry(membership.user)
+            self._entries = {}
+            for key, entry in entries.items():
+                self._add(key, entry)
+            self.version = version
+
+    def is_current(self):
+        return self.is_built and self.version == get_version()
+
+    def build_if_stale(self):
+        with self._lock:
+            if not self.is_current():
+                self.build()
+
+    def _postings(self, entry):
+        for key_text in entry.keys:
+            for ngram in ngrams(key_text):
+                yield self._ngrams, ngram
+        for word in entry.words:
+            yield self._words, word
+
+    def _add(self, key, entry):
+        self._entries[key] = entry
+        for postings, term in self._postings(entry):
+            postings.setdefault(term, set()).add(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None: return
+        for postings, term in self._postings(entry):
+            keys = postings.get(term)
+            if keys is None: continue
+            keys.discard(key)
+            if not keys: del postings[term]
+
+    def update(self, key, entry=None):
+        '''
+        Replace the entry with the given key. If entry is None, the
+        entry is removed. Does nothing if the index hasn't been built
+        yet, since it will be built from the database when first used.
+
+        This is called after the change has bumped the search content
+        version. If nothing else has changed since the index was built,
+        the index is now current at the new version; otherwise it's
+        left to be rebuilt.
+        '''
+
+        with self._lock:
+            if not self.is_built: return
+            self._remove(key)
+            if entry is not None:
+                self._add(key, entry)
+            if self.version is not None and \
+               get_version() == self.version + 1:
+                self.version += 1
+
+    def _intersect(self, postings, terms):
+        matches = []
+        for term in terms:
+            keys = postings.get(term)
+            if not keys: return set()
+            matches.append(keys)
+        matches.sort(key=len)
+        return set.intersection(*matches)
+
+    def _candidates(self, query):
+        query_ngrams = ngrams(query)
+        if not query_ngrams:
+            return self._entries.keys()
+        candidates = self._intersect(self._ngrams, query_ngrams)
+        query_words = words(query)
+        if query_words:
+            candidates |= self._intersect(self._words, query_words)
+        return candidates
+
+    def find(self, query):
+        '''
+        Return a list of ``(rank, entry)`` tuples for the entries that
+        match the given query, case-insensitively.
+        '''
+
+        self.build_if_stale()
+        query = normalize(query)
+        with self._lock:
+            entries = [self._entries[key] for key in self._candidates(query)]
+        ranked = [(entry.rank(query), entry) for entry in entries]
+        return [(rank, entry) for rank, entry in ranked if rank is not None]
+
+index = SearchIndex()
+
+class SearchBackend(BaseSearchBackend):
+    def warm_up(self):
+        index.build_if_stale()
+
+    def _find(self, query, limit, is_person):
+        ranked = [(rank, entry.result) for rank, entry in index.find(query)
+                  if entry.is_person == is_person]
+        ranked.sort(key=lambda item: (item[0], item[1]['value'].lower()))
+        return ranked[:limit]
+
+    def find_organizations(self, query, limit):
+        return self._find(query, limit, is_person=False)
+
+    def find_people(self, query, limit):
+        return self._find(query, limit, is_person=True)
+
+def update_person(user, is_listed):
+    entry = None
+    if user.is_active and is_listed:
+        entry = person_entry(user)
+    index.update(('person', user.pk), entry)
+
+@receiver(post_save, sender=Organization,
+          dispatch_uid='directory.search.backends.memory.org_saved')
+def org_saved(sender, instance, raw, **kwargs):
+    if raw: return index.reset()
+    index.update(('org', instance.pk),
+                 org_entry(instance) if instance.is_active else None)
+
+@receiver(post_delete, sender=Organization,
+          dispatch_uid='directory.search.backends.memory.org_deleted')
+def org_deleted(sender, instance, **kwargs):
+    index.update(('org', instance.pk))
+
+@receiver(post_save, sender=Membership,
+          dispatch_uid='directory.search.backends.memory.membership_saved')
+def membership_saved(sender, instance, raw, **kwargs):
+    if raw: return index.reset()
+    if index.is_built: update_person(instance.user, instance.is_listed)
+
+@receiver(post_delete, sender=Membership,
+          dispatch_uid='directory.search.backends.memory.membership_deleted')
+def membership_deleted(sender, instance, **kwargs):
+    index.update(('person', instance.user_id))
+
+@receiver(post_save, sender=User,
+          dispatch_uid='directory.search.backends.memory.user_saved')
+def user_saved(sender, instance, raw, update_fields, **kwargs):
+    if raw: return index.reset()
+    if update_fields == frozenset(['last_login']): return
+    if index.is_built:
+        update_person(instance, Membership.objects.filter(
+            user=instance,
+            is_listed=True
+        ).exists())
+
+@receiver(post_delete, sender=User,
+          dispatch_uid='directory.search.backends.memory.user_deleted')
+def user_deleted(sender, instance, **kwargs):
+    index.update(('person', instance.pk))
@@ -0,0 +1,65 @@
+'''
+A search backend for PostgreSQL.
+
+Name lookups use ILIKE, which is served by the pg_trgm GIN indexes on
+organization and user names, and mission lookups use full-text search,
+which is served by the GIN index on the mission's tsvector. These
+indexes are created by the directory app's migrations.
+
+The SQL expressions below must stay in sync with the indexed
+expressions, or PostgreSQL won't use the indexes.
+
+Full-text search uses the 'simple' configuration, which neither stems
+words nor drops stop words, so that missions match the same queries
+that they do with the other backends.
+'''
+
+from directory.models import Organization
+from .base import BaseSearchBackend, org_result, person_result, \
+                  escape_like, listed_memberships, SUBSTRING, MISSION
+from .db import rank_select
+
+TEXT_SEARCH_CONFIG = 'simple'
+
+ORG_CRITERIA = (
+    '("directory_organization"."name" ILIKE %%s OR '
+    'to_tsvector(\'%(config)s\', "directory_organization"."mission") @@ '
+    'plainto_tsquery(\'%(config)s\', %%s))'
+) % {'config': TEXT_SEARCH_CONFIG}
+
+PERSON_CRITERIA = (
+    '("auth_user"."first_name" ILIKE %s OR '
+    '"auth_user"."last_name" ILIKE %s)'
+)
+
+class SearchBackend(BaseSearchBackend):
+    cache_results = True
+
+    def find_organizations(self, query, limit):
+        pattern = '%' + escape_like(query) + '%'
+        select, select_params = rank_select(
+            ['directory_organization.name'], query, MISSION
+        )
+        orgs = Organization.objects.filter(is_active=True).extra(
+            select=select,
+            select_params=select_params,
+            where=[ORG_CRITERIA],
+            params=[pattern, query]
+        ).order_by('search_rank', 'name', 'pk')[:limit]
+        return [(org.search_rank, org_result(org)) for org in orgs]
+
+    def find_people(self, query, limit):
+        pattern = '%' + escape_like(query) + '%'
+        select, select_params = rank_select(
+            ['auth_user.first_name', 'auth_user.last_name'], query,
+            SUBSTRING
+        )
+        memberships = listed_memberships().extra(
+            select=select,
+            select_params=select_params,
+            where=[PERSON_CRITERIA],
+            params=[pattern, pattern]
+        ).order_by('search_rank', 'user__first_name', 'user__last_name',
+                   'pk')[:limit]
+        return [(membership.search_rank, person_result(membership.user))
+                for membership in memberships]
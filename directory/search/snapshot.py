@@ -0,0 +1,104 @@
+'''
+Snapshots of every searchable entry, which typeahead clients can
+download once and filter locally instead of querying find_json on every
+keystroke.
+
+Snapshots are cached per viewer tier and content version, so they only
+need to be rebuilt after something searchable changes. The version only
+reflects changes made by other processes if the cache is shared between
+them, so otherwise snapshots are rebuilt every time, and identified by
+their content instead.
+'''
+
+import json
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from directory.models import Organization
+from . import get_version
+from .backends.base import listed_memberships, words
+
+PUBLIC, PRIVILEGED = 'public', 'privileged'
+
+CACHE_KEY = 'directory:search:snapshot:%s'
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+def search_keys(*names):
+    '''
+    Return the normalized keys that a query is matched against, as the
+    search backends match them.
+
+    >>> search_keys(u'Brian', u'', u'Lehrer')
+    [u'brian', u'lehrer']
+    '''
+
+    return [name.lower() for name in names if name]
+
+def get_entries(tier):
+    '''
+    Return a list of ``[value, url, keys, words]`` lists for everything
+    that the given tier of viewer can search for, where ``keys`` are the
+    names that queries are matched against and ``words`` are the words
+    of an organization's mission.
+
+    Organizations come before people, and each are ordered by name, so
+    that clients can break ties in rank the way the search backends do.
+    '''
+
+    orgs = [
+        [name, reverse('organization_detail', args=(str(slug),)),
+         search_keys(name), sorted(set(words(mission)))]
+        for name, slug, mission in Organization.objects.filter(
+            is_active=True
+        ).values_list('name', 'slug', 'mission')
+    ]
+    people = []
+    if tier == PRIVILEGED:
+        people = [
+            [u' '.join([first_name, last_name]).strip(),
+             reverse('user_detail', args=(str(username),)),
+             search_keys(first_name, last_name), []]
+            for first_name, last_name, username in listed_memberships()
+            .values_list('user__first_name', 'user__last_name',
+                         'user__username')
+            if first_name or last_name
+        ]
+    for entries in [orgs, people]:
+        entries.sort(key=lambda entry: entry[0].lower())
+    return orgs + people
+
+def make_snapshot(etag, entries):
+    return json.dumps({
+        'version': etag,
+        'fields': ['value', 'url', 'keys', 'words'],
+        'entries': entries
+    }, separators=(',', ':'))
+
+def get_uncached_snapshot(tier):
+    entries = get_entries(tier)
+    etag = '%s-%s' % (tier, hashlib.md5(json.dumps(entries)).hexdigest())
+    return etag, make_snapshot(etag, entries)
+
+def get_etag(tier):
+    if not settings.CACHE_IS_SHARED:
+        return get_uncached_snapshot(tier)[0]
+    return '%s-%s' % (tier, get_version())
+
+def get_snapshot(tier):
+    '''
+    Return the ETag and JSON-encoded snapshot for the given tier of
+    viewer.
+    '''
+
+    if not settings.CACHE_IS_SHARED:
+        return get_uncached_snapshot(tier)
+    etag = get_etag(tier)
+    key = CACHE_KEY % etag
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = make_snapshot(etag, get_entries(tier))
+        cache.set(key, snapshot, CACHE_TIMEOUT)
+    return etag, snapshot
@@ -1,7 +1,111 @@
 $(function() {
+  var STORAGE_PREFIX = 'find-snapshot:';
+  var MAX_RESULTS = 10;
+
+  // Snapshots are kept in session storage, rather than local storage,
+  // so that privileged snapshots don't outlive the browser session.
+  function loadStoredSnapshot(url) {
+    try {
+      return JSON.parse(window.sessionStorage.getItem(STORAGE_PREFIX + url));
+    } catch (e) {
+      return null;
+    }
+  }
+
+  function storeSnapshot(url, stored) {
+    try {
+      window.sessionStorage.setItem(STORAGE_PREFIX + url,
+                                    JSON.stringify(stored));
+    } catch (e) {}
+  }
+
+  function fetchSnapshot(url) {
+    var stored = loadStoredSnapshot(url);
+    var headers = {};
+
+    if (stored && stored.etag)
+      headers['If-None-Match'] = stored.etag;
+    return $.ajax({
+      url: url,
+      dataType: 'json',
+      headers: headers
+    }).then(function(data, status, xhr) {
+      if (xhr.status == 304)
+        return stored.snapshot;
+      storeSnapshot(url, {
+        etag: xhr.getResponseHeader('ETag'),
+        snapshot: data
+      });
+      return data;
+    });
+  }
+
+  function normalize(text) {
+    return $.trim(text.toLowerCase().split(/\s+/).join(' '));
+  }
+
+  // Approximates the server's \w+ word matching: runs of anything but
+  // whitespace and punctuation.
+  function words(text) {
+    return text.match(/[^\s!-\/:-@\[-\^`{-~\u00a0-\u00bf\u2000-\u206f]+/g) ||
+           [];
+  }
+
+  // This mirrors the server's ranking: exact, then prefix, then
+  // substring matches of any key, then entries whose words include
+  // every word of the query.
+  function rank(entry, fields, query, queryWords) {
+    var keys = entry[fields.keys];
+    var entryWords = entry[fields.words];
+    var i;
+
+    if ($.inArray(query, keys) != -1) return 0;
+    for (i = 0; i < keys.length; i++)
+      if (keys[i].indexOf(query) == 0) return 1;
+    for (i = 0; i < keys.length; i++)
+      if (keys[i].indexOf(query) > 0) return 2;
+    if (!queryWords.length) return -1;
+    for (i = 0; i < queryWords.length; i++)
+      if ($.inArray(queryWords[i], entryWords) == -1) return -1;
+    return 3;
+  }
+
+  function findMatches(snapshot, query) {
+    var fields = {};
+    var matches = [];
+    var queryWords;
+
+    $.each(snapshot.fields, function(i, name) { fields[name] = i; });
+    query = normalize(query);
+    queryWords = words(query);
+    $.each(snapshot.entries, function(i, entry) {
+      var entryRank = rank(entry, fields, query, queryWords);
+      if (entryRank != -1)
+        matches.push({
+          rank: entryRank,
+          index: i,
+          value: entry[fields.value],
+          url: entry[fields.url]
+        });
+    });
+    // Entries are ordered the way the server breaks ties.
+    matches.sort(function(a, b) {
+      if (a.rank != b.rank) return a.rank - b.rank;
+      return a.index - b.index;
+    });
+    return matches.slice(0, MAX_RESULTS);
+  }
+
   $("[data-find-url]").each(function() {
     var name = $(this).attr('name');
     var url = $(this).attr('data-find-url');
+    var snapshotUrl = $(this).attr('data-find-snapshot-url');
+    var snapshot = null;
+
+    if (snapshotUrl)
+      fetchSnapshot(snapshotUrl).done(function(data) {
+        snapshot = data;
+      });
 
     $(this).typeahead({
       hint: true,
@@ -10,7 +114,9 @@ $(function() {
     }, {
       name: name,
       displayKey: 'value',
-      source: function findMatches(q, cb) {
+      source: function findMatchesOrQuery(q, cb) {
+        if (snapshot)
+          return cb(findMatches(snapshot, q));
         $.getJSON(url, {query: q}, cb);
       }
     }).on('typeahead:selected typeahead:autocompleted', function(e, sugg) {
@@ -1,17 +1,11 @@
 import urlparse
-import hashlib
-import markdown
-import bleach
 from django import template
 from django.utils.safestring import mark_safe
 
-register = template.Library()
-
-ALLOWED_ATTRIBUTES = bleach.ALLOWED_ATTRIBUTES.copy()
+from .. import richtext
+from ..models import get_email_hash
 
-ALLOWED_ATTRIBUTES.update(**{
-    'img': ['src', 'alt']
-})
+register = template.Library()
 
 @register.filter(name='markdown')
 def render_markdown(text):
@@ -19,15 +13,7 @@ def render_markdown(text):
     Render the given markdown/HTML text as sanitized HTML.
     """
 
-    return mark_safe(bleach.clean(
-        text=markdown.markdown(text),
-        tags=bleach.ALLOWED_TAGS + [
-            'p',
-            'pre',
-            'img'
-        ],
-        attributes=ALLOWED_ATTRIBUTES
-    ))
+    return mark_safe(richtext.render_markdown(text))
 
 @register.filter(name='domainname')
 def get_domainname(url):
@@ -50,4 +36,4 @@ def get_emailhash(email):
     email address. This is useful for constructing Gravatar URLs.
     """
 
-    return hashlib.md5(email.lower().strip()).hexdigest()
+    return get_email_hash(email)
@@ -0,0 +1,183 @@
+import StringIO
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend
+from django.contrib.auth.models import User
+from django.utils import timezone
+from mock import patch
+
+from hive import replicas
+
+from ..models import ImportedUserInfo, InvitationJob, InvitationJobItem
+from ..invitations import create_invitation_job, run_invitation_job, \
+                          prepare_to_resume, STALE_AFTER
+from ..management.commands.seeddata import create_user
+
+class InvitationTestCase(TestCase):
+    def setUp(self):
+        super(InvitationTestCase, self).setUp()
+        self.ann = create_user('ann', password='lol',
+                               email='ann@example.org')
+        self.bob = create_user('bob', password='lol',
+                               email='bob@example.org')
+        self.cat = create_user('cat', password='lol')
+        ImportedUserInfo.objects.create(user=self.ann)
+
+    def create_job(self):
+        return create_invitation_job(
+            User.objects.filter(username__in=['ann', 'bob', 'cat'])
+        )
+
+    def get_statuses(self, job):
+        return dict((item.user.username, item.status)
+                    for item in job.items.select_related('user'))
+
+class InvitationJobTests(InvitationTestCase):
+    def test_create_invitation_job_creates_missing_infos(self):
+        job = self.create_job()
+        self.assertEqual(job.total, 3)
+        self.assertEqual(job.items.count(), 3)
+        self.assertEqual(ImportedUserInfo.objects.count(), 3)
+
+    def test_run_invitation_job_invites_users(self):
+        job = self.create_job()
+        run_invitation_job(job.pk, batch_size=2)
+        job = InvitationJob.objects.get(pk=job.pk)
+        self.assertEqual(job.status, InvitationJob.DONE)
+        self.assertEqual(job.progress(), '2 of 3 sent, 0 failed, 1 skipped')
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(self.get_statuses(job), {
+            'ann': InvitationJobItem.SENT,
+            'bob': InvitationJobItem.SENT,
+            'cat': InvitationJobItem.SKIPPED
+        })
+        self.assertEqual(sorted(msg.to[0] for msg in mail.outbox),
+                         ['ann@example.org', 'bob@example.org'])
+        self.assertEqual(sorted(ImportedUserInfo.objects.filter(
+            was_sent_email=True
+        ).values_list('user__username', flat=True)), ['ann', 'bob'])
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_run_invitation_job_reads_from_primary(self):
+        job = self.create_job()
+        # A new thread starts out unpinned, and there's no 'replica'
+        # database to read from.
+        replicas.unpin()
+        try:
+            run_invitation_job(job.pk)
+        finally:
+            replicas.unpin()
+        self.assertEqual(InvitationJob.objects.using('default').get(
+            pk=job.pk
+        ).status, InvitationJob.DONE)
+
+    @patch('hive.bulk_mail.logger')
+    def test_failed_invitations_can_be_retried(self, logger):
+        job = self.create_job()
+        with patch.object(EmailBackend, 'send_messages',
+                          side_effect=IOError('nope')):
+            run_invitation_job(job.pk)
+        job = InvitationJob.objects.get(pk=job.pk)
+        self.assertEqual(job.progress(), '0 of 3 sent, 2 failed, 1 skipped')
+        self.assertEqual(job.items.get(user=self.ann).error, 'nope')
+
+        self.assertTrue(prepare_to_resume(job))
+        run_invitation_job(job.pk)
+        job = InvitationJob.objects.get(pk=job.pk)
+        self.assertEqual(job.progress(), '2 of 3 sent, 0 failed, 1 skipped')
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_running_jobs_are_not_resumable(self):
+        job = self.create_job()
+        job.status = InvitationJob.RUNNING
+        job.save()
+        self.assertFalse(prepare_to_resume(job))
+        self.assertFalse(run_invitation_job(job.pk))
+        self.assertEqual(InvitationJob.objects.get(pk=job.pk).status,
+                         InvitationJob.RUNNING)
+        self.assertEqual(mail.outbox, [])
+
+    def test_interrupted_jobs_are_resumable(self):
+        job = self.create_job()
+        InvitationJob.objects.filter(pk=job.pk).update(
+            status=InvitationJob.RUNNING,
+            modified=timezone.now() - STALE_AFTER
+        )
+        self.assertTrue(run_invitation_job(job.pk))
+        self.assertEqual(InvitationJob.objects.get(pk=job.pk).status,
+                         InvitationJob.DONE)
+
+    def test_items_in_flight_are_not_resent_when_taken_over(self):
+        job = self.create_job()
+        InvitationJob.objects.filter(pk=job.pk).update(
+            status=InvitationJob.RUNNING,
+            modified=timezone.now() - STALE_AFTER
+        )
+        job.items.filter(user=self.ann).update(
+            status=InvitationJobItem.SENDING
+        )
+        self.assertTrue(run_invitation_job(job.pk))
+        job = InvitationJob.objects.get(pk=job.pk)
+        self.assertEqual(job.progress(), '1 of 3 sent, 1 failed, 1 skipped')
+        self.assertEqual(self.get_statuses(job)['ann'],
+                         InvitationJobItem.FAILED)
+        self.assertEqual([msg.to[0] for msg in mail.outbox],
+                         ['bob@example.org'])
+
+    def test_finished_jobs_are_not_rerun(self):
+        job = self.create_job()
+        run_invitation_job(job.pk)
+        self.assertFalse(run_invitation_job(job.pk))
+        self.assertEqual(len(mail.outbox), 2)
+
+class RunInvitationJobsCommandTests(InvitationTestCase):
+    def test_runs_pending_and_interrupted_jobs(self):
+        pending = self.create_job()
+        interrupted = self.create_job()
+        InvitationJob.objects.filter(pk=interrupted.pk).update(
+            status=InvitationJob.RUNNING,
+            modified=timezone.now() - STALE_AFTER
+        )
+        running = self.create_job()
+        InvitationJob.objects.filter(pk=running.pk).update(
+            status=InvitationJob.RUNNING
+        )
+        call_command('runinvitationjobs', once=True, stdout=StringIO.StringIO())
+        self.assertEqual(dict(InvitationJob.objects.values_list(
+            'pk',
+            'status'
+        )), {
+            pending.pk: InvitationJob.DONE,
+            interrupted.pk: InvitationJob.DONE,
+            running.pk: InvitationJob.RUNNING
+        })
+        self.assertEqual(len(mail.outbox), 4)
+
+class InvitationAdminTests(InvitationTestCase):
+    def setUp(self):
+        super(InvitationAdminTests, self).setUp()
+        User.objects.create_superuser('admin', 'admin@example.org', 'lol')
+        self.client.login(username='admin', password='lol')
+
+    def test_action_creates_job_and_shows_progress(self):
+        response = self.client.post('/admin/auth/user/', {
+            'action': 'email_imported_users',
+            '_selected_action': [self.ann.pk, self.bob.pk]
+        })
+        job = InvitationJob.objects.get()
+        self.assertRedirects(response,
+                             '/admin/directory/invitationjob/%d/' % job.pk)
+        self.assertEqual(job.status, InvitationJob.PENDING)
+        self.assertEqual(job.total, 2)
+        self.assertEqual(mail.outbox, [])
+
+        response = self.client.get(response['Location'])
+        self.assertContains(response, '0 of 2 sent, 0 failed, 0 skipped')
+        self.assertContains(response, 'http-equiv="refresh"')
+
+    def test_job_list_shows_progress(self):
+        self.create_job()
+        response = self.client.get('/admin/directory/invitationjob/')
+        self.assertContains(response, '0 of 3 sent, 0 failed, 0 skipped')
@@ -0,0 +1,65 @@
+from django.test import TestCase
+
+from ..models import Organization
+from .. import keyset
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        super(KeysetPaginationTests, self).setUp()
+        for slug in ['c', 'a', 'b', 'b2', 'd']:
+            Organization(name=slug[0], slug=slug,
+                         website='http://%s.org/' % slug).save()
+
+    def get_slugs(self, page):
+        return [org.slug for org in page]
+
+    def paginate(self, cursor=None):
+        return keyset.paginate(Organization.objects.all(), cursor, 2)
+
+    def test_first_page(self):
+        page = self.paginate()
+        self.assertEqual(self.get_slugs(page), ['a', 'b'])
+        self.assertFalse(page.has_previous)
+        self.assertEqual(page.previous_cursor, None)
+        self.assertTrue(page.has_next)
+
+    def test_next_pages_break_ties_by_pk(self):
+        page = self.paginate(self.paginate().next_cursor)
+        self.assertEqual(self.get_slugs(page), ['b2', 'c'])
+        self.assertTrue(page.has_previous)
+        page = self.paginate(page.next_cursor)
+        self.assertEqual(self.get_slugs(page), ['d'])
+        self.assertFalse(page.has_next)
+
+    def test_previous_pages(self):
+        page = self.paginate(self.paginate().next_cursor)
+        page = self.paginate(self.paginate(page.next_cursor).previous_cursor)
+        self.assertEqual(self.get_slugs(page), ['b2', 'c'])
+        page = self.paginate(page.previous_cursor)
+        self.assertEqual(self.get_slugs(page), ['a', 'b'])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+
+    def test_empty_pages_link_back(self):
+        page = self.paginate(self.paginate().next_cursor)
+        Organization.objects.filter(slug='d').delete()
+        page = self.paginate(page.next_cursor)
+        self.assertEqual(self.get_slugs(page), [])
+        self.assertTrue(page.has_previous)
+        self.assertFalse(page.has_next)
+        page = self.paginate(page.previous_cursor)
+        self.assertEqual(self.get_slugs(page), ['b2', 'c'])
+
+        page = self.paginate(self.paginate().next_cursor)
+        Organization.objects.filter(slug__in=['a', 'b']).delete()
+        page = self.paginate(page.previous_cursor)
+        self.assertEqual(self.get_slugs(page), [])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+        page = self.paginate(page.next_cursor)
+        self.assertEqual(self.get_slugs(page), ['b2', 'c'])
+
+    def test_invalid_cursors_raise_value_error(self):
+        for cursor in ['lol', keyset.signing.dumps(['sideways', 'a', 1],
+                                                   salt=keyset.CURSOR_SALT)]:
+            self.assertRaises(ValueError, self.paginate, cursor)
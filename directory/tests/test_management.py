@@ -1,7 +1,13 @@
 import StringIO
 from mock import patch
 from django.test import TestCase
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
 from django.core.management import call_command
+from django.contrib.auth.models import User
+
+from ..models import Organization, Membership, ImportedUserInfo
+from ..management.commands.seeddata import create_user
 
 class ManagementCommandTests(TestCase):
     def test_seeddata_works_with_password(self):
@@ -14,3 +20,110 @@ class ManagementCommandTests(TestCase):
         output = StringIO.StringIO()
         with patch('sys.stdout', output): call_command('seeddata')
         self.assertRegexpMatches(output.getvalue(), "password 'test'")
+
+class RenderMissionsTests(TestCase):
+    fixtures = ['wnyc.json']
+
+    def test_rendermissions_rerenders_stale_html(self):
+        Organization.objects.filter(slug='wnyc').update(mission_html='old')
+        output = StringIO.StringIO()
+        call_command('rendermissions', stdout=output)
+        self.assertEqual(output.getvalue(),
+                         'Re-rendered 1 of 1 organization missions.\n')
+        wnyc = Organization.objects.get(slug='wnyc')
+        self.assertTrue(wnyc.mission_html.startswith('<p>Radio Rookies'))
+
+    def test_rendermissions_skips_up_to_date_html(self):
+        output = StringIO.StringIO()
+        call_command('rendermissions', stdout=output)
+        self.assertEqual(output.getvalue(),
+                         'Re-rendered 0 of 1 organization missions.\n')
+
+class HashEmailsTests(TestCase):
+    def test_hashemails_updates_stale_hashes(self):
+        create_user('foo', email='foo@example.org')
+        create_user('bar', email='bar@example.org')
+        Membership.objects.filter(user__username='foo').update(email_hash='')
+        output = StringIO.StringIO()
+        call_command('hashemails', stdout=output)
+        self.assertEqual(output.getvalue(),
+                         'Updated 1 of 2 membership email hashes.\n')
+        self.assertEqual(
+            Membership.objects.get(user__username='foo').email_hash,
+            '64f677e30cd713a9467794a26711e42d'
+        )
+
+class EmailImportedUsersTests(TestCase):
+    def setUp(self):
+        super(EmailImportedUsersTests, self).setUp()
+        for username in ['ann', 'bob', 'cat']:
+            user = create_user(username, password='lol',
+                               email='%s@example.org' % username,
+                               first_name=username.title())
+            ImportedUserInfo.objects.create(user=user,
+                                            was_sent_email=username == 'cat')
+
+    def call(self, *args, **kwargs):
+        output = StringIO.StringIO()
+        call_command('emailimportedusers', *args, stdout=output, **kwargs)
+        return output.getvalue()
+
+    def sent_emails(self):
+        return sorted(ImportedUserInfo.objects.filter(
+            was_sent_email=True
+        ).values_list('user__email', flat=True))
+
+    def test_emails_users_individually(self):
+        self.call('bob@example.org')
+        self.assertEqual([msg.to for msg in mail.outbox],
+                         [['bob@example.org']])
+        self.assertEqual(self.sent_emails(),
+                         ['bob@example.org', 'cat@example.org'])
+
+    def test_bulk_emails_match_individual_emails(self):
+        self.call('ann@example.org')
+        self.call('ann@example.org', bulk=True, force=True)
+        individual, bulk = mail.outbox
+        self.assertEqual(bulk.subject, individual.subject)
+        self.assertEqual(bulk.body, individual.body)
+        self.assertEqual(bulk.to, ['ann@example.org'])
+        self.assertIn('Hi Ann!', bulk.body)
+
+    def test_bulk_emails_unemailed_users_in_batches(self):
+        output = self.call(bulk=True, batch_size=1, workers=2)
+        self.assertEqual(sorted(msg.to[0] for msg in mail.outbox),
+                         ['ann@example.org', 'bob@example.org'])
+        self.assertEqual(self.sent_emails(), ['ann@example.org',
+                                              'bob@example.org',
+                                              'cat@example.org'])
+        self.assertEqual(output.count('Emailed 1 of 1 users in batch.'), 2)
+        self.assertTrue(output.endswith('Emailed 2 users, 0 failed.\n'))
+
+    def test_bulk_skips_users_without_usable_passwords(self):
+        User.objects.filter(username='ann').update(password='')
+        User.objects.filter(username='bob').update(password='bogus$hash')
+        self.assertEqual(self.call('ann@example.org', bulk=True),
+                         'No users need to be emailed.\n')
+        output = self.call(bulk=True)
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(output.endswith('Emailed 0 users, 0 failed.\n'))
+        self.assertEqual(self.sent_emails(), ['cat@example.org'])
+
+    def test_bulk_does_not_mark_failed_users(self):
+        with patch('hive.bulk_mail.logger'):
+            with patch.object(EmailBackend, 'send_messages',
+                              side_effect=IOError('nope')):
+                output = self.call(bulk=True)
+        self.assertIn('Failed to email Ann <ann@example.org>: nope', output)
+        self.assertTrue(output.endswith('Emailed 0 users, 2 failed.\n'))
+        self.assertEqual(self.sent_emails(), ['cat@example.org'])
+
+    def test_bulk_dry_run_does_not_mark_users(self):
+        with patch('sys.stdout', StringIO.StringIO()):
+            self.call(bulk=True, dry_run=True)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(self.sent_emails(), ['cat@example.org'])
+
+    def test_reports_when_nobody_needs_email(self):
+        self.assertEqual(self.call('cat@example.org', bulk=True),
+                         'No users need to be emailed.\n')
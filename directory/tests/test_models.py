@@ -1,8 +1,11 @@
+import json
+import hashlib
 from django.test import TestCase
+from django.core import serializers
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 
-from ..models import Organization, ContentChannel
+from ..models import Organization, ContentChannel, Membership
 from ..management.commands.seeddata import create_user
 
 class MembershipTests(TestCase):
@@ -13,6 +16,48 @@ class MembershipTests(TestCase):
         self.assertTrue(user.membership.is_listed)
         self.assertFalse(user.membership.organization)
 
+    def test_membership_email_hash_is_set_on_creation(self):
+        user = User(username='foo', email=' MyEmailAddress@example.com')
+        user.save()
+        self.assertEqual(user.membership.email_hash,
+                         '0bc83cb571cd1c50ba6f3e8a78ef1346')
+
+    def test_membership_email_hash_follows_user_email(self):
+        user = User(username='foo', email='foo@example.org')
+        user.save()
+        user.email = ' MyEmailAddress@example.com'
+        user.save()
+        self.assertEqual(Membership.objects.get(user=user).email_hash,
+                         '0bc83cb571cd1c50ba6f3e8a78ef1346')
+
+    def test_membership_email_hash_supports_non_ascii_emails(self):
+        user = User(username='foo', email=u'bob@b\xfccher.de')
+        user.save()
+        self.assertEqual(Membership.objects.get(user=user).email_hash,
+                         hashlib.md5('bob@b\xc3\xbccher.de').hexdigest())
+
+    def load_fixture(self, objects):
+        for obj in serializers.deserialize('json', json.dumps(objects)):
+            obj.save()
+
+    def test_membership_email_hash_is_set_on_raw_saves(self):
+        user = {'model': 'auth.user', 'pk': 100, 'fields': {
+            'username': 'foo',
+            'email': ' MyEmailAddress@example.com',
+            'password': '!'
+        }}
+        membership = {'model': 'directory.membership', 'pk': 100, 'fields': {
+            'user': 100,
+            'created': '2014-01-01T00:00:00Z',
+            'modified': '2014-01-01T00:00:00Z'
+        }}
+        for objects in [[user, membership], [membership, user]]:
+            self.load_fixture(objects)
+            self.assertEqual(Membership.objects.get(pk=100).email_hash,
+                             '0bc83cb571cd1c50ba6f3e8a78ef1346')
+            Membership.objects.all().delete()
+            User.objects.all().delete()
+
 class OrganizationTests(TestCase):
     fixtures = ['wnyc.json']
 
@@ -33,6 +78,19 @@ class OrganizationTests(TestCase):
             wnyc.full_clean
         )
 
+    def test_mission_html_is_rendered_from_fixtures(self):
+        wnyc = Organization.objects.get(slug='wnyc')
+        self.assertTrue(wnyc.mission_html.startswith('<p>Radio Rookies'))
+
+    def test_mission_html_is_rendered_on_save(self):
+        wnyc = Organization.objects.get(slug='wnyc')
+        wnyc.mission = '*hi* <script>lol()</script>'
+        wnyc.save()
+        self.assertEqual(
+            Organization.objects.get(slug='wnyc').mission_html,
+            '<p><em>hi</em> &lt;script&gt;lol()&lt;/script&gt;</p>'
+        )
+
 class ContentChannelTests(TestCase):
     def test_fa_icon_returns_empty_string_if_none_available(self):
         c = ContentChannel(category='other')
@@ -0,0 +1,287 @@
+import doctest
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from directory import search
+from directory.search import snapshot
+from directory.search.backends import base, memory, postgresql
+from ..models import Organization
+from ..management.commands.seeddata import create_user
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(search))
+    tests.addTests(doctest.DocTestSuite(base))
+    tests.addTests(doctest.DocTestSuite(memory))
+    tests.addTests(doctest.DocTestSuite(postgresql))
+    tests.addTests(doctest.DocTestSuite(snapshot))
+    return tests
+
+class SearchBackendTests(object):
+    fixtures = ['wnyc.json']
+
+    backend = None
+
+    def setUp(self):
+        super(SearchBackendTests, self).setUp()
+        self.wnyc = Organization.objects.get(slug='wnyc')
+
+    def find(self, query, include_people=True, **kwargs):
+        backend = search.get_backend(self.backend)
+        results, has_more = backend.find(query,
+                                         include_people=include_people,
+                                         **kwargs)
+        return [result['value'] for result in results]
+
+    def create_org(self, name, **kwargs):
+        org = Organization(name=name, slug=name.lower().replace(' ', '-'),
+                           website='http://example.org/', **kwargs)
+        org.save()
+        return org
+
+    def test_short_queries_are_matched(self):
+        self.assertEqual(self.find('wn'), ["WNYC's Radio Rookies"])
+
+    def test_queries_are_case_insensitive(self):
+        self.assertEqual(self.find('RADIO ROOK'), ["WNYC's Radio Rookies"])
+
+    def test_non_matching_queries_return_nothing(self):
+        self.assertEqual(self.find('rookiez'), [])
+
+    def test_mission_words_are_matched(self):
+        self.assertEqual(self.find('public radio initiative'),
+                         ["WNYC's Radio Rookies"])
+
+    def test_mission_word_fragments_are_not_matched(self):
+        self.assertEqual(self.find('initiat'), [])
+
+    def test_mission_words_are_not_stemmed(self):
+        self.create_org('Teen Radio', mission='For teens who like radio.')
+        self.assertEqual(self.find('teens'), ['Teen Radio'])
+        self.assertEqual(self.find('teen radio likes'), [])
+
+    def test_results_are_ranked_by_relevance(self):
+        self.create_org('Talk Radio')
+        self.create_org('Sound Stuff', mission='We teach radio.')
+        self.create_org('Radio Rangers')
+        self.create_org('Radio')
+        self.assertEqual(self.find('radio'), [
+            'Radio',
+            'Radio Rangers',
+            'Talk Radio',
+            "WNYC's Radio Rookies",
+            'Sound Stuff',
+        ])
+
+    def test_people_are_ranked_after_orgs_of_same_rank(self):
+        create_user('foo', first_name='Radio', last_name='Guy',
+                    organization=self.wnyc)
+        self.create_org('Radio')
+        self.assertEqual(self.find('radio'), [
+            'Radio',
+            'Radio Guy',
+            "WNYC's Radio Rookies",
+        ])
+
+    def test_results_are_limited(self):
+        self.create_org('Radio Rangers')
+        backend = search.get_backend(self.backend)
+        results, has_more = backend.find('radio', limit=1)
+        self.assertEqual([r['value'] for r in results], ['Radio Rangers'])
+        self.assertTrue(has_more)
+
+    def test_results_can_be_offset(self):
+        self.create_org('Radio Rangers')
+        backend = search.get_backend(self.backend)
+        results, has_more = backend.find('radio', limit=1, offset=1)
+        self.assertEqual([r['value'] for r in results],
+                         ["WNYC's Radio Rookies"])
+        self.assertFalse(has_more)
+
+    def test_like_wildcards_are_matched_literally(self):
+        self.assertEqual(self.find('r_dio'), [])
+        self.assertEqual(self.find('r%dio'), [])
+
+    def test_inactive_orgs_are_excluded(self):
+        self.wnyc.is_active = False
+        self.wnyc.save()
+        self.assertEqual(self.find('rookies'), [])
+
+    def test_people_are_excluded_unless_requested(self):
+        create_user('foo', first_name='Brian', last_name='Lehrer',
+                    organization=self.wnyc)
+        self.assertEqual(self.find('lehrer'), ['Brian Lehrer'])
+        self.assertEqual(self.find('lehrer', include_people=False), [])
+
+    def test_unlisted_people_are_excluded(self):
+        user = create_user('foo', first_name='Brian', last_name='Lehrer',
+                           organization=self.wnyc)
+        user.membership.is_listed = False
+        user.membership.save()
+        self.assertEqual(self.find('lehrer'), [])
+
+    def test_inactive_people_are_excluded(self):
+        create_user('foo', first_name='Brian', last_name='Lehrer',
+                    is_active=False)
+        self.assertEqual(self.find('lehrer'), [])
+
+class DbSearchBackendTests(SearchBackendTests, TestCase):
+    backend = 'directory.search.backends.db.SearchBackend'
+
+@skipUnless(connection.vendor == 'postgresql', 'requires PostgreSQL')
+class PostgresSearchBackendTests(SearchBackendTests, TestCase):
+    backend = 'directory.search.backends.postgresql.SearchBackend'
+
+class MemorySearchBackendTests(SearchBackendTests, TestCase):
+    backend = 'directory.search.backends.memory.SearchBackend'
+
+    def setUp(self):
+        super(MemorySearchBackendTests, self).setUp()
+        self.index = memory.index
+        self.index.reset()
+
+    def test_index_is_built_on_first_query(self):
+        self.assertFalse(self.index.is_built)
+        self.assertEqual(self.find('rookies'), ["WNYC's Radio Rookies"])
+        self.assertTrue(self.index.is_built)
+
+    def test_new_orgs_are_added_incrementally(self):
+        self.find('rookies')
+        Organization(name='Radio Rangers', slug='rangers',
+                     website='http://example.org/').save()
+        self.assertEqual(self.find('radio'), ['Radio Rangers',
+                                              "WNYC's Radio Rookies"])
+
+    def test_deactivated_orgs_are_removed_incrementally(self):
+        self.find('rookies')
+        self.wnyc.is_active = False
+        self.wnyc.save()
+        self.assertEqual(self.find('rookies'), [])
+
+    def test_renamed_users_are_updated_incrementally(self):
+        user = create_user('foo', first_name='Brian', last_name='Lehrer',
+                           organization=self.wnyc)
+        self.find('lehrer')
+        user.last_name = 'Eno'
+        user.save()
+        self.assertEqual(self.find('lehrer'), [])
+        self.assertEqual(self.find('eno'), ['Brian Eno'])
+
+    def test_unlisted_people_are_removed_incrementally(self):
+        user = create_user('foo', first_name='Brian', last_name='Lehrer',
+                           organization=self.wnyc)
+        self.find('lehrer')
+        user.membership.is_listed = False
+        user.membership.save()
+        self.assertEqual(self.find('lehrer'), [])
+
+    def test_deleted_users_are_removed_incrementally(self):
+        user = create_user('foo', first_name='Brian', last_name='Lehrer',
+                           organization=self.wnyc)
+        self.find('lehrer')
+        user.delete()
+        self.assertEqual(self.find('lehrer'), [])
+
+    def test_incremental_updates_keep_index_current(self):
+        self.find('rookies')
+        self.wnyc.name = 'Radio Rangers'
+        self.wnyc.save()
+        self.assertTrue(self.index.is_current())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.find('rangers'), ['Radio Rangers'])
+
+    def test_index_is_rebuilt_when_version_changes_elsewhere(self):
+        self.find('rookies')
+        # Simulate another process changing an org, which only bumps
+        # the shared version as far as this process is concerned.
+        Organization.objects.filter(pk=self.wnyc.pk).update(
+            name='Radio Rangers'
+        )
+        search.bump_version()
+        self.assertFalse(self.index.is_current())
+        self.assertEqual(self.find('rangers'), ['Radio Rangers'])
+        self.assertTrue(self.index.is_current())
+
+@override_settings(
+    SEARCH_BACKEND='directory.search.backends.db.SearchBackend'
+)
+class ResultsCacheTests(TestCase):
+    fixtures = ['wnyc.json']
+
+    def find(self, query, include_people=False):
+        results, has_more = search.find(query, include_people=include_people)
+        return [result['value'] for result in results]
+
+    def test_repeated_queries_are_served_from_cache(self):
+        self.assertEqual(self.find('rookies'), ["WNYC's Radio Rookies"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.find('rookies'), ["WNYC's Radio Rookies"])
+
+    def test_equivalent_queries_share_cache_entries(self):
+        self.find('radio rookies')
+        with self.assertNumQueries(0):
+            self.find(' Radio  ROOKIES')
+
+    def test_privilege_tiers_have_separate_cache_entries(self):
+        create_user('foo', first_name='Rookie', last_name='Guy')
+        self.assertEqual(self.find('rookie'), ["WNYC's Radio Rookies"])
+        self.assertEqual(self.find('rookie', include_people=True),
+                         ['Rookie Guy', "WNYC's Radio Rookies"])
+
+    def test_cache_is_invalidated_by_saving_orgs(self):
+        self.find('rookies')
+        wnyc = Organization.objects.get(slug='wnyc')
+        wnyc.name = 'Radio Rookies'
+        wnyc.save()
+        self.assertEqual(self.find('rookies'), ['Radio Rookies'])
+
+    def test_cache_is_invalidated_by_saving_users(self):
+        user = create_user('foo', first_name='Brian', last_name='Lehrer')
+        self.assertEqual(self.find('eno', include_people=True), [])
+        user.last_name = 'Eno'
+        user.save()
+        self.assertEqual(self.find('eno', include_people=True),
+                         ['Brian Eno'])
+
+    def test_version_is_not_bumped_by_logins(self):
+        user = create_user('foo')
+        version = search.get_version()
+        user.save(update_fields=['last_login'])
+        self.assertEqual(search.get_version(), version)
+        user.save()
+        self.assertNotEqual(search.get_version(), version)
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_results_are_not_cached_without_shared_cache(self):
+        self.find('rookies')
+        with self.assertNumQueries(1):
+            self.find('rookies')
+
+    def test_blank_queries_return_nothing(self):
+        self.assertEqual(self.find('   '), [])
+
+class CursorTests(TestCase):
+    def test_cursors_round_trip(self):
+        cursor = search.make_cursor(u'radio', 10)
+        self.assertEqual(search.parse_cursor(u'radio', cursor), 10)
+
+    def test_cursors_for_other_queries_are_rejected(self):
+        cursor = search.make_cursor(u'radio', 10)
+        self.assertRaises(ValueError, search.parse_cursor, u'tv', cursor)
+
+    def test_tampered_cursors_are_rejected(self):
+        cursor = search.make_cursor(u'radio', 10)
+        self.assertRaises(ValueError, search.parse_cursor, u'radio',
+                          cursor + 'x')
+
+class GetBackendTests(TestCase):
+    @override_settings(
+        SEARCH_BACKEND='directory.search.backends.db.SearchBackend'
+    )
+    def test_uses_search_backend_setting(self):
+        from directory.search.backends.db import SearchBackend
+        self.assertTrue(isinstance(search.get_backend(), SearchBackend))
+
+    def test_reuses_backend_instances(self):
+        self.assertTrue(search.get_backend() is search.get_backend())
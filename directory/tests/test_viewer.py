@@ -0,0 +1,66 @@
+from django.test import TestCase, RequestFactory
+from django.http import HttpResponse
+from django.contrib.auth.models import AnonymousUser, User
+
+from ..models import Organization
+from ..viewer import Viewer, get_viewer, privileged_required
+from ..management.commands.seeddata import create_user
+
+class ViewerTests(TestCase):
+    fixtures = ['wnyc.json']
+
+    def setUp(self):
+        super(ViewerTests, self).setUp()
+        self.wnyc = Organization.objects.get(slug='wnyc')
+        create_user('wnyc_member', organization=self.wnyc)
+        create_user('non_member')
+
+    def get_viewer(self, username):
+        return Viewer(User.objects.get(username=username))
+
+    def test_anonymous_users_are_not_privileged(self):
+        viewer = Viewer(AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertIsNone(viewer.membership)
+            self.assertIsNone(viewer.organization_id)
+            self.assertFalse(viewer.is_vouched_for())
+            self.assertFalse(viewer.is_privileged)
+
+    def test_members_are_loaded_in_one_query(self):
+        viewer = self.get_viewer('wnyc_member')
+        with self.assertNumQueries(1):
+            self.assertTrue(viewer.is_privileged)
+            self.assertTrue(viewer.is_vouched_for(self.wnyc))
+            self.assertEqual(viewer.organization_id, self.wnyc.pk)
+            self.assertEqual(viewer.organization.slug, 'wnyc')
+            self.assertEqual(viewer.user.membership.organization.slug,
+                             'wnyc')
+
+    def test_non_members_are_not_privileged(self):
+        viewer = self.get_viewer('non_member')
+        self.assertFalse(viewer.is_vouched_for())
+        self.assertFalse(viewer.is_privileged)
+
+    def test_staff_are_privileged(self):
+        user = User.objects.get(username='non_member')
+        user.is_staff = True
+        user.save()
+        self.assertTrue(self.get_viewer('non_member').is_privileged)
+
+    def test_get_viewer_works_without_middleware(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.assertFalse(get_viewer(request).is_privileged)
+        self.assertIs(get_viewer(request), request.viewer)
+
+    def test_privileged_required_redirects_to_login(self):
+        view = privileged_required(lambda request: HttpResponse('hi'))
+        request = RequestFactory().get('/expertise/?q=radio')
+        request.user = User.objects.get(username='non_member')
+        response = view(request)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'],
+                         '/accounts/login/?next=/expertise/%3Fq%3Dradio')
+        request = RequestFactory().get('/expertise/')
+        request.user = User.objects.get(username='wnyc_member')
+        self.assertEqual(view(request).content, 'hi')
@@ -1,9 +1,21 @@
+import re
 import json
-from django.test import TestCase
+from django.test import TestCase, RequestFactory
+from django.http import HttpResponse
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.middleware.csrf import get_token
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.db import connection
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from registration.models import RegistrationProfile
+from mock import patch
 
-from ..models import Organization
+from .. import views, pagecache
+from ..models import Organization, ContentChannel, Expertise
 from ..management.commands.seeddata import create_user
 
 get_org = lambda slug: Organization.objects.get(slug=slug)
@@ -19,6 +31,7 @@ class WnycTestCase(TestCase):
 
     def setUp(self):
         super(WnycTestCase, self).setUp()
+        cache.clear()
         self.wnyc = get_org('wnyc')
         create_user('non_member', password='lol')
         user = create_user('wnyc_member', email='member@wnyc.org',
@@ -40,8 +53,9 @@ class WnycAndAmnhTestCase(WnycTestCase):
                     password='lol', organization=self.amnh)
 
 class FindJsonTests(WnycTestCase):
-    def query(self, query):
-        response = self.client.get('/find.json', {'query': query})
+    def query(self, query, **kwargs):
+        kwargs['query'] = query
+        response = self.client.get('/find.json', kwargs)
         if response['Content-Type'] == 'application/json':
             response.json = json.loads(response.content)
         return response
@@ -70,6 +84,115 @@ class FindJsonTests(WnycTestCase):
             'value': 'Brian Lehrer'
         }])
 
+    def test_invalid_limits_fail(self):
+        response = self.query('rookies', limit='lol')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_cursors_fail(self):
+        response = self.query('rookies', cursor='lol')
+        self.assertEqual(response.status_code, 400)
+
+    def test_link_header_is_absent_when_there_are_no_more_results(self):
+        response = self.query('rookies')
+        self.assertFalse(response.has_header('Link'))
+
+    def test_link_header_points_to_next_results(self):
+        self.login_as_wnyc_member()
+        self.wnyc.name = 'Brian Radio'
+        self.wnyc.save()
+        response = self.query('bri', limit=1)
+        self.assertEqual(response.json, [{
+            'url': '/orgs/wnyc/',
+            'value': 'Brian Radio'
+        }])
+        next_url = re.match(r'<(.+)>; rel="next"', response['Link']).group(1)
+        response = self.client.get(next_url)
+        self.assertEqual(json.loads(response.content), [{
+            'url': '/users/wnyc_member/',
+            'value': 'Brian Lehrer'
+        }])
+        self.assertFalse(response.has_header('Link'))
+
+class FindSnapshotJsonTests(WnycTestCase):
+    def setUp(self):
+        super(FindSnapshotJsonTests, self).setUp()
+        Organization.objects.filter(pk=self.wnyc.pk).update(
+            mission='Radio for teens, by teens.'
+        )
+
+    def get(self, **kwargs):
+        return self.client.get('/find-snapshot.json', **kwargs)
+
+    def get_entries(self, response):
+        return json.loads(response.content)['entries']
+
+    def test_public_snapshot_excludes_people(self):
+        response = self.get()
+        self.assertEqual(self.get_entries(response), [
+            ["WNYC's Radio Rookies", '/orgs/wnyc/', ["wnyc's radio rookies"],
+             ['by', 'for', 'radio', 'teens']]
+        ])
+
+    def test_privileged_snapshot_includes_people(self):
+        self.login_as_wnyc_member()
+        response = self.get()
+        self.assertEqual(self.get_entries(response), [
+            ["WNYC's Radio Rookies", '/orgs/wnyc/', ["wnyc's radio rookies"],
+             ['by', 'for', 'radio', 'teens']],
+            ['Brian Lehrer', '/users/wnyc_member/', ['brian', 'lehrer'], []]
+        ])
+
+    def test_snapshots_have_different_etags_per_tier(self):
+        public_etag = self.get()['ETag']
+        self.login_as_wnyc_member()
+        self.assertNotEqual(self.get()['ETag'], public_etag)
+
+    def test_matching_etag_returns_304(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_matching_gzipped_etag_returns_304(self):
+        for i in range(5):
+            Organization.objects.create(name='Organization %d' % i,
+                                        slug='org-%d' % i)
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        etag = response['ETag']
+        self.assertTrue(etag.endswith(';gzip"'))
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip',
+                            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_orgs_change(self):
+        etag = self.get()['ETag']
+        self.wnyc.name = 'Radio Rookies'
+        self.wnyc.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_entries(response)[0][0], 'Radio Rookies')
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_etag_follows_content_without_shared_cache(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Changes made by other processes don't bump the local version.
+        Organization.objects.filter(pk=self.wnyc.pk).update(
+            name='Radio Rookies'
+        )
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_entries(response)[0][0], 'Radio Rookies')
+
+    def test_etag_changes_when_memberships_change(self):
+        self.login_as_wnyc_member()
+        etag = self.get()['ETag']
+        membership = User.objects.get(username='wnyc_member').membership
+        membership.is_listed = False
+        membership.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(self.get_entries(response)), 1)
+
 class UserDetailTests(WnycTestCase):
     def test_nonmembers_are_redirected(self):
         self.login_as_non_member()
@@ -82,6 +205,98 @@ class UserDetailTests(WnycTestCase):
         response = self.client.get('/users/wnyc_member/')
         self.assertContains(response, 'member@wnyc.org')
 
+class ExpertiseTests(WnycTestCase):
+    def setUp(self):
+        super(ExpertiseTests, self).setUp()
+        self.wnyc_member = User.objects.get(username='wnyc_member')
+        self.wnyc_member.skills.create(category='badges',
+                                       details='Open Badges for radio')
+        self.wnyc_member.skills.create(category='youth')
+        other = create_user('other', first_name='Other', last_name='Person',
+                            organization=self.wnyc)
+        other.skills.create(category='youth', details='Teen programs')
+
+    def query(self, **kwargs):
+        response = self.client.get('/expertise.json', kwargs)
+        response.json = json.loads(response.content)
+        return response
+
+    def get_counts(self, response):
+        return dict((facet['category'], facet['count'])
+                    for facet in response.json['facets'])
+
+    def get_names(self, response):
+        return [result['name'] for result in response.json['results']]
+
+    def test_nonmembers_are_redirected(self):
+        self.login_as_non_member()
+        response = self.client.get('/expertise/', follow=True)
+        self.assertRedirects(response, '/accounts/login/?next=/expertise/')
+
+    def test_json_is_forbidden_to_nonmembers(self):
+        self.login_as_non_member()
+        response = self.client.get('/expertise.json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_members_can_view_page(self):
+        self.login_as_wnyc_member()
+        response = self.client.get('/expertise/', {'category': 'badges'})
+        self.assertContains(response, 'Open Badges for radio')
+        self.assertNotContains(response, 'Other Person')
+
+    def test_page_without_matches_has_no_empty_list(self):
+        self.login_as_wnyc_member()
+        response = self.client.get('/expertise/', {'category': 'rfp'})
+        self.assertContains(response, 'No members with matching expertise')
+        self.assertNotContains(response, 'media-list')
+
+    def test_facet_counts_are_returned(self):
+        self.login_as_wnyc_member()
+        counts = self.get_counts(self.query())
+        self.assertEqual(counts['youth'], 2)
+        self.assertEqual(counts['badges'], 1)
+        self.assertEqual(counts['rfp'], 0)
+
+    def test_facet_counts_ignore_category_filter(self):
+        self.login_as_wnyc_member()
+        counts = self.get_counts(self.query(category='badges'))
+        self.assertEqual(counts['youth'], 2)
+
+    def test_filtering_by_category(self):
+        self.login_as_wnyc_member()
+        response = self.query(category='badges')
+        self.assertEqual(self.get_names(response), ['Brian Lehrer'])
+        self.assertEqual(response.json['results'][0]['skills'], [{
+            'category': 'badges',
+            'label': 'Badges',
+            'details': 'Open Badges for radio'
+        }])
+
+    def test_filtering_by_multiple_categories(self):
+        self.login_as_wnyc_member()
+        response = self.query(category=['badges', 'youth'])
+        self.assertEqual(self.get_names(response),
+                         ['Brian Lehrer', 'Other Person'])
+
+    def test_filtering_by_text_matches_details(self):
+        self.login_as_wnyc_member()
+        response = self.query(q='teen')
+        self.assertEqual(self.get_names(response), ['Other Person'])
+        self.assertEqual(self.get_counts(response)['youth'], 1)
+
+    def test_filtering_by_text_matches_category_names(self):
+        self.login_as_wnyc_member()
+        response = self.query(q='badge')
+        self.assertEqual(self.get_names(response), ['Brian Lehrer'])
+
+    def test_unlisted_members_are_excluded(self):
+        self.wnyc_member.membership.is_listed = False
+        self.wnyc_member.membership.save()
+        self.login_as_wnyc_member()
+        response = self.query(category='badges')
+        self.assertEqual(self.get_names(response), [])
+        self.assertEqual(self.get_counts(response)['youth'], 1)
+
 class UserEditTests(WnycTestCase):
     BASE_FORM = {
         'expertise-TOTAL_FORMS': '3',
@@ -198,6 +413,341 @@ class HomePageTests(WnycTestCase):
         response = self.client.get('/')
         self.assertNotContains(response, 'member@wnyc.org')
 
+WNYC_NAME = u"WNYC's Radio Rookies"
+
+class AgeFilterTests(WnycAndAmnhTestCase):
+    def setUp(self):
+        super(AgeFilterTests, self).setUp()
+        Organization.objects.filter(slug='wnyc').update(
+            min_youth_audience_age=14,
+            max_youth_audience_age=18
+        )
+        Organization.objects.filter(slug='amnh').update(
+            min_youth_audience_age=5,
+            max_youth_audience_age=12
+        )
+
+    def get_json_names(self, query):
+        response = self.client.get('/orgs.json?' + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['content-type'], 'application/json')
+        return [org['name'] for org in json.loads(response.content)['results']]
+
+    def test_json_lists_all_active_orgs_without_filter(self):
+        self.assertEqual(self.get_json_names(''), [
+            'American Museum of Natural History',
+            WNYC_NAME
+        ])
+
+    def test_json_filters_by_single_age(self):
+        self.assertEqual(self.get_json_names('age=14'), [WNYC_NAME])
+        self.assertEqual(self.get_json_names('age=12'),
+                         ['American Museum of Natural History'])
+        self.assertEqual(self.get_json_names('age=13'), [])
+
+    def test_json_filters_by_overlapping_range(self):
+        self.assertEqual(self.get_json_names('min_age=10&max_age=13'),
+                         ['American Museum of Natural History'])
+        self.assertEqual(self.get_json_names('min_age=12&max_age=14'), [
+            'American Museum of Natural History',
+            WNYC_NAME
+        ])
+
+    def test_json_filters_by_open_ended_range(self):
+        self.assertEqual(self.get_json_names('min_age=13'), [WNYC_NAME])
+        self.assertEqual(self.get_json_names('max_age=13'),
+                         ['American Museum of Natural History'])
+
+    def test_json_returns_400_on_invalid_filter(self):
+        for query in ['age=lol', 'min_age=-1', 'min_age=14&max_age=10']:
+            response = self.client.get('/orgs.json?' + query)
+            self.assertEqual(response.status_code, 400)
+
+    def test_home_filters_orgs(self):
+        response = self.client.get('/?min_age=10&max_age=13')
+        self.assertContains(response, 'American Museum of Natural History')
+        self.assertNotContains(response, 'Radio Rookies')
+
+    def test_home_ignores_invalid_filter(self):
+        response = self.client.get('/?min_age=14&max_age=10')
+        self.assertContains(response, 'Minimum age may not be greater')
+        self.assertContains(response, 'Radio Rookies')
+
+    def test_home_shows_single_age_as_range(self):
+        response = self.client.get('/?age=14')
+        self.assertContains(response, 'name="min_age" value="14"')
+        self.assertContains(response, 'name="max_age" value="14"')
+
+    @patch.object(views, 'ORGS_PER_PAGE', 1)
+    def get_with_one_org_per_page(self, url):
+        return self.client.get(url)
+
+    def test_home_pager_preserves_filter(self):
+        response = self.get_with_one_org_per_page('/?min_age=1')
+        self.assertContains(response, 'href="?min_age=1&amp;cursor=')
+
+    def test_home_page_number_pager_preserves_filter(self):
+        response = self.get_with_one_org_per_page('/?min_age=1&page=1')
+        self.assertContains(response, 'href="?min_age=1&amp;page=2"')
+
+class OrgsJsonPaginationTests(WnycAndAmnhTestCase):
+    def get_json(self, url):
+        with patch.object(views, 'ORGS_PER_PAGE', 1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(response.content)
+
+    def get_link(self, response, rel):
+        match = re.search(r'<([^>]+)>; rel="%s"' % rel,
+                          response.get('Link', ''))
+        return match and match.group(1)
+
+    def test_cursors_walk_forward_and_back(self):
+        response, data = self.get_json('/orgs.json')
+        self.assertEqual([org['name'] for org in data['results']],
+                         ['American Museum of Natural History'])
+        self.assertEqual(self.get_link(response, 'prev'), None)
+        response, data = self.get_json(self.get_link(response, 'next'))
+        self.assertEqual([org['name'] for org in data['results']],
+                         [u"WNYC's Radio Rookies"])
+        self.assertEqual(self.get_link(response, 'next'), None)
+        response, data = self.get_json(self.get_link(response, 'prev'))
+        self.assertEqual([org['name'] for org in data['results']],
+                         ['American Museum of Natural History'])
+
+    def test_links_preserve_filters(self):
+        response, data = self.get_json('/orgs.json?max_age=18')
+        self.assertIn('max_age=18&cursor=', self.get_link(response, 'next'))
+
+    def test_page_numbers_are_still_supported(self):
+        response, data = self.get_json('/orgs.json?page=2')
+        self.assertEqual(data['page'], 2)
+        self.assertEqual(data['num_pages'], 2)
+        self.assertEqual(self.get_link(response, 'prev'), '/orgs.json?page=1')
+
+    def test_invalid_cursor_returns_400(self):
+        response = self.client.get('/orgs.json?cursor=lol')
+        self.assertEqual(response.status_code, 400)
+
+    def test_home_ignores_invalid_cursor(self):
+        self.assertContains(self.client.get('/?cursor=lol'), 'Radio Rookies')
+
+class DirectoryQueryCountTests(WnycTestCase):
+    def add_orgs(self, count):
+        for i in range(count):
+            slug = 'org%d' % Organization.objects.count()
+            org = Organization(name=slug, slug=slug,
+                               website='http://%s.org/' % slug)
+            org.save()
+            for category in ['facebook', 'youtube']:
+                ContentChannel(category=category, organization=org,
+                               url='http://%s.com/%s' % (category, slug)).save()
+            for j in range(3):
+                create_user('%s_member%d' % (slug, j), organization=org,
+                            email='member%d@%s.org' % (j, slug))
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertQueriesStayFlat(self, url):
+        self.add_orgs(1)
+        baseline = self.count_queries(url)
+        self.add_orgs(3)
+        self.assertEqual(self.count_queries(url), baseline)
+        return baseline
+
+    def test_home_queries_stay_flat_for_anonymous_users(self):
+        self.assertLessEqual(self.assertQueriesStayFlat('/'), 4)
+
+    def test_home_queries_stay_flat_for_members(self):
+        self.login_as_wnyc_member()
+        self.assertLessEqual(self.assertQueriesStayFlat('/'), 10)
+
+    def test_org_detail_queries_stay_flat_for_members(self):
+        self.login_as_wnyc_member()
+        self.add_orgs(1)
+        baseline = self.count_queries('/orgs/org1/')
+        for i in range(3):
+            create_user('org1_extra%d' % i, organization='org1')
+        self.assertEqual(self.count_queries('/orgs/org1/'), baseline)
+        self.assertLessEqual(baseline, 9)
+
+class OrganizationFragmentCacheTests(WnycTestCase):
+    def test_cached_fragment_is_reused(self):
+        self.client.get('/orgs/wnyc/')
+        pagecache.bump_generation()
+        with self.assertNumQueries(2):
+            response = self.client.get('/orgs/wnyc/')
+        self.assertContains(response, 'Radio Rookies')
+
+    def test_fragment_is_invalidated_by_org_changes(self):
+        self.client.get('/orgs/wnyc/')
+        self.wnyc.mission = 'Changed mission'
+        self.wnyc.save()
+        self.assertContains(self.client.get('/orgs/wnyc/'), 'Changed mission')
+
+    def test_fragment_is_invalidated_by_channel_changes(self):
+        self.client.get('/orgs/wnyc/')
+        ContentChannel(category='youtube', organization=self.wnyc,
+                       url='http://youtube.com/radiorookies').save()
+        self.assertContains(self.client.get('/orgs/wnyc/'),
+                            'youtube.com/radiorookies')
+        ContentChannel.objects.filter(category='youtube').delete()
+        self.assertNotContains(self.client.get('/orgs/wnyc/'),
+                               'youtube.com/radiorookies')
+
+    def test_fragment_is_invalidated_by_user_changes(self):
+        self.login_as_wnyc_member()
+        self.client.get('/orgs/wnyc/')
+        user = User.objects.get(username='wnyc_member')
+        user.email = 'lehrer@wnyc.org'
+        user.save()
+        self.assertContains(self.client.get('/orgs/wnyc/'),
+                            'lehrer@wnyc.org')
+
+    def test_fragment_varies_on_viewer_tier(self):
+        edit_url = '/orgs/wnyc/edit/'
+        self.login_as_wnyc_member()
+        self.assertContains(self.client.get('/orgs/wnyc/'), edit_url)
+        self.client.logout()
+        response = self.client.get('/orgs/wnyc/')
+        self.assertNotContains(response, edit_url)
+        self.assertNotContains(response, 'member@wnyc.org')
+        self.login_as_non_member()
+        response = self.client.get('/orgs/wnyc/')
+        self.assertNotContains(response, edit_url)
+        self.assertNotContains(response, 'member@wnyc.org')
+
+class AnonymousPageCacheTests(WnycTestCase):
+    def test_anonymous_pages_are_cached(self):
+        for url in ['/', '/orgs/wnyc/']:
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertContains(response, 'Radio Rookies')
+
+    def test_pages_vary_on_query_string(self):
+        self.client.get('/?age=99')
+        self.assertContains(self.client.get('/'), 'Radio Rookies')
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_pages_are_not_cached_without_shared_cache(self):
+        self.client.get('/orgs/wnyc/')
+        Organization.objects.filter(pk=self.wnyc.pk).update(
+            name='Radio Rangers'
+        )
+        self.assertContains(self.client.get('/orgs/wnyc/'), 'Radio Rangers')
+
+    def test_unknown_query_parameters_share_cache_entries(self):
+        self.client.get('/?utm_source=foo')
+        with self.assertNumQueries(0):
+            response = self.client.get('/?utm_source=bar&x=1')
+        self.assertContains(response, 'Radio Rookies')
+        self.client.get('/orgs/wnyc/')
+        with self.assertNumQueries(0):
+            self.client.get('/orgs/wnyc/?q=%E2%98%83')
+
+    def test_cache_is_invalidated_by_saves(self):
+        self.client.get('/orgs/wnyc/')
+        ContentChannel(category='youtube', organization=self.wnyc,
+                       url='http://youtube.com/radiorookies').save()
+        self.assertContains(self.client.get('/orgs/wnyc/'),
+                            'youtube.com/radiorookies')
+
+    def test_authenticated_pages_are_not_cached(self):
+        self.client.get('/orgs/wnyc/')
+        self.login_as_wnyc_member()
+        self.assertContains(self.client.get('/orgs/wnyc/'), 'member@wnyc.org')
+
+    def test_pages_with_messages_are_not_cached(self):
+        self.client.get('/')
+        self.client.cookies['messages'] = CookieStorage(None)._encode([
+            Message(constants.INFO, 'Hello from the messages framework')
+        ])
+        self.assertContains(self.client.get('/'),
+                            'Hello from the messages framework')
+        del self.client.cookies['messages']
+        self.assertNotContains(self.client.get('/'),
+                               'Hello from the messages framework')
+
+    def test_pages_using_csrf_tokens_are_not_cached(self):
+        calls = []
+
+        @pagecache.cache_anonymous_page()
+        def view(request):
+            calls.append(get_token(request))
+            return HttpResponse('a form')
+
+        for i in range(2):
+            request = RequestFactory().get('/csrf-test/')
+            request.user = AnonymousUser()
+            view(request)
+        self.assertEqual(len(calls), 2)
+
+class ConditionalGetTests(WnycTestCase):
+    def assertRevalidates(self, url, status_code=304):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status_code)
+
+    def test_unchanged_org_detail_is_not_modified(self):
+        self.assertRevalidates('/orgs/wnyc/')
+        self.login_as_wnyc_member()
+        self.assertRevalidates('/orgs/wnyc/')
+
+    def test_org_detail_etag_changes_with_content(self):
+        self.login_as_wnyc_member()
+        etag = self.client.get('/orgs/wnyc/')['ETag']
+        ContentChannel.objects.filter(organization=self.wnyc).delete()
+        self.assertNotEqual(self.client.get('/orgs/wnyc/')['ETag'], etag)
+
+    def test_org_detail_etag_varies_on_viewer(self):
+        anonymous_etag = self.client.get('/orgs/wnyc/')['ETag']
+        self.login_as_non_member()
+        non_member_etag = self.client.get('/orgs/wnyc/')['ETag']
+        self.login_as_wnyc_member()
+        member_etag = self.client.get('/orgs/wnyc/')['ETag']
+        self.assertEqual(len(set([anonymous_etag, non_member_etag,
+                                  member_etag])), 3)
+
+    def test_pages_with_messages_are_never_unmodified(self):
+        self.login_as_wnyc_member()
+        etag = self.client.get('/orgs/wnyc/')['ETag']
+        self.client.cookies['messages'] = CookieStorage(None)._encode([
+            Message(constants.INFO, 'Hello from the messages framework')
+        ])
+        response = self.client.get('/orgs/wnyc/', HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Hello from the messages framework')
+
+    def test_unchanged_user_detail_is_not_modified(self):
+        self.login_as_wnyc_member()
+        self.assertRevalidates('/users/wnyc_member/')
+
+    def test_org_detail_etag_changes_when_members_are_deleted(self):
+        other = create_user('other', organization=self.wnyc)
+        self.login_as_wnyc_member()
+        etag = self.client.get('/orgs/wnyc/')['ETag']
+        other.delete()
+        self.assertNotEqual(self.client.get('/orgs/wnyc/')['ETag'], etag)
+
+    def test_user_detail_etag_changes_with_expertise(self):
+        self.login_as_wnyc_member()
+        etag = self.client.get('/users/wnyc_member/')['ETag']
+        Expertise(user=User.objects.get(username='wnyc_member'),
+                  category='youth').save()
+        self.assertNotEqual(self.client.get('/users/wnyc_member/')['ETag'],
+                            etag)
+
+    def test_missing_org_is_still_404(self):
+        self.assertEqual(self.client.get('/orgs/lol/').status_code, 404)
+
 class ActivationTests(TestCase):
     fixtures = ['wnyc.json']
 
@@ -4,7 +4,10 @@ from . import views
 
 urlpatterns = patterns('',
     url(r'^$', views.home, name='home'),
+    url(r'^orgs.json$', views.orgs_json, name='orgs_json'),
     url(r'^find.json$', views.find_json, name='find_json'),
+    url(r'^find-snapshot.json$', views.find_snapshot_json,
+        name='find_snapshot_json'),
     url(r'^orgs/(?P<organization_slug>[A-Za-z0-9_\-]+)/$',
         views.organization_detail, name='organization_detail'),
     url(r'^orgs/(?P<organization_slug>[A-Za-z0-9_\-]+)/edit/$',
@@ -18,4 +21,7 @@ urlpatterns = patterns('',
         views.user_detail, name='user_detail'),
 
     url(r'^accounts/profile/$', views.user_edit, name='user_edit'),
+
+    url(r'^expertise/$', views.expertise, name='expertise'),
+    url(r'^expertise.json$', views.expertise_json, name='expertise_json'),
 )
@@ -0,0 +1,88 @@
+'''
+The authenticated user's membership and privileges, loaded once per
+request.
+
+ViewerMiddleware sets ``request.viewer`` to a lazy Viewer, which loads
+the user's membership and organization in a single query the first
+time they're needed. Views, templates and decorators can then ask
+about the current user as often as they like without touching the
+database again.
+'''
+
+from functools import wraps
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from .models import Membership, is_user_vouched_for, is_user_privileged
+
+class Viewer(object):
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def membership(self):
+        if not self.user.is_authenticated():
+            return None
+        try:
+            membership = Membership.objects.select_related(
+                'organization'
+            ).get(user=self.user.pk)
+        except Membership.DoesNotExist:
+            return None
+        # Code that goes through user.membership, such as
+        # is_user_vouched_for(), will use these instead of querying.
+        setattr(self.user, User.membership.cache_name, membership)
+        setattr(membership, Membership.user.cache_name, self.user)
+        return membership
+
+    @property
+    def organization(self):
+        return self.membership and self.membership.organization
+
+    @property
+    def organization_id(self):
+        return self.membership and self.membership.organization_id
+
+    def is_vouched_for(self, organization=None):
+        if self.membership is None:
+            return False
+        return is_user_vouched_for(self.user, organization)
+
+    @cached_property
+    def is_privileged(self):
+        if not self.user.is_authenticated():
+            return False
+        if self.membership is None:
+            return self.user.is_active and self.user.is_staff
+        return is_user_privileged(self.user)
+
+def reset_viewer(request):
+    '''
+    Set ``request.viewer`` for the request's current user. This should
+    be called again whenever ``request.user`` changes, e.g. on login.
+    '''
+
+    request.viewer = SimpleLazyObject(lambda: Viewer(request.user))
+
+def get_viewer(request):
+    if not hasattr(request, 'viewer'):
+        reset_viewer(request)
+    return request.viewer
+
+def privileged_required(view):
+    '''
+    Decorator for views that only privileged users may see, which
+    redirects everyone else to the login page.
+    '''
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not get_viewer(request).is_privileged:
+            return redirect_to_login(request.get_full_path())
+        return view(request, *args, **kwargs)
+    return wrapper
+
+class ViewerMiddleware(object):
+    def process_request(self, request):
+        reset_viewer(request)
@@ -1,23 +1,42 @@
 import json
+import urllib
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse, HttpResponseForbidden, \
                         HttpResponseBadRequest
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db.models import Count, Max
+from django.utils.http import quote_etag
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 
-from .models import Organization, Membership, is_user_vouched_for, \
-                    is_user_privileged
+from . import search, keyset
+from .search import snapshot
+from .expertise import ExpertiseSearch
+from .fragments import prepare_organizations, get_directory_stats, \
+                       get_fragment_key
+from .conditional import conditional_page, get_viewer_key, make_etag, \
+                         strip_gzip_etags
+from .pagecache import cache_anonymous_page
+from .viewer import get_viewer, privileged_required
+from .models import Organization, Membership, Expertise
 from .forms import ExpertiseFormSet, ExpertiseFormSetHelper, \
                    ContentChannelFormSet, ChannelFormSetHelper, \
-                   MembershipForm, UserProfileForm, OrganizationForm
+                   MembershipForm, UserProfileForm, OrganizationForm, \
+                   YouthAgeFilterForm
 
 ORGS_PER_PAGE = 5
 
+EXPERTISE_RESULTS_PER_PAGE = 20
+
 def is_request_privileged(request):
-    return (request.user.is_authenticated() and
-            is_user_privileged(request.user))
+    return get_viewer(request).is_privileged
+
+def get_snapshot_tier(request):
+    if is_request_privileged(request):
+        return snapshot.PRIVILEGED
+    return snapshot.PUBLIC
 
 def validate_and_save_forms(*forms):
     forms = [form for form in forms if form is not None]
@@ -26,65 +45,201 @@ def validate_and_save_forms(*forms):
     for form in forms: form.save()
     return True
 
-def home(request):
-    all_orgs = Organization.objects.filter(is_active=True).order_by('name')
-    paginator = Paginator(all_orgs, ORGS_PER_PAGE)
-
-    page = request.GET.get('page')
+def get_page(paginator, page):
     try:
-        orgs = paginator.page(page)
+        return paginator.page(page)
     except PageNotAnInteger:
-        orgs = paginator.page(1)
+        return paginator.page(1)
     except EmptyPage:
-        orgs = paginator.page(paginator.num_pages)
+        return paginator.page(paginator.num_pages)
+
+def filter_orgs(age_filter):
+    orgs = Organization.objects.filter(is_active=True)
+    if age_filter.is_valid():
+        orgs = age_filter.filter(orgs)
+    return orgs.order_by('name', 'pk')
+
+def paginate_orgs(orgs, page=None, cursor=None):
+    '''
+    Return a page of the given organizations, along with the query
+    parameters for the previous and next pages, if any. Pages are
+    fetched by keyset, unless a page number is given, which is supported
+    for compatibility. Raises ValueError if the cursor is invalid.
+    '''
+
+    if page is not None:
+        page = get_page(Paginator(orgs, ORGS_PER_PAGE), page)
+        return (page,
+                page.has_previous() and [('page', page.previous_page_number())],
+                page.has_next() and [('page', page.next_page_number())])
+    page = keyset.paginate(orgs, cursor, ORGS_PER_PAGE)
+    return (page,
+            page.has_previous and [('cursor', page.previous_cursor)],
+            page.has_next and [('cursor', page.next_cursor)])
+
+def get_page_query(age_filter, page_params):
+    if page_params:
+        return urllib.urlencode(age_filter.query_items() + page_params)
+
+@cache_anonymous_page('age', 'min_age', 'max_age', 'page', 'cursor')
+def home(request):
+    age_filter = YouthAgeFilterForm(request.GET)
+    orgs = filter_orgs(age_filter)
+    try:
+        page, previous_params, next_params = paginate_orgs(
+            orgs,
+            page=request.GET.get('page'),
+            cursor=request.GET.get('cursor')
+        )
+    except ValueError:
+        page, previous_params, next_params = paginate_orgs(orgs)
+    show_privileged_info = is_request_privileged(request)
+    page.object_list = prepare_organizations(request, page.object_list,
+                                             show_privileged_info)
 
     return render(request, 'directory/home.html', {
-        'orgs': orgs,
-        'show_privileged_info': is_request_privileged(request)
+        'orgs': page,
+        'age_filter': age_filter,
+        'previous_query': get_page_query(age_filter, previous_params),
+        'next_query': get_page_query(age_filter, next_params),
+        'show_privileged_info': show_privileged_info
     })
 
+def orgs_json(request):
+    age_filter = YouthAgeFilterForm(request.GET)
+    if not age_filter.is_valid():
+        return HttpResponseBadRequest(json.dumps(age_filter.errors),
+                                      content_type='application/json')
+    try:
+        page, previous_params, next_params = paginate_orgs(
+            filter_orgs(age_filter),
+            page=request.GET.get('page'),
+            cursor=request.GET.get('cursor')
+        )
+    except ValueError:
+        return HttpResponseBadRequest('cursor is invalid')
+    results = {
+        'results': [{
+            'name': org.name,
+            'url': org.get_absolute_url(),
+            'website': org.website,
+            'min_youth_audience_age': org.min_youth_audience_age,
+            'max_youth_audience_age': org.max_youth_audience_age
+        } for org in page]
+    }
+    if request.GET.get('page') is not None:
+        results['page'] = page.number
+        results['num_pages'] = page.paginator.num_pages
+    response = HttpResponse(json.dumps(results),
+                            content_type='application/json')
+    links = [
+        '<%s?%s>; rel="%s"' % (request.path,
+                               get_page_query(age_filter, params), rel)
+        for rel, params in [('prev', previous_params), ('next', next_params)]
+        if params
+    ]
+    if links:
+        response['Link'] = ', '.join(links)
+    return response
+
 def find_json(request):
     query = request.GET.get('query')
-    results = []
     if not query:
         return HttpResponseBadRequest('query must be non-empty')
+    try:
+        limit = int(request.GET.get('limit', search.DEFAULT_LIMIT))
+    except ValueError:
+        return HttpResponseBadRequest('limit must be an integer')
+    limit = max(1, min(limit, search.MAX_LIMIT))
+    offset = 0
+    if request.GET.get('cursor'):
+        try:
+            offset = search.parse_cursor(query, request.GET['cursor'])
+        except ValueError:
+            return HttpResponseBadRequest('cursor is invalid')
 
-    orgs = Organization.objects.filter(name__icontains=query,
-                                       is_active=True)
-    results.extend([
-        {'value': org.name, 'url': org.get_absolute_url()}
-        for org in orgs
-    ])
+    results, has_more = search.find(
+        query,
+        include_people=is_request_privileged(request),
+        limit=limit,
+        offset=offset
+    )
 
-    if is_request_privileged(request):
-        memberships = Membership.objects.filter(
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query),
-            is_listed=True,
-            user__is_active=True
+    response = HttpResponse(json.dumps(results),
+                            content_type='application/json')
+    if has_more:
+        response['Link'] = '<%s?%s>; rel="next"' % (
+            request.path,
+            urllib.urlencode({
+                'query': query.encode('utf-8'),
+                'limit': limit,
+                'cursor': search.make_cursor(query, offset + limit)
+            })
         )
-        results.extend([
-            {'value': membership.user.get_full_name(),
-             'url': membership.get_absolute_url()}
-            for membership in memberships
-        ])
+    return response
 
-    return HttpResponse(json.dumps(results), content_type='application/json')
+@gzip_page
+@strip_gzip_etags
+@condition(etag_func=lambda request: snapshot.get_etag(
+    get_snapshot_tier(request)
+))
+def find_snapshot_json(request):
+    etag, content = snapshot.get_snapshot(get_snapshot_tier(request))
+    response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = quote_etag(etag)
+    # Clients may keep the snapshot, but must revalidate it before use.
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def get_organization_detail(request, organization_slug):
+    '''
+    Return the organization shown by organization_detail, whether to
+    show privileged information, and the organization's directory stats.
+    These are computed once per request.
+    '''
+
+    if not hasattr(request, '_organization_detail'):
+        org = get_object_or_404(Organization, slug=organization_slug,
+                                is_active=True)
+        show_privileged_info = is_request_privileged(request)
+        request._organization_detail = (
+            org,
+            show_privileged_info,
+            get_directory_stats([org], show_privileged_info)
+        )
+    return request._organization_detail
+
+def get_organization_etag(request, organization_slug):
+    org, show_privileged_info, directory_stats = get_organization_detail(
+        request,
+        organization_slug
+    )
+    return make_etag(
+        get_fragment_key(request, org, show_privileged_info,
+                         *directory_stats),
+        get_viewer_key(request)
+    )
 
+@cache_anonymous_page()
+@conditional_page(get_organization_etag)
 def organization_detail(request, organization_slug):
-    org = get_object_or_404(Organization, slug=organization_slug,
-                            is_active=True)
+    org, show_privileged_info, directory_stats = get_organization_detail(
+        request,
+        organization_slug
+    )
+    prepare_organizations(request, [org], show_privileged_info,
+                          directory_stats)
     return render(request, 'directory/organization_detail.html', {
         'org': org,
-        'show_privileged_info': is_request_privileged(request)
+        'show_privileged_info': show_privileged_info
     })
 
 @login_required
 def organization_edit(request, organization_slug):
     org = get_object_or_404(Organization, slug=organization_slug,
                             is_active=True)
-    user = request.user
-    if not (user.is_superuser or is_user_vouched_for(user, org)):
+    if not (request.user.is_superuser or
+            get_viewer(request).is_vouched_for(org)):
         return HttpResponseForbidden('Permission denied.')
     if request.method == 'POST':
         form = OrganizationForm(request.POST, instance=org, prefix='org')
@@ -109,7 +264,30 @@ def organization_edit(request, organization_slug):
         'channel_formset_helper': channel_formset_helper
     })
 
-@user_passes_test(is_user_privileged)
+def get_user_etag(request, username):
+    try:
+        membership = Membership.objects.select_related('organization').get(
+            user__username=username,
+            user__is_active=True
+        )
+    except Membership.DoesNotExist:
+        return None
+    skills = Expertise.objects.filter(user=membership.user_id).aggregate(
+        modified=Max('modified'),
+        count=Count('id')
+    )
+    org = membership.organization
+    return make_etag(
+        membership.pk,
+        membership.modified.isoformat(),
+        org and org.modified.isoformat(),
+        skills['modified'] and skills['modified'].isoformat(),
+        skills['count'],
+        get_viewer_key(request)
+    )
+
+@privileged_required
+@conditional_page(get_user_etag)
 def user_detail(request, username):
     membership = get_object_or_404(Membership, user__username=username,
                                    user__is_active=True)
@@ -117,6 +295,49 @@ def user_detail(request, username):
         'membership': membership
     })
 
+def search_expertise(request):
+    expertise_search = ExpertiseSearch(
+        categories=request.GET.getlist('category'),
+        text=request.GET.get('q', '')
+    )
+    paginator = Paginator(expertise_search.memberships(),
+                          EXPERTISE_RESULTS_PER_PAGE)
+    page = get_page(paginator, request.GET.get('page'))
+    page.object_list = expertise_search.attach_skills(list(page.object_list))
+    return expertise_search, page
+
+@privileged_required
+def expertise(request):
+    expertise_search, memberships = search_expertise(request)
+    return render(request, 'directory/expertise.html', {
+        'expertise_search': expertise_search,
+        'facets': expertise_search.facets(),
+        'memberships': memberships
+    })
+
+def expertise_json(request):
+    if not is_request_privileged(request):
+        return HttpResponseForbidden('Permission denied.')
+    expertise_search, memberships = search_expertise(request)
+    results = {
+        'facets': expertise_search.facets(),
+        'page': memberships.number,
+        'num_pages': memberships.paginator.num_pages,
+        'results': [{
+            'name': membership.user.get_full_name(),
+            'url': membership.get_absolute_url(),
+            'email_hash': membership.email_hash,
+            'organization': (membership.organization and
+                             membership.organization.name),
+            'skills': [{
+                'category': skill.category,
+                'label': skill.get_category_display(),
+                'details': skill.details
+            } for skill in membership.matching_skills]
+        } for membership in memberships]
+    }
+    return HttpResponse(json.dumps(results), content_type='application/json')
+
 @login_required
 def user_edit(request):
     user = request.user
@@ -124,9 +345,10 @@ def user_edit(request):
     data = None
 
     if request.method == 'POST': data = request.POST
-    if is_user_vouched_for(user):
+    viewer = get_viewer(request)
+    if viewer.is_vouched_for():
         membership_form = MembershipForm(data=data,
-                                         instance=user.membership,
+                                         instance=viewer.membership,
                                          prefix='membership')
     user_profile_form = UserProfileForm(data=data,
                                         instance=user,
@@ -5,10 +5,13 @@ from django.contrib import messages
 from django.contrib import auth
 from django.contrib.auth.decorators import user_passes_test, login_required
 
+from directory.viewer import reset_viewer
+
 def _switch_to(request, user):
     # http://stackoverflow.com/a/2787747
     user.backend = 'django.contrib.auth.backends.ModelBackend'
     auth.login(request, user)
+    reset_viewer(request)
 
 @require_POST
 @user_passes_test(lambda u: u.is_active and u.is_superuser)
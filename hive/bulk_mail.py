@@ -0,0 +1,204 @@
+'''
+Delivery of email to large numbers of recipients.
+
+send_in_batches() splits a stream of recipients into batches, and
+send_individually() sends a message per item, optionally at a limited
+rate. Both hand their work, through a bounded queue, to a small pool of
+worker threads. Each worker keeps its own email backend connection open
+across the messages it sends, and a failure only affects the message it
+happened in.
+'''
+
+import time
+import Queue
+import logging
+import threading
+from django.core.mail import get_connection
+from django.db import connections as db_connections
+
+from hive import replicas
+
+DEFAULT_BATCH_SIZE = 50
+
+DEFAULT_MAX_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+def iter_batches(iterable, size):
+    '''
+    Yield lists of up to the given number of items from the given
+    iterable, without consuming any more of it than necessary.
+
+    >>> list(iter_batches(xrange(5), 2))
+    [[0, 1], [2, 3], [4]]
+    '''
+
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class BatchResult(object):
+    def __init__(self, index, recipients, error=None):
+        self.index = index
+        self.recipients = recipients
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __unicode__(self):
+        if self.succeeded:
+            return u'Batch %d: sent to %d recipients.' % (
+                self.index + 1, len(self.recipients)
+            )
+        return u'Batch %d: failed to send to %d recipients: %s' % (
+            self.index + 1, len(self.recipients), self.error
+        )
+
+def send_message(connection, message):
+    '''
+    Send the given message over the given connection, opening it if
+    needed. Returns None on success, or a description of the error.
+    '''
+
+    try:
+        # This is a no-op if the connection is already open.
+        connection.open()
+        if not connection.send_messages([message]):
+            raise Exception('the backend did not send the message')
+    except Exception, e:
+        logger.exception('failed to send message: %s', message.subject)
+        # The connection may be in a bad state, so start over with a
+        # new one for the next message.
+        try:
+            connection.close()
+        except Exception:
+            pass
+        return unicode(e) or e.__class__.__name__
+
+class RateLimiter(object):
+    '''
+    Spaces out calls to wait(), across all threads, so that they return
+    at most the given number of times per second. A rate of None means
+    no limit.
+    '''
+
+    def __init__(self, per_second=None):
+        self.interval = 1.0 / per_second if per_second else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def map_with_connections(function, items, max_workers=DEFAULT_MAX_WORKERS,
+                         backend=None):
+    '''
+    Call the given function with an email backend connection and each
+    item of the given iterable, in a pool of threads that each have
+    their own connection. Returns the results, in no particular order.
+    '''
+
+    # Bounding the queue means that we never read far ahead of the
+    # workers, so items can be streamed from the database.
+    queue = Queue.Queue(maxsize=max_workers * 2)
+    results = []
+
+    def worker(connection):
+        # New threads aren't pinned, and replicas may not have caught up
+        # with what the calling thread has written.
+        replicas.pin_to_primary()
+        try:
+            while True:
+                item = queue.get()
+                if item is None:
+                    break
+                results.append(function(connection, item))
+        finally:
+            connection.close()
+            # Backends like the mail queue's use the database, which
+            # gives each thread its own connections.
+            for db_connection in db_connections.all():
+                db_connection.close()
+
+    threads = [
+        threading.Thread(target=worker,
+                         args=(get_connection(backend, fail_silently=False),))
+        for i in range(max_workers)
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        for item in items:
+            queue.put(item)
+    finally:
+        for thread in threads:
+            queue.put(None)
+        for thread in threads:
+            thread.join()
+    return results
+
+def send_in_batches(recipients, make_message,
+                    batch_size=DEFAULT_BATCH_SIZE,
+                    max_workers=DEFAULT_MAX_WORKERS):
+    '''
+    Send messages to the given iterable of recipients in batches. The
+    given function takes a list of recipients and returns an
+    EmailMessage to them. Returns a list of BatchResult objects, in
+    the order of their batches.
+    '''
+
+    def send_batch(connection, (index, batch)):
+        try:
+            error = send_message(connection, make_message(batch))
+        except Exception, e:
+            logger.exception('failed to make message for batch %d', index + 1)
+            error = unicode(e) or e.__class__.__name__
+        return BatchResult(index, batch, error)
+
+    results = map_with_connections(
+        send_batch,
+        enumerate(iter_batches(recipients, batch_size)),
+        max_workers
+    )
+    return sorted(results, key=lambda result: result.index)
+
+def send_individually(items, make_message, max_workers=DEFAULT_MAX_WORKERS,
+                      max_per_second=None, backend=None):
+    '''
+    Send a message for each item of the given iterable, at the given
+    maximum rate. The given function takes an item and returns an
+    EmailMessage for it. Returns a list of ``(item, error)`` tuples, in
+    the order of the items, where ``error`` is None if the message was
+    sent.
+    '''
+
+    rate_limiter = RateLimiter(max_per_second)
+
+    def send(connection, (index, item)):
+        rate_limiter.wait()
+        try:
+            error = send_message(connection, make_message(item))
+        except Exception, e:
+            logger.exception('failed to make message for %r', item)
+            error = unicode(e) or e.__class__.__name__
+        return index, item, error
+
+    results = sorted(map_with_connections(send, enumerate(items),
+                                          max_workers, backend),
+                     key=lambda result: result[0])
+    return [(item, error) for index, item, error in results]
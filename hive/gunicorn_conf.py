@@ -0,0 +1,41 @@
+'''
+Gunicorn configuration, used via ``gunicorn -c hive/gunicorn_conf.py``.
+
+The application is loaded, and its templates and URLs warmed up, once
+in the master process before it forks workers. Each worker then
+connects to the database and prepares its search backend before
+accepting requests.
+
+The number of workers defaults to DEFAULT_WORKERS, and can be set via
+the WEB_CONCURRENCY environment variable. Each worker keeps its own
+copy of the static files and search index in memory, and the CPU count
+seen inside a container is usually the host's, so the default is kept
+small rather than derived from it.
+'''
+
+import os
+
+DEFAULT_WORKERS = 2
+
+bind = '0.0.0.0:%s' % os.environ.get('PORT', '8000')
+
+workers = int(os.environ.get('WEB_CONCURRENCY', DEFAULT_WORKERS))
+
+preload_app = True
+
+# Warming up is only an optimization, so a failure, e.g. because the
+# database is briefly unavailable, shouldn't keep workers from booting.
+
+def when_ready(server):
+    from hive.warmup import warm_up_app
+    try:
+        warm_up_app()
+    except Exception:
+        server.log.exception('Unable to warm up application')
+
+def post_fork(server, worker):
+    from hive.warmup import warm_up_worker
+    try:
+        warm_up_worker()
+    except Exception:
+        worker.log.exception('Unable to warm up worker')
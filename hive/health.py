@@ -0,0 +1,21 @@
+import logging
+from django.db import connection, DatabaseError
+from django.http import HttpResponse
+from django.views.decorators.cache import never_cache
+
+logger = logging.getLogger(__name__)
+
+@never_cache
+def health_check(request):
+    # This goes through the request's usual database connection, so
+    # with persistent connections enabled, it checks the same
+    # connection that the worker's next request will use.
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    except DatabaseError:
+        logger.exception('health check failed')
+        return HttpResponse('database unavailable', status=503,
+                            content_type='text/plain')
+    return HttpResponse('ok', content_type='text/plain')
@@ -0,0 +1,75 @@
+'''
+Routing of database reads to replicas.
+
+ReplicaRouter sends reads to a randomly chosen replica and writes to
+the primary. Replicas lag behind the primary, so once a thread writes
+anything, or a request uses an unsafe method like POST, reads are
+pinned to the primary for the rest of the request. ReplicaMiddleware
+also sets a short-lived cookie so that the same browser keeps reading
+from the primary for the next few seconds, e.g. on the page it's
+redirected to after submitting a form.
+'''
+
+import random
+import threading
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE_NAME = 'use_primary_db'
+
+DEFAULT_PIN_SECONDS = 15
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_state = threading.local()
+
+def pin_to_primary():
+    _state.pinned = True
+
+def unpin():
+    _state.pinned = False
+    _state.recently_pinned = False
+
+def is_pinned():
+    return (getattr(_state, 'pinned', False) or
+            getattr(_state, 'recently_pinned', False))
+
+class ReplicaRouter(object):
+    def db_for_read(self, model, **hints):
+        if is_pinned() or not settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_syncdb(self, db, model):
+        return db == DEFAULT_DB_ALIAS
+
+class ReplicaMiddleware(object):
+    def __init__(self):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed()
+
+    def process_request(self, request):
+        unpin()
+        if request.method not in SAFE_METHODS:
+            pin_to_primary()
+        elif PIN_COOKIE_NAME in request.COOKIES:
+            _state.recently_pinned = True
+
+    def process_response(self, request, response):
+        if getattr(_state, 'pinned', False):
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1', httponly=True,
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS',
+                                DEFAULT_PIN_SECONDS)
+            )
+        unpin()
+        return response
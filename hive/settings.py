@@ -12,10 +12,14 @@ https://docs.djangoproject.com/en/1.6/ref/settings/
 import os
 import sys
 import urlparse
-import dj_database_url
 
 from .settings_utils import set_default_env, set_default_db, \
+                            parse_database_url, \
+                            parse_database_replica_urls, \
                             parse_email_backend_url, \
+                            parse_cache_url, \
+                            parse_search_backend_url, \
+                            is_cache_shared, \
                             parse_secure_proxy_ssl_header, \
                             is_running_test_suite
 
@@ -56,6 +60,20 @@ set_default_db('sqlite:///%s' % path('db.sqlite3'))
 
 globals().update(parse_email_backend_url(os.environ['EMAIL_BACKEND_URL']))
 
+# A locmem cache isn't shared between processes, so it's only suitable
+# for development, and features that rely on a shared cache are turned
+# off under it (see CACHE_IS_SHARED).
+set_default_env(CACHE_URL='locmem:')
+
+globals().update(parse_cache_url(os.environ['CACHE_URL']))
+
+CACHE_IS_SHARED = is_cache_shared(CACHES)
+
+set_default_env(SEARCH_BACKEND_URL='memory:' if CACHE_IS_SHARED else 'db:')
+
+globals().update(parse_search_backend_url(os.environ['SEARCH_BACKEND_URL'],
+                                          CACHE_IS_SHARED))
+
 ORIGIN = os.environ['ORIGIN']
 
 ALLOWED_HOSTS = [urlparse.urlparse(ORIGIN).hostname]
@@ -76,16 +94,19 @@ INSTALLED_APPS = (
     'registration',
     'directory',
     'minigroup_digestif',
+    'mailqueue',
 ) + EMAIL_BACKEND_INSTALLED_APPS
 
 MIDDLEWARE_CLASSES = (
     'hive.ssl.RedirectToHttpsMiddleware',
     'hive.ssl.HstsMiddleware',
     'csp.middleware.CSPMiddleware',
+    'hive.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'directory.viewer.ViewerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
@@ -112,9 +133,18 @@ WSGI_APPLICATION = 'hive.wsgi.application'
 # https://docs.djangoproject.com/en/1.6/ref/settings/#databases
 
 DATABASES = {
-    'default': dj_database_url.config()
+    'default': parse_database_url(os.environ['DATABASE_URL'])
 }
 
+DATABASES.update(parse_database_replica_urls(
+    os.environ.get('DATABASE_REPLICA_URL', '')
+))
+
+DATABASE_REPLICAS = sorted(alias for alias in DATABASES
+                           if alias != 'default')
+
+DATABASE_ROUTERS = ['hive.replicas.ReplicaRouter']
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
 
@@ -144,8 +174,20 @@ STATICFILES_DIRS = (
     path('hive', 'static'),
 )
 
+STATICFILES_STORAGE = 'hive.static_files.HashedStaticFilesStorage'
+
 ACCOUNT_ACTIVATION_DAYS = 3
 
+TEMPLATE_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+
+if not DEBUG:
+    TEMPLATE_LOADERS = (
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    )
+
 TEMPLATE_DIRS = (
     path('hive', 'templates'),
 )
@@ -187,3 +229,11 @@ if is_running_test_suite():
     PASSWORD_HASHERS = (
         'django.contrib.auth.hashers.MD5PasswordHasher',
     )
+    # Tests clear the cache, which mustn't affect a shared one.
+    CACHES = parse_cache_url('locmem:')['CACHES']
+    # The suite runs in a single process, which a locmem cache serves
+    # as well as a shared one.
+    CACHE_IS_SHARED = True
+    # Replicas are test mirrors, whose separate connections can't see
+    # the data of a test in progress.
+    DATABASE_REPLICAS = []
@@ -1,6 +1,15 @@
 import os
 import sys
+import urllib
 import urlparse
+import dj_database_url
+
+# Cache backends whose contents are private to each process, and so
+# can't tell other processes that something has changed.
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
 
 def set_default_env(**kwargs):
     for key in kwargs:
@@ -15,17 +24,80 @@ def set_default_db(default):
         # whose value we should retrieve.
         os.environ['DATABASE_URL'] = os.environ[url]
 
+def parse_database_url(url):
+    info = urlparse.urlparse(url)
+    query = dict(urlparse.parse_qsl(info.query))
+    db = dj_database_url.parse(url)
+    engine = db.get('ENGINE', '')
+    options = {}
+    if ('postgresql' in engine or 'postgis' in engine or
+        'mysql' in engine):
+        # Other options, like sslmode, are passed on to the driver.
+        options.update(
+            (key, value) for key, value in query.items()
+            if key not in ['conn_max_age', 'connect_timeout',
+                           'statement_timeout']
+        )
+    if 'conn_max_age' in query:
+        if query['conn_max_age'] == 'none':
+            # Keep connections open for the lifetime of the process.
+            db['CONN_MAX_AGE'] = None
+        else:
+            db['CONN_MAX_AGE'] = int(query['conn_max_age'])
+    if 'connect_timeout' in query:
+        if not ('postgresql' in engine or 'postgis' in engine or
+                'mysql' in engine):
+            raise ValueError('connect_timeout is not supported by %s' %
+                             engine)
+        options['connect_timeout'] = int(query['connect_timeout'])
+    if 'statement_timeout' in query:
+        if not ('postgresql' in engine or 'postgis' in engine):
+            raise ValueError('statement_timeout is not supported by %s' %
+                             engine)
+        options['options'] = '-c statement_timeout=%d' % int(
+            query['statement_timeout']
+        )
+    if options:
+        db['OPTIONS'] = options
+    return db
+
+def parse_database_replica_urls(value):
+    replicas = {}
+    for i, url in enumerate(value.replace(',', ' ').split(), 1):
+        if url.upper() == url:
+            # As with DATABASE_URL, this names another environment variable.
+            url = os.environ[url]
+        db = parse_database_url(url)
+        # During tests, replicas are stand-ins for the test database.
+        db['TEST_MIRROR'] = 'default'
+        replicas['replica%d' % i] = db
+    return replicas
+
 def parse_email_backend_url(url):
     info = urlparse.urlparse(url)
+    if info.scheme.startswith('queue+'):
+        # Queue messages, and have the mail queue's worker send them
+        # through the backend represented by the rest of the URL.
+        s = parse_email_backend_url(url[len('queue+'):])
+        s['MAILQUEUE_EMAIL_BACKEND'] = s['EMAIL_BACKEND']
+        s['EMAIL_BACKEND'] = 'mailqueue.backends.EmailBackend'
+        return s
     s = {'EMAIL_BACKEND_INSTALLED_APPS': ()}
     if info.scheme == 'console':
         s['EMAIL_BACKEND'] = 'django.core.mail.backends.console.EmailBackend'
-    elif info.scheme in ['smtp', 'smtp+tls']:
+    elif info.scheme in ['smtp', 'smtp+tls', 'smtp+pool', 'smtp+pool+tls']:
         s['EMAIL_BACKEND'] = 'django.core.mail.backends.smtp.EmailBackend'
         s['EMAIL_HOST'] = info.hostname
         s['EMAIL_PORT'] = info.port
-        if info.scheme == 'smtp+tls':
+        if info.scheme.endswith('+tls'):
             s['EMAIL_USE_TLS'] = True
+        if info.scheme.startswith('smtp+pool'):
+            query = urlparse.parse_qs(info.query)
+            s['EMAIL_BACKEND'] = 'hive.smtp_pool.EmailBackend'
+            if 'size' in query:
+                s['EMAIL_POOL_SIZE'] = int(query['size'][0])
+            if 'max_age' in query:
+                s['EMAIL_POOL_MAX_AGE'] = int(query['max_age'][0])
         if info.username:
             s['EMAIL_HOST_USER'] = info.username
         if info.password:
@@ -38,6 +110,69 @@ def parse_email_backend_url(url):
         raise ValueError('unknown scheme for email backend url: %s' % url)
     return s
 
+def parse_cache_url(url):
+    info = urlparse.urlparse(url)
+    query = urlparse.parse_qs(info.query)
+    cache = {}
+    if info.scheme == 'locmem':
+        cache['BACKEND'] = 'django.core.cache.backends.locmem.LocMemCache'
+        cache['LOCATION'] = info.netloc
+    elif info.scheme == 'file':
+        cache['BACKEND'] = 'django.core.cache.backends.filebased.' \
+                           'FileBasedCache'
+        cache['LOCATION'] = info.path
+    elif info.scheme == 'dummy':
+        cache['BACKEND'] = 'django.core.cache.backends.dummy.DummyCache'
+    elif info.scheme in ['memcached', 'pylibmc']:
+        if info.scheme == 'memcached':
+            cache['BACKEND'] = 'django.core.cache.backends.memcached.' \
+                               'MemcachedCache'
+        else:
+            cache['BACKEND'] = 'django.core.cache.backends.memcached.' \
+                               'PyLibMCCache'
+        if info.netloc:
+            cache['LOCATION'] = info.netloc.split(',')
+        else:
+            cache['LOCATION'] = 'unix:%s' % info.path
+    elif info.scheme in ['redis', 'rediss']:
+        # django-redis understands redis URLs, query string and all,
+        # so we only need to remove the options that are ours.
+        cache['BACKEND'] = 'django_redis.cache.RedisCache'
+        cache['LOCATION'] = urlparse.urlunparse(info._replace(
+            query=urllib.urlencode(sorted(
+                (key, value) for key in query for value in query[key]
+                if key not in ['prefix', 'timeout', 'max_entries']
+            ))
+        ))
+    else:
+        raise ValueError('unknown scheme for cache url: %s' % url)
+    if 'prefix' in query:
+        cache['KEY_PREFIX'] = query['prefix'][0]
+    if 'timeout' in query:
+        cache['TIMEOUT'] = int(query['timeout'][0])
+    if 'max_entries' in query:
+        cache['OPTIONS'] = {'MAX_ENTRIES': int(query['max_entries'][0])}
+    return {'CACHES': {'default': cache}}
+
+def is_cache_shared(caches):
+    return caches['default']['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+def parse_search_backend_url(url, cache_is_shared=True):
+    info = urlparse.urlparse(url)
+    backends = {
+        'memory': 'directory.search.backends.memory.SearchBackend',
+        'db': 'directory.search.backends.db.SearchBackend',
+        'postgres': 'directory.search.backends.postgresql.SearchBackend',
+    }
+    if info.scheme not in backends:
+        raise ValueError('unknown scheme for search backend url: %s' % url)
+    if info.scheme == 'memory' and not cache_is_shared:
+        # Each process's index only hears about changes made by other
+        # processes through the cache.
+        raise ValueError('the memory search backend requires a cache '
+                         'shared between processes')
+    return {'SEARCH_BACKEND': backends[info.scheme]}
+
 def parse_secure_proxy_ssl_header(field):
     name, value = field.split(':')
     return ('HTTP_%s' % name.upper().replace('-', '_'), value.strip())
@@ -0,0 +1,141 @@
+'''
+An SMTP email backend that reuses connections.
+
+Django's SMTP backend connects, and possibly negotiates TLS and logs
+in, for every batch of messages it sends. EmailBackend instead returns
+its connection to a small per-process pool when it's closed, and takes
+one from the pool when it's opened, checking with a NOOP command that
+the server hasn't hung up on it in the meantime. Connections older than
+EMAIL_POOL_MAX_AGE seconds are recycled, and a process forked from one
+that has pooled connections, e.g. a gunicorn worker, starts with an
+empty pool rather than sharing its parent's sockets.
+'''
+
+import os
+import time
+import smtplib
+import threading
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+
+DEFAULT_POOL_SIZE = 4
+
+DEFAULT_MAX_AGE = 300
+
+def quit_quietly(connection):
+    try:
+        connection.quit()
+    except Exception:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+class SMTPConnectionPool(object):
+    '''
+    A thread-safe pool of idle SMTP connections, keyed on the server and
+    credentials they're for.
+    '''
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_age=DEFAULT_MAX_AGE):
+        self.size = size
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Connections inherited from a parent process are deliberately
+        # not quit, since the parent may still be using them.
+        self.pid = os.getpid()
+        self.idle = {}
+
+    def check_pid(self):
+        if self.pid != os.getpid():
+            self.reset()
+
+    def is_expired(self, connection):
+        created = getattr(connection, 'pool_created', None)
+        return created is None or time.time() - created >= self.max_age
+
+    def is_healthy(self, connection):
+        try:
+            return connection.noop()[0] == 250
+        except (smtplib.SMTPException, IOError):
+            return False
+
+    def acquire(self, key):
+        '''
+        Return a healthy idle connection for the given key, or None if
+        there isn't one.
+        '''
+
+        while True:
+            with self.lock:
+                self.check_pid()
+                if not self.idle.get(key):
+                    return None
+                connection = self.idle[key].pop()
+            if (not self.is_expired(connection) and
+                self.is_healthy(connection)):
+                return connection
+            quit_quietly(connection)
+
+    def release(self, key, connection):
+        '''
+        Return a connection to the pool, or quit it if it's too old or
+        the pool is full.
+        '''
+
+        with self.lock:
+            self.check_pid()
+            idle = self.idle.setdefault(key, [])
+            if not self.is_expired(connection) and len(idle) < self.size:
+                idle.append(connection)
+                return
+        quit_quietly(connection)
+
+    def clear(self):
+        with self.lock:
+            self.check_pid()
+            idle, self.idle = self.idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                quit_quietly(connection)
+
+_pool = None
+
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool(
+                size=getattr(settings, 'EMAIL_POOL_SIZE', DEFAULT_POOL_SIZE),
+                max_age=getattr(settings, 'EMAIL_POOL_MAX_AGE',
+                                DEFAULT_MAX_AGE)
+            )
+        return _pool
+
+class EmailBackend(SMTPEmailBackend):
+    def get_pool_key(self):
+        return (self.host, self.port, self.username, self.password,
+                self.use_tls)
+
+    def open(self):
+        if self.connection:
+            return False
+        pool = get_pool()
+        self.connection = pool.acquire(self.get_pool_key())
+        if self.connection:
+            return True
+        if not super(EmailBackend, self).open():
+            return None
+        self.connection.pool_created = time.time()
+        return True
+
+    def close(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        get_pool().release(self.get_pool_key(), connection)
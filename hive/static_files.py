@@ -0,0 +1,278 @@
+'''
+Fingerprinted, precompressed static files, served from memory.
+
+At collectstatic time, HashedStaticFilesStorage saves copies of static
+files whose names include a hash of their content, along with gzip
+(and, if the brotli package is installed, brotli) variants of
+compressible files, and a manifest of the hashed names. At startup,
+StaticFiles loads the files listed in the manifest into memory and
+serves them directly from the WSGI layer, letting browsers cache them
+forever. Anything else under STATIC_ROOT, such as the unhashed
+originals, is rarely requested, so it's read from disk when it is.
+'''
+
+import os
+import re
+import gzip
+import json
+import hashlib
+import mimetypes
+from cStringIO import StringIO
+from django.contrib.staticfiles.storage import CachedStaticFilesStorage, \
+                                               StaticFilesStorage
+from django.core.files.base import ContentFile
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json',
+                           '.xml', '.map', '.eot', '.ttf', '.otf', '.ico')
+
+# The extensions of compressed variants, keyed by content coding.
+ENCODING_EXTENSIONS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+# Content codings in order of preference.
+PREFERRED_ENCODINGS = ['br', 'gzip']
+
+MANIFEST_NAME = 'staticfiles.json'
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+def gzip_compress(content):
+    out = StringIO()
+    with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=9,
+                       mtime=0) as f:
+        f.write(content)
+    return out.getvalue()
+
+def get_compressors():
+    '''
+    Return a dictionary mapping content codings to the functions that
+    produce them, for the codings that are available.
+    '''
+
+    compressors = {'gzip': gzip_compress}
+    if brotli is not None:
+        compressors['br'] = brotli.compress
+    return compressors
+
+class HashedStaticFilesStorage(CachedStaticFilesStorage):
+    '''
+    Like CachedStaticFilesStorage, but also saves compressed variants
+    of compressible files and a manifest of hashed names, looks up
+    URLs in that manifest rather than the cache, and falls back to
+    unhashed URLs for files that haven't been collected, e.g. when
+    running tests.
+    '''
+
+    manifest = None
+
+    def load_manifest(self):
+        try:
+            with self.open(MANIFEST_NAME) as f:
+                return json.load(f)['paths']
+        except (IOError, OSError, ValueError, KeyError):
+            return {}
+
+    def url(self, name, force=False):
+        # Hashing files on every cache miss is slow, and a cache that
+        # isn't shared, or that expires, misses often, so the manifest
+        # written at collectstatic time is used instead. Forced lookups
+        # come from post_process, when the manifest may be out of date.
+        if not (settings.DEBUG or force):
+            if self.manifest is None:
+                self.manifest = self.load_manifest()
+            clean_name = re.split(r'[?#]', name, 1)[0]
+            hashed_name = self.manifest.get(clean_name)
+            if hashed_name is not None:
+                return (StaticFilesStorage.url(self, hashed_name) +
+                        name[len(clean_name):])
+        try:
+            return super(HashedStaticFilesStorage, self).url(name, force)
+        except ValueError:
+            return StaticFilesStorage.url(self, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        hashed_names = {}
+        for name, hashed_name, processed in super(
+            HashedStaticFilesStorage, self
+        ).post_process(paths, dry_run, **options):
+            names.add(name)
+            if hashed_name:
+                names.add(hashed_name)
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        if self.exists(MANIFEST_NAME):
+            self.delete(MANIFEST_NAME)
+        self._save(MANIFEST_NAME, ContentFile(json.dumps({
+            'paths': hashed_names,
+            'version': '1.0'
+        })))
+        self.manifest = hashed_names
+        compressors = get_compressors()
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with self.open(name) as f:
+                content = f.read()
+            for encoding, compress in compressors.items():
+                compressed_name = name + ENCODING_EXTENSIONS[encoding]
+                compressed = compress(content)
+                if self.exists(compressed_name):
+                    self.delete(compressed_name)
+                if len(compressed) < len(content):
+                    self._save(compressed_name, ContentFile(compressed))
+                    yield compressed_name, compressed_name, True
+
+def accepted_encodings(header):
+    '''
+    Return the set of content codings accepted by the given
+    Accept-Encoding header.
+
+    >>> sorted(accepted_encodings('gzip, deflate;q=0.5, br;q=0'))
+    ['deflate', 'gzip']
+    '''
+
+    encodings = set()
+    for item in header.split(','):
+        params = [param.strip() for param in item.split(';')]
+        if not params[0]: continue
+        if any(re.match(r'^q=0(\.0*)?$', param) for param in params[1:]):
+            continue
+        encodings.add(params[0].lower())
+    return encodings
+
+class StaticFile(object):
+    '''
+    Represents a static file, along with its compressed variants, all
+    loaded into memory.
+    '''
+
+    def __init__(self, path, name):
+        with open(path, 'rb') as f:
+            self.variants = {'identity': f.read()}
+        for encoding, extension in ENCODING_EXTENSIONS.items():
+            if os.path.exists(path + extension):
+                with open(path + extension, 'rb') as f:
+                    self.variants[encoding] = f.read()
+        self.content_type = (mimetypes.guess_type(name)[0] or
+                             'application/octet-stream')
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        self.content_hash = hashlib.md5(self.variants['identity']).hexdigest()
+        if HASHED_NAME_RE.search(name):
+            self.cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            self.cache_control = REVALIDATE_CACHE_CONTROL
+
+    def get_etag(self, encoding):
+        # Each variant is a different representation, so it gets its
+        # own entity tag.
+        return '"%s-%s"' % (self.content_hash, encoding)
+
+    def get_encoding(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in PREFERRED_ENCODINGS:
+            if encoding in accepted and encoding in self.variants:
+                return encoding
+        return 'identity'
+
+class StaticFiles(object):
+    '''
+    WSGI middleware that serves the files in the given directory, at the
+    given URL prefix. The hashed files listed in the directory's
+    manifest are served from memory, and others from disk. Other
+    requests are passed on to the given application.
+    '''
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.root = root
+        self.prefix = prefix
+        self.files = self.load_files(root)
+
+    def load_files(self, root):
+        files = {}
+        if not root:
+            return files
+        try:
+            with open(os.path.join(root, MANIFEST_NAME), 'rb') as f:
+                hashed_names = json.load(f)['paths'].values()
+        except IOError:
+            return files
+        for name in hashed_names:
+            path = os.path.join(root, *name.split('/'))
+            if os.path.isfile(path):
+                files[name] = StaticFile(path, name)
+        return files
+
+    def get_file(self, name):
+        '''
+        Return the StaticFile with the given name, or None if there
+        isn't one. Compressed variants aren't served directly.
+        '''
+
+        if name in self.files:
+            return self.files[name]
+        if not self.root or name == MANIFEST_NAME or '..' in name.split('/'):
+            return None
+        path = os.path.join(self.root, *name.split('/'))
+        if not os.path.isfile(path):
+            return None
+        if (path.endswith(tuple(ENCODING_EXTENSIONS.values())) and
+            os.path.exists(os.path.splitext(path)[0])):
+            return None
+        return StaticFile(path, name)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+        static_file = self.get_file(path[len(self.prefix):])
+        if static_file is None:
+            start_response('404 NOT FOUND', [('Content-Type', 'text/plain')])
+            return ['Not Found']
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            start_response('405 METHOD NOT ALLOWED', [
+                ('Allow', 'GET, HEAD'),
+                ('Content-Type', 'text/plain')
+            ])
+            return ['Method Not Allowed']
+        encoding = static_file.get_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        etag = static_file.get_etag(encoding)
+        headers = [
+            ('Cache-Control', static_file.cache_control),
+            ('ETag', etag),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            start_response('304 NOT MODIFIED', headers)
+            return []
+        content = static_file.variants[encoding]
+        headers.extend([
+            ('Content-Type', static_file.content_type),
+            ('Content-Length', str(len(content))),
+        ])
+        if encoding != 'identity':
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        return [content]
@@ -55,3 +55,9 @@ class UserSwitchingTests(TestCase):
 
         self.assertEqual(c.get('/admin/switch-user/joe').status_code, 405)
         self.assertEqual(c.get('/admin/switch-user-back').status_code, 405)
+
+    def test_switching_resets_viewer(self):
+        c, response = self.post('/admin/switch-user/staff', 'admin')
+        viewer = response.context['request'].viewer
+        self.assertEqual(viewer.user.username, 'staff')
+        self.assertTrue(viewer.is_privileged)
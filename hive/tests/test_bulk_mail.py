@@ -0,0 +1,91 @@
+import doctest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from .. import bulk_mail, replicas
+from ..bulk_mail import send_in_batches, send_individually, RateLimiter
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(bulk_mail))
+    return tests
+
+def make_message(recipients):
+    return EmailMessage(subject='hi', body='hello', bcc=recipients)
+
+RECIPIENTS = ['user%d@example.org' % i for i in range(7)]
+
+class SendInBatchesTests(TestCase):
+    def test_sends_batches(self):
+        results = send_in_batches(iter(RECIPIENTS), make_message,
+                                  batch_size=3, max_workers=2)
+        self.assertEqual([result.recipients for result in results],
+                         [RECIPIENTS[0:3], RECIPIENTS[3:6], RECIPIENTS[6:]])
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(sorted(sum([msg.bcc for msg in mail.outbox], [])),
+                         RECIPIENTS)
+
+    def test_sends_nothing_without_recipients(self):
+        self.assertEqual(send_in_batches(iter([]), make_message), [])
+        self.assertEqual(mail.outbox, [])
+
+    @patch('hive.bulk_mail.logger')
+    def test_reports_failed_batches(self, logger):
+        send_messages = EmailBackend.send_messages
+
+        def fail_on_second_batch(self, messages):
+            if RECIPIENTS[3] in messages[0].bcc:
+                raise IOError('connection reset')
+            return send_messages(self, messages)
+
+        with patch.object(EmailBackend, 'send_messages',
+                          fail_on_second_batch):
+            results = send_in_batches(iter(RECIPIENTS), make_message,
+                                      batch_size=3, max_workers=1)
+        self.assertEqual([result.succeeded for result in results],
+                         [True, False, True])
+        self.assertEqual(unicode(results[1]), 'Batch 2: failed to send to '
+                                              '3 recipients: connection reset')
+        self.assertEqual(len(mail.outbox), 2)
+
+class SendIndividuallyTests(TestCase):
+    def test_returns_results_in_order(self):
+        results = send_individually(
+            iter(RECIPIENTS),
+            lambda recipient: EmailMessage(subject=recipient, to=[recipient]),
+            max_workers=3
+        )
+        self.assertEqual(results, [(recipient, None)
+                                   for recipient in RECIPIENTS])
+        self.assertEqual(sorted(msg.subject for msg in mail.outbox),
+                         RECIPIENTS)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_workers_read_from_primary(self):
+        pinned = []
+
+        def make_message(recipient):
+            pinned.append(replicas.is_pinned())
+            return EmailMessage(subject=recipient, to=[recipient])
+
+        replicas.unpin()
+        send_individually(iter(RECIPIENTS), make_message, max_workers=3)
+        self.assertEqual(pinned, [True] * len(RECIPIENTS))
+
+class RateLimiterTests(TestCase):
+    @patch('hive.bulk_mail.time')
+    def test_spaces_out_calls(self, time):
+        time.time.return_value = 100.0
+        limiter = RateLimiter(per_second=2)
+        for i in range(3):
+            limiter.wait()
+        self.assertEqual([args[0] for args, kwargs
+                          in time.sleep.call_args_list], [0.5, 1.0])
+
+    @patch('hive.bulk_mail.time')
+    def test_does_nothing_without_a_rate(self, time):
+        RateLimiter().wait()
+        self.assertFalse(time.time.called)
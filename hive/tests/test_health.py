@@ -0,0 +1,19 @@
+from django.test import TestCase
+from django.db import DatabaseError
+from mock import patch
+
+class HealthCheckTests(TestCase):
+    def test_returns_ok(self):
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, 'ok')
+        self.assertIn('max-age=0', response['Cache-Control'])
+
+    @patch('hive.health.logger')
+    @patch('hive.health.connection')
+    def test_returns_503_when_database_is_unavailable(self, connection,
+                                                      logger):
+        connection.cursor.side_effect = DatabaseError('nope')
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(logger.exception.called)
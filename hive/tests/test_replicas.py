@@ -0,0 +1,86 @@
+from django.test import TestCase, RequestFactory
+from django.test.utils import override_settings
+from django.http import HttpResponse
+from django.core.exceptions import MiddlewareNotUsed
+from django.contrib.auth.models import User
+
+from ..replicas import ReplicaRouter, ReplicaMiddleware, PIN_COOKIE_NAME, \
+                       pin_to_primary, unpin, is_pinned
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaTestCase(TestCase):
+    def setUp(self):
+        super(ReplicaTestCase, self).setUp()
+        unpin()
+        self.router = ReplicaRouter()
+
+    def tearDown(self):
+        unpin()
+        super(ReplicaTestCase, self).tearDown()
+
+class ReplicaRouterTests(ReplicaTestCase):
+    def test_reads_from_replicas(self):
+        self.assertIn(self.router.db_for_read(User),
+                      ['replica1', 'replica2'])
+
+    def test_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_reads_from_primary_after_writing(self):
+        self.router.db_for_write(User)
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_reads_from_primary_when_pinned(self):
+        pin_to_primary()
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_from_primary_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_only_syncs_primary(self):
+        self.assertTrue(self.router.allow_syncdb('default', User))
+        self.assertFalse(self.router.allow_syncdb('replica1', User))
+
+class ReplicaMiddlewareTests(ReplicaTestCase):
+    def setUp(self):
+        super(ReplicaMiddlewareTests, self).setUp()
+        self.middleware = ReplicaMiddleware()
+        self.factory = RequestFactory()
+
+    def process(self, request, view=lambda: None):
+        self.middleware.process_request(request)
+        view()
+        self.db_for_read = self.router.db_for_read(User)
+        return self.middleware.process_response(request, HttpResponse())
+
+    def test_get_reads_from_replicas(self):
+        response = self.process(self.factory.get('/'))
+        self.assertNotEqual(self.db_for_read, 'default')
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+        self.assertFalse(is_pinned())
+
+    def test_post_reads_from_primary_and_sets_cookie(self):
+        response = self.process(self.factory.post('/'))
+        self.assertEqual(self.db_for_read, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE_NAME]['max-age'], 15)
+        self.assertFalse(is_pinned())
+
+    def test_writes_during_get_set_cookie(self):
+        response = self.process(
+            self.factory.get('/'),
+            view=lambda: self.router.db_for_write(User)
+        )
+        self.assertEqual(self.db_for_read, 'default')
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_cookie_pins_reads_to_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE_NAME] = '1'
+        response = self.process(request)
+        self.assertEqual(self.db_for_read, 'default')
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_is_not_used_without_replicas(self):
+        self.assertRaises(MiddlewareNotUsed, ReplicaMiddleware)
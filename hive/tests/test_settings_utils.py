@@ -3,7 +3,12 @@ from django.test import TestCase
 from mock import patch
 
 from ..settings_utils import set_default_env, set_default_db, \
+                             parse_database_url, \
+                             parse_database_replica_urls, \
                              parse_email_backend_url, \
+                             parse_cache_url, \
+                             parse_search_backend_url, \
+                             is_cache_shared, \
                              parse_secure_proxy_ssl_header
 
 class SetDefaultEnvTests(TestCase):
@@ -35,6 +40,66 @@ class SetDefaultDbTests(TestCase):
             set_default_db('meh')
             self.assertEqual(os.environ['DATABASE_URL'], 'meh')
 
+class ParseDatabaseUrlTests(TestCase):
+    def test_parses_urls_without_options(self):
+        db = parse_database_url('postgres://a:b@foo.org:5432/hive')
+        self.assertEqual(db['NAME'], 'hive')
+        self.assertNotIn('CONN_MAX_AGE', db)
+        self.assertNotIn('OPTIONS', db)
+
+    def test_accepts_conn_max_age(self):
+        db = parse_database_url('postgres://foo.org/hive?conn_max_age=600')
+        self.assertEqual(db['NAME'], 'hive')
+        self.assertEqual(db['CONN_MAX_AGE'], 600)
+
+    def test_accepts_unlimited_conn_max_age(self):
+        db = parse_database_url('sqlite:////tmp/db.sqlite3?conn_max_age=none')
+        self.assertEqual(db['NAME'], '/tmp/db.sqlite3')
+        self.assertIsNone(db['CONN_MAX_AGE'])
+
+    def test_accepts_timeouts(self):
+        db = parse_database_url('postgres://foo.org/hive?connect_timeout=5&'
+                                'statement_timeout=30000')
+        self.assertEqual(db['OPTIONS'], {
+            'connect_timeout': 5,
+            'options': '-c statement_timeout=30000'
+        })
+
+    def test_rejects_unsupported_timeouts(self):
+        self.assertRaises(ValueError, parse_database_url,
+                          'mysql://foo.org/hive?statement_timeout=1')
+        self.assertRaises(ValueError, parse_database_url,
+                          'sqlite:////tmp/db.sqlite3?connect_timeout=1')
+
+    def test_passes_other_options_to_driver(self):
+        db = parse_database_url('postgres://foo.org/hive?sslmode=require&'
+                                'conn_max_age=600')
+        self.assertEqual(db['OPTIONS'], {'sslmode': 'require'})
+        db = parse_database_url('mysql://foo.org/hive?charset=utf8mb4')
+        self.assertEqual(db['OPTIONS'], {'charset': 'utf8mb4'})
+
+    def test_ignores_other_options_for_other_databases(self):
+        db = parse_database_url('sqlite:////tmp/db.sqlite3?foo=bar')
+        self.assertNotIn('OPTIONS', db)
+
+class ParseDatabaseReplicaUrlsTests(TestCase):
+    def test_accepts_empty_value(self):
+        self.assertEqual(parse_database_replica_urls(''), {})
+
+    def test_accepts_multiple_urls(self):
+        replicas = parse_database_replica_urls(
+            'postgres://a.org/hive, postgres://b.org/hive?conn_max_age=60'
+        )
+        self.assertEqual(sorted(replicas), ['replica1', 'replica2'])
+        self.assertEqual(replicas['replica1']['HOST'], 'a.org')
+        self.assertEqual(replicas['replica2']['CONN_MAX_AGE'], 60)
+        self.assertEqual(replicas['replica2']['TEST_MIRROR'], 'default')
+
+    def test_follows_env_vars(self):
+        with patch.dict(os.environ, {'FOO': 'postgres://foo.org/hive'}):
+            replicas = parse_database_replica_urls('FOO')
+        self.assertEqual(replicas['replica1']['HOST'], 'foo.org')
+
 class ParseEmailBackendUrlTests(TestCase):
     def test_accepts_console(self):
         self.assertEqual(parse_email_backend_url('console:'), {
@@ -76,6 +141,125 @@ class ParseEmailBackendUrlTests(TestCase):
             'EMAIL_BACKEND_INSTALLED_APPS': ()
         })
 
+    def test_accepts_smtp_plus_pool(self):
+        self.assertEqual(parse_email_backend_url(
+            'smtp+pool+tls://a:b@foo.org:587?size=2&max_age=60'
+        ), {
+            'EMAIL_BACKEND': 'hive.smtp_pool.EmailBackend',
+            'EMAIL_USE_TLS': True,
+            'EMAIL_HOST': 'foo.org',
+            'EMAIL_PORT': 587,
+            'EMAIL_HOST_USER': 'a',
+            'EMAIL_HOST_PASSWORD': 'b',
+            'EMAIL_POOL_SIZE': 2,
+            'EMAIL_POOL_MAX_AGE': 60,
+            'EMAIL_BACKEND_INSTALLED_APPS': ()
+        })
+
+    def test_accepts_queue_plus_another_backend(self):
+        self.assertEqual(parse_email_backend_url('queue+mandrill://lol'), {
+            'EMAIL_BACKEND': 'mailqueue.backends.EmailBackend',
+            'MAILQUEUE_EMAIL_BACKEND': 'djrill.mail.backends.djrill.'
+                                       'DjrillBackend',
+            'MANDRILL_API_KEY': 'lol',
+            'EMAIL_BACKEND_INSTALLED_APPS': ('djrill',)
+        })
+
+class ParseCacheUrlTests(TestCase):
+    def parse(self, url):
+        return parse_cache_url(url)['CACHES']['default']
+
+    def test_accepts_locmem(self):
+        self.assertEqual(self.parse('locmem:'), {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': ''
+        })
+
+    def test_accepts_file(self):
+        self.assertEqual(self.parse('file:///tmp/hive-cache'), {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/hive-cache'
+        })
+
+    def test_accepts_dummy(self):
+        self.assertEqual(self.parse('dummy:'), {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+        })
+
+    def test_accepts_memcached_servers(self):
+        self.assertEqual(self.parse('memcached://a:11211,b:11211'), {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': ['a:11211', 'b:11211']
+        })
+
+    def test_accepts_memcached_sockets(self):
+        self.assertEqual(self.parse('pylibmc:///tmp/memcached.sock'), {
+            'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache',
+            'LOCATION': 'unix:/tmp/memcached.sock'
+        })
+
+    def test_accepts_redis(self):
+        self.assertEqual(
+            self.parse('redis://:pw@foo.org:6379/1?prefix=hive&db=1'),
+            {
+                'BACKEND': 'django_redis.cache.RedisCache',
+                'LOCATION': 'redis://:pw@foo.org:6379/1?db=1',
+                'KEY_PREFIX': 'hive'
+            }
+        )
+
+    def test_accepts_options(self):
+        self.assertEqual(
+            self.parse('locmem://hive?prefix=p&timeout=60&max_entries=10'),
+            {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'hive',
+                'KEY_PREFIX': 'p',
+                'TIMEOUT': 60,
+                'OPTIONS': {'MAX_ENTRIES': 10}
+            }
+        )
+
+    def test_rejects_unknown_schemes(self):
+        self.assertRaises(ValueError, parse_cache_url, 'lol:')
+
+class ParseSearchBackendUrlTests(TestCase):
+    def test_accepts_memory(self):
+        self.assertEqual(parse_search_backend_url('memory:'), {
+            'SEARCH_BACKEND': 'directory.search.backends.memory.SearchBackend'
+        })
+
+    def test_accepts_db(self):
+        self.assertEqual(parse_search_backend_url('db:'), {
+            'SEARCH_BACKEND': 'directory.search.backends.db.SearchBackend'
+        })
+
+    def test_accepts_postgres(self):
+        self.assertEqual(parse_search_backend_url('postgres:'), {
+            'SEARCH_BACKEND': 'directory.search.backends.postgresql.'
+                              'SearchBackend'
+        })
+
+    def test_rejects_unknown_schemes(self):
+        self.assertRaises(ValueError, parse_search_backend_url, 'lol:')
+
+    def test_rejects_memory_without_shared_cache(self):
+        self.assertRaises(ValueError, parse_search_backend_url, 'memory:',
+                          cache_is_shared=False)
+        self.assertEqual(parse_search_backend_url('db:', False), {
+            'SEARCH_BACKEND': 'directory.search.backends.db.SearchBackend'
+        })
+
+class IsCacheSharedTests(TestCase):
+    def test_process_local_caches_are_not_shared(self):
+        for url in ['locmem:', 'dummy:']:
+            self.assertFalse(is_cache_shared(parse_cache_url(url)['CACHES']))
+
+    def test_other_caches_are_shared(self):
+        for url in ['memcached://localhost:11211', 'redis://localhost/0',
+                    'file:///tmp/hive-cache']:
+            self.assertTrue(is_cache_shared(parse_cache_url(url)['CACHES']))
+
 class ParseSecureProxySslHeaderTests(TestCase):
     def test_basic_functionality(self):
         self.assertEqual(
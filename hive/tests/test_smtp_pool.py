@@ -0,0 +1,110 @@
+import smtpd
+import asyncore
+import threading
+from django.core.mail import send_mail, get_connection
+from django.test import TestCase
+from mock import patch
+
+from .. import smtp_pool
+from ..smtp_pool import SMTPConnectionPool
+
+class SMTPStandIn(smtpd.SMTPServer):
+    '''
+    An in-process SMTP server that records the messages it receives
+    and the connections made to it.
+    '''
+
+    def __init__(self):
+        smtpd.SMTPServer.__init__(self, ('127.0.0.1', 0), None)
+        self.port = self.socket.getsockname()[1]
+        self.messages = []
+        self.channels = []
+        self.running = True
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            conn, addr = pair
+            self.channels.append(smtpd.SMTPChannel(self, conn, addr))
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        self.messages.append((rcpttos, data))
+
+    def serve(self):
+        while self.running:
+            asyncore.loop(timeout=0.01, count=1)
+
+    def disconnect_all(self):
+        for channel in self.channels:
+            channel.close()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        for channel in self.channels:
+            channel.close()
+        self.close()
+
+class PooledEmailBackendTests(TestCase):
+    def setUp(self):
+        super(PooledEmailBackendTests, self).setUp()
+        self.server = SMTPStandIn()
+        self.pool = SMTPConnectionPool(size=2, max_age=300)
+        patcher = patch.object(smtp_pool, '_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.stop()
+        super(PooledEmailBackendTests, self).tearDown()
+
+    def send(self, to='to@example.org'):
+        connection = get_connection('hive.smtp_pool.EmailBackend',
+                                    host='127.0.0.1', port=self.server.port,
+                                    username='', password='', use_tls=False)
+        return send_mail('hi', 'hello', 'from@example.org', [to],
+                         connection=connection)
+
+    def test_reuses_connections(self):
+        self.assertEqual(self.send('a@example.org'), 1)
+        self.assertEqual(self.send('b@example.org'), 1)
+        self.assertEqual([rcpttos for rcpttos, data in self.server.messages],
+                         [['a@example.org'], ['b@example.org']])
+        self.assertEqual(len(self.server.channels), 1)
+
+    def test_replaces_disconnected_connections(self):
+        self.send()
+        self.server.disconnect_all()
+        self.send()
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(len(self.server.channels), 2)
+
+    def test_recycles_old_connections(self):
+        self.pool.max_age = 0
+        self.send()
+        self.send()
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(len(self.server.channels), 2)
+
+    def test_does_not_share_connections_with_forked_processes(self):
+        self.send()
+        with patch('os.getpid', return_value=-1):
+            self.send()
+        self.assertEqual(len(self.server.channels), 2)
+
+    def test_keeps_at_most_size_idle_connections(self):
+        connections = [
+            get_connection('hive.smtp_pool.EmailBackend', host='127.0.0.1',
+                           port=self.server.port, username='', password='',
+                           use_tls=False)
+            for i in range(3)
+        ]
+        for connection in connections:
+            connection.open()
+        for connection in connections:
+            connection.close()
+        self.assertEqual(len(self.pool.idle.values()[0]), 2)
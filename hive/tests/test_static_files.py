@@ -0,0 +1,188 @@
+import os
+import gzip
+import json
+import shutil
+import doctest
+import tempfile
+from cStringIO import StringIO
+from mock import patch
+from django.test import TestCase
+from django.core.files.storage import FileSystemStorage
+
+from .. import static_files
+from ..static_files import HashedStaticFilesStorage, StaticFiles
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(static_files))
+    return tests
+
+CSS = 'body { background: url("bg.png"); }\n' * 20
+
+class TempDirTestCase(TestCase):
+    def setUp(self):
+        super(TempDirTestCase, self).setUp()
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        super(TempDirTestCase, self).tearDown()
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+
+class HashedStaticFilesStorageTests(TempDirTestCase):
+    def setUp(self):
+        super(HashedStaticFilesStorageTests, self).setUp()
+        self.write('src/css/site.css', CSS)
+        self.write('src/css/bg.png', 'not really a png')
+        source = FileSystemStorage(location=os.path.join(self.root, 'src'))
+        self.storage = HashedStaticFilesStorage(
+            location=os.path.join(self.root, 'dest'),
+            base_url='/static/'
+        )
+        paths = {}
+        for name in ['css/site.css', 'css/bg.png']:
+            with source.open(name) as f:
+                self.storage.save(name, f)
+            paths[name] = (source, name)
+        self.processed = list(self.storage.post_process(paths))
+
+    def test_saves_gzipped_variants_of_compressible_files(self):
+        hashed_name = dict((name, hashed_name) for name, hashed_name, _
+                           in self.processed)['css/site.css']
+        for name in ['css/site.css', hashed_name]:
+            with self.storage.open(name + '.gz') as f:
+                content = gzip.GzipFile(fileobj=StringIO(f.read())).read()
+            with self.storage.open(name) as f:
+                self.assertEqual(content, f.read())
+
+    def test_does_not_compress_other_files(self):
+        self.assertFalse(self.storage.exists('css/bg.png.gz'))
+
+    def test_url_is_hashed(self):
+        self.assertRegexpMatches(self.storage.url('css/site.css'),
+                                 r'^/static/css/site\.[0-9a-f]{12}\.css$')
+
+    def test_saves_manifest_of_hashed_names(self):
+        with self.storage.open('staticfiles.json') as f:
+            paths = json.load(f)['paths']
+        self.assertEqual(sorted(paths), ['css/bg.png', 'css/site.css'])
+        self.assertRegexpMatches(paths['css/site.css'],
+                                 r'^css/site\.[0-9a-f]{12}\.css$')
+
+    def test_url_is_looked_up_in_manifest(self):
+        storage = HashedStaticFilesStorage(
+            location=os.path.join(self.root, 'dest'),
+            base_url='/static/'
+        )
+        with patch.object(storage, 'cache') as cache, \
+             patch.object(storage, 'hashed_name') as hashed_name:
+            url = storage.url('css/site.css?#iefix')
+        self.assertFalse(cache.get.called)
+        self.assertFalse(hashed_name.called)
+        self.assertEqual(url, self.storage.url('css/site.css') + '?#iefix')
+
+    def test_url_falls_back_for_missing_files(self):
+        self.assertEqual(self.storage.url('css/missing.css'),
+                         '/static/css/missing.css')
+
+class StaticFilesTests(TempDirTestCase):
+    def setUp(self):
+        super(StaticFilesTests, self).setUp()
+        self.write('css/site.0123456789ab.css', CSS)
+        self.write('css/site.0123456789ab.css.gz',
+                   static_files.gzip_compress(CSS))
+        self.write('js/app.js', 'alert("hi");')
+        self.write('staticfiles.json', json.dumps({'paths': {
+            'css/site.css': 'css/site.0123456789ab.css'
+        }}))
+        self.application = StaticFiles(self.app, self.root, '/static/')
+
+    def app(self, environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return ['from django']
+
+    def request(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method}
+        environ.update(headers)
+        response = {}
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+        response['content'] = ''.join(self.application(environ,
+                                                       start_response))
+        return response
+
+    def test_passes_other_requests_to_application(self):
+        self.assertEqual(self.request('/orgs/')['content'], 'from django')
+
+    def test_serves_hashed_files_as_immutable(self):
+        response = self.request('/static/css/site.0123456789ab.css')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['content'], CSS)
+        self.assertEqual(response['headers']['Cache-Control'],
+                         'public, max-age=31536000, immutable')
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['headers']['Content-Type'],
+                         'text/css; charset=utf-8')
+
+    def test_serves_unhashed_files_for_revalidation(self):
+        response = self.request('/static/js/app.js')
+        self.assertEqual(response['content'], 'alert("hi");')
+        self.assertEqual(response['headers']['Cache-Control'],
+                         'public, no-cache')
+
+    def test_serves_gzipped_variants(self):
+        response = self.request('/static/css/site.0123456789ab.css',
+                                HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.GzipFile(fileobj=StringIO(response['content'])).read(),
+            CSS
+        )
+        self.assertEqual(response['headers']['Content-Length'],
+                         str(len(response['content'])))
+
+    def test_does_not_serve_refused_variants(self):
+        response = self.request('/static/css/site.0123456789ab.css',
+                                HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response['headers'])
+        self.assertEqual(response['content'], CSS)
+
+    def test_returns_304_for_matching_etag(self):
+        etag = self.request('/static/js/app.js')['headers']['ETag']
+        response = self.request('/static/js/app.js', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['status'], '304 NOT MODIFIED')
+        self.assertEqual(response['content'], '')
+
+    def test_head_requests_have_no_content(self):
+        response = self.request('/static/js/app.js', method='HEAD')
+        self.assertEqual(response['headers']['Content-Length'], '12')
+        self.assertEqual(response['content'], '')
+
+    def test_returns_404_for_missing_files(self):
+        self.assertEqual(self.request('/static/nope.js')['status'],
+                         '404 NOT FOUND')
+
+    def test_only_loads_manifest_files_into_memory(self):
+        self.assertEqual(self.application.files.keys(),
+                         ['css/site.0123456789ab.css'])
+
+    def test_serves_files_added_after_startup_from_disk(self):
+        self.write('js/new.js', 'alert("new");')
+        self.assertEqual(self.request('/static/js/new.js')['content'],
+                         'alert("new");')
+
+    def test_does_not_serve_paths_with_parent_references(self):
+        path = '/static/../%s/js/app.js' % os.path.basename(self.root)
+        self.assertEqual(self.request(path)['status'], '404 NOT FOUND')
+
+    def test_does_not_serve_compressed_variants_directly(self):
+        self.assertEqual(
+            self.request('/static/css/site.0123456789ab.css.gz')['status'],
+            '404 NOT FOUND'
+        )
@@ -0,0 +1,29 @@
+from mock import patch
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from directory.search.backends import memory
+from .. import warmup
+
+class WarmupTests(TestCase):
+    def test_find_template_names_includes_project_and_app_templates(self):
+        names = warmup.find_template_names()
+        self.assertIn('base.html', names)
+        self.assertIn('directory/home.html', names)
+        self.assertIn('bootstrap3/field.html', names)
+
+    def test_load_templates_loads_templates(self):
+        self.assertGreater(warmup.load_templates(), 0)
+
+    def test_warm_up_app_works(self):
+        warmup.warm_up_app()
+
+    @override_settings(
+        SEARCH_BACKEND='directory.search.backends.memory.SearchBackend'
+    )
+    def test_warm_up_worker_builds_memory_search_index(self):
+        memory.index.reset()
+        # Closing the connection would end the test's transaction.
+        with patch.object(warmup.connections, 'all', return_value=[]):
+            warmup.warm_up_worker()
+        self.assertTrue(memory.index.is_built)
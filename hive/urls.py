@@ -8,6 +8,7 @@ urlpatterns = patterns('',
         name='switch_user'),
     url(r'^admin/switch-user-back', 'hive.admin_utils.switch_user_back',
         name='switch_user_back'),
+    url(r'^health$', 'hive.health.health_check', name='health_check'),
     url(r'^admin/doc/', include('django.contrib.admindocs.urls')),
     url(r'^admin/', include(admin.site.urls)),
     url(r'^accounts/', include('hive.account_urls')),
@@ -0,0 +1,75 @@
+'''
+Routines that do the work a server process would otherwise do lazily
+on its first requests.
+
+warm_up_app() loads templates, URL resolvers and the modules imported
+by views. It touches no database connections, so it's safe to run in
+a parent process before it forks workers, which then share its work.
+warm_up_worker() does the remaining, per-process work, such as
+connecting to the database, and should run in each worker.
+'''
+
+import os
+import logging
+from django.conf import settings
+from django.core.urlresolvers import reverse, resolve
+from django.db import connections
+from django.template.loader import get_template
+from django.template.loaders.app_directories import app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+def find_template_names():
+    '''
+    Return the names of all templates in the template directories of
+    the project and its apps.
+    '''
+
+    names = set()
+    for template_dir in tuple(settings.TEMPLATE_DIRS) + app_template_dirs:
+        for dirpath, dirnames, filenames in os.walk(template_dir):
+            for filename in filenames:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(dirpath, filename)
+                    names.add(os.path.relpath(path, template_dir)
+                              .replace(os.sep, '/'))
+    return sorted(names)
+
+def load_templates():
+    '''
+    Load and compile every template, returning the number loaded.
+    With the cached template loader, compiled templates are kept
+    for the lifetime of the process.
+    '''
+
+    loaded = 0
+    for name in find_template_names():
+        try:
+            get_template(name)
+            loaded += 1
+        except Exception:
+            # Some third-party templates are only meant to be included
+            # in contexts we don't use; they'll fail the same way later.
+            logger.debug('unable to load template %s', name, exc_info=True)
+    return loaded
+
+def warm_up_app():
+    # Resolving and reversing URLs populates the resolvers, which in
+    # turn imports every view module.
+    resolve('/')
+    reverse('home')
+    load_templates()
+
+    from directory import richtext
+    richtext.render_markdown(u'*Warming up.*')
+
+def warm_up_worker():
+    from directory import search
+
+    for conn in connections.all():
+        # Connections inherited from a parent process mustn't be shared.
+        conn.close()
+        conn.ensure_connection()
+    search.get_backend().warm_up()
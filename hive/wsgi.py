@@ -13,5 +13,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hive.settings")
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
-from dj_static import Cling
-application = Cling(application)
+from django.conf import settings
+from hive.static_files import StaticFiles
+application = StaticFiles(application, settings.STATIC_ROOT,
+                          settings.STATIC_URL)
@@ -0,0 +1,36 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from . import models
+
+class QueuedMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts',
+                    'created', 'next_attempt', 'sent')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    date_hierarchy = 'created'
+    readonly_fields = ('created', 'modified', 'status', 'subject',
+                       'recipients', 'attempts', 'next_attempt',
+                       'last_error', 'sent')
+    exclude = ('message',)
+    actions = ['retry_messages']
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry_messages(self, request, queryset):
+        # Pending messages are either waiting to be retried anyway, or
+        # have been claimed by a worker that may be sending them now.
+        count = queryset.filter(status=models.QueuedMessage.FAILED).update(
+            status=models.QueuedMessage.PENDING,
+            attempts=0,
+            next_attempt=timezone.now(),
+            modified=timezone.now()
+        )
+        self.message_user(request, 'Queued %d messages for sending.' % count)
+
+    retry_messages.short_description = '''\
+    Retry selected failed messages
+    '''
+
+admin.site.register(models.QueuedMessage, QueuedMessageAdmin)
@@ -0,0 +1,17 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .models import QueuedMessage
+
+class EmailBackend(BaseEmailBackend):
+    '''
+    An email backend that adds messages to the mail queue, from which
+    the sendqueuedmail command delivers them through
+    settings.MAILQUEUE_EMAIL_BACKEND.
+    '''
+
+    def send_messages(self, email_messages):
+        messages = [QueuedMessage.from_email_message(email_message)
+                    for email_message in email_messages
+                    if email_message.recipients()]
+        QueuedMessage.objects.bulk_create(messages)
+        return len(messages)
@@ -0,0 +1,52 @@
+import time
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from mailqueue import worker
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+            dest='batch_size',
+            default=worker.DEFAULT_BATCH_SIZE,
+            type='int',
+            help='number of messages to claim at a time'
+        ),
+        make_option('--interval',
+            dest='interval',
+            default=5,
+            type='float',
+            help='seconds to wait between checks of an empty queue'
+        ),
+        make_option('--once',
+            dest='once',
+            default=False,
+            help='exit once the queue has no more due messages',
+            action='store_true'
+        )
+    )
+
+    help = '''\
+    Send the messages in the mail queue. Any number of these workers may
+    run at once.
+    '''
+
+    def handle(self, *args, **kwargs):
+        connection = worker.get_queue_connection()
+        while True:
+            close_old_connections()
+            try:
+                sent, failed = worker.send_queued_messages(
+                    connection,
+                    batch_size=kwargs['batch_size']
+                )
+            finally:
+                # Don't hold on to the mail server while the queue is empty.
+                connection.close()
+            if sent or failed:
+                self.stdout.write('Sent %d messages, %d failed.' % (sent,
+                                                                   failed))
+            if kwargs['once']:
+                return
+            time.sleep(kwargs['interval'])
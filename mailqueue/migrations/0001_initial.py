@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'QueuedMessage'
+        db.create_table(u'mailqueue_queuedmessage', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('created', self.gf('django.db.models.fields.DateTimeField')(auto_now_add=True, blank=True)),
+            ('modified', self.gf('django.db.models.fields.DateTimeField')(auto_now=True, blank=True)),
+            ('status', self.gf('django.db.models.fields.CharField')(default='pending', max_length=10)),
+            ('subject', self.gf('django.db.models.fields.CharField')(max_length=255, blank=True)),
+            ('recipients', self.gf('django.db.models.fields.TextField')(blank=True)),
+            ('message', self.gf('django.db.models.fields.TextField')()),
+            ('attempts', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+            ('next_attempt', self.gf('django.db.models.fields.DateTimeField')(default=datetime.datetime.now)),
+            ('last_error', self.gf('django.db.models.fields.TextField')(blank=True)),
+            ('sent', self.gf('django.db.models.fields.DateTimeField')(null=True, blank=True)),
+        ))
+        db.send_create_signal(u'mailqueue', ['QueuedMessage'])
+
+        # Adding index on 'QueuedMessage', fields ['status', 'next_attempt']
+        db.create_index(u'mailqueue_queuedmessage', ['status', 'next_attempt'])
+
+
+    def backwards(self, orm):
+        # Removing index on 'QueuedMessage', fields ['status', 'next_attempt']
+        db.delete_index(u'mailqueue_queuedmessage', ['status', 'next_attempt'])
+
+        # Deleting model 'QueuedMessage'
+        db.delete_table(u'mailqueue_queuedmessage')
+
+
+    models = {
+        u'mailqueue.queuedmessage': {
+            'Meta': {'object_name': 'QueuedMessage', 'index_together': "[('status', 'next_attempt')]"},
+            'attempts': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_error': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'message': ('django.db.models.fields.TextField', [], {}),
+            'modified': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'next_attempt': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'recipients': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'sent': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            'status': ('django.db.models.fields.CharField', [], {'default': "'pending'", 'max_length': '10'}),
+            'subject': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'})
+        }
+    }
+
+    complete_apps = ['mailqueue']
\ No newline at end of file
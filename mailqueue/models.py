@@ -0,0 +1,68 @@
+import base64
+import cPickle as pickle
+from django.db import models
+from django.utils import timezone
+
+class QueuedMessage(models.Model):
+    '''
+    Represents an outbound email that has yet to be sent, or was sent
+    by the mail queue.
+    '''
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING)
+    subject = models.CharField(max_length=255, blank=True)
+    recipients = models.TextField(blank=True)
+    message = models.TextField(
+        help_text="The pickled EmailMessage, encoded in base64."
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the message may next be sent. While a worker is "
+                  "sending it, this is pushed into the future, so that "
+                  "it's retried if the worker dies."
+    )
+    last_error = models.TextField(blank=True)
+    sent = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        index_together = [
+            ('status', 'next_attempt'),
+        ]
+
+    def __unicode__(self):
+        return self.subject
+
+    @classmethod
+    def from_email_message(cls, email_message):
+        connection = email_message.connection
+        # Connections aren't picklable, and the worker uses its own.
+        email_message.connection = None
+        try:
+            message = base64.b64encode(pickle.dumps(
+                email_message,
+                pickle.HIGHEST_PROTOCOL
+            ))
+        finally:
+            email_message.connection = connection
+        return cls(
+            subject=email_message.subject[:255],
+            recipients=u', '.join(email_message.recipients()),
+            message=message
+        )
+
+    def get_email_message(self):
+        return pickle.loads(base64.b64decode(self.message))
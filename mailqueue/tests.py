@@ -0,0 +1,162 @@
+import doctest
+from datetime import timedelta
+from cStringIO import StringIO
+from django.core import mail
+from django.core.mail import send_mail, EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from mock import patch
+
+from . import worker
+from .models import QueuedMessage
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(worker))
+    return tests
+
+@override_settings(
+    EMAIL_BACKEND='mailqueue.backends.EmailBackend',
+    MAILQUEUE_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class MailQueueTests(TestCase):
+    def send(self, subject='hi'):
+        send_mail(subject, 'hello', 'from@example.org', ['to@example.org'])
+
+    def work(self):
+        output = StringIO()
+        call_command('sendqueuedmail', once=True, stdout=output)
+        return output.getvalue()
+
+    def test_backend_only_enqueues(self):
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        queued = QueuedMessage.objects.get()
+        self.assertEqual(queued.subject, 'hi')
+        self.assertEqual(queued.recipients, 'to@example.org')
+        self.assertEqual(queued.status, QueuedMessage.PENDING)
+
+    def test_messages_are_pickled_intact(self):
+        msg = EmailMessage('hi', '<p>hello</p>', bcc=['a@example.org'])
+        msg.content_subtype = 'html'
+        msg.tags = ['foo']
+        msg.send()
+        msg = QueuedMessage.objects.get().get_email_message()
+        self.assertEqual(msg.bcc, ['a@example.org'])
+        self.assertEqual(msg.content_subtype, 'html')
+        self.assertEqual(msg.tags, ['foo'])
+        self.assertIsNone(msg.connection)
+
+    def test_worker_sends_messages(self):
+        self.send('one')
+        self.send('two')
+        self.assertEqual(self.work(), 'Sent 2 messages, 0 failed.\n')
+        self.assertEqual(sorted(msg.subject for msg in mail.outbox),
+                         ['one', 'two'])
+        for queued in QueuedMessage.objects.all():
+            self.assertEqual(queued.status, QueuedMessage.SENT)
+            self.assertEqual(queued.attempts, 1)
+            self.assertIsNotNone(queued.sent)
+        self.assertEqual(self.work(), '')
+
+    def test_claimed_messages_are_not_claimed_again(self):
+        self.send()
+        self.assertEqual(len(worker.claim_batch()), 1)
+        self.assertEqual(worker.claim_batch(), [])
+
+    def test_future_messages_are_not_claimed(self):
+        self.send()
+        QueuedMessage.objects.update(
+            next_attempt=timezone.now() + timedelta(minutes=1)
+        )
+        self.assertEqual(worker.claim_batch(), [])
+
+    @patch('mailqueue.worker.logger')
+    def test_failed_messages_are_retried_with_backoff(self, logger):
+        self.send()
+        with patch.object(EmailBackend, 'send_messages',
+                          side_effect=IOError('nope')):
+            self.assertEqual(self.work(), 'Sent 0 messages, 1 failed.\n')
+        queued = QueuedMessage.objects.get()
+        self.assertEqual(queued.status, QueuedMessage.PENDING)
+        self.assertEqual(queued.last_error, 'nope')
+        self.assertGreater(queued.next_attempt,
+                           timezone.now() + timedelta(seconds=50))
+
+        QueuedMessage.objects.update(next_attempt=timezone.now())
+        self.assertEqual(self.work(), 'Sent 1 messages, 0 failed.\n')
+        queued = QueuedMessage.objects.get()
+        self.assertEqual(queued.status, QueuedMessage.SENT)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(queued.last_error, '')
+
+    def test_messages_are_marked_sent_as_they_go(self):
+        self.send('one')
+        self.send('two')
+        messages = worker.claim_batch()
+        connection = worker.get_queue_connection()
+        get_email_message = QueuedMessage.get_email_message
+
+        def die_after_first_message(queued):
+            if queued.subject == 'two':
+                raise KeyboardInterrupt()
+            return get_email_message(queued)
+
+        with patch.object(QueuedMessage, 'get_email_message',
+                          die_after_first_message):
+            self.assertRaises(KeyboardInterrupt, worker.send_batch,
+                              messages, connection)
+        self.assertEqual(dict(QueuedMessage.objects.values_list(
+            'subject',
+            'status'
+        )), {'one': QueuedMessage.SENT, 'two': QueuedMessage.PENDING})
+
+    @patch('mailqueue.worker.logger')
+    def test_gives_up_after_max_attempts(self, logger):
+        self.send()
+        QueuedMessage.objects.update(attempts=worker.MAX_ATTEMPTS - 1)
+        with patch.object(EmailBackend, 'send_messages',
+                          side_effect=IOError('nope')):
+            self.work()
+        self.assertEqual(QueuedMessage.objects.get().status,
+                         QueuedMessage.FAILED)
+
+class QueuedMessageAdminTests(TestCase):
+    def setUp(self):
+        super(QueuedMessageAdminTests, self).setUp()
+        User.objects.create_superuser('admin', 'admin@example.org', 'lol')
+        self.client.login(username='admin', password='lol')
+
+    def test_only_failed_messages_are_retried(self):
+        now = timezone.now()
+        for status in [QueuedMessage.PENDING, QueuedMessage.SENT,
+                       QueuedMessage.FAILED]:
+            QueuedMessage.objects.create(
+                subject=status,
+                status=status,
+                recipients='to@example.org',
+                message='',
+                attempts=1,
+                next_attempt=now + worker.CLAIM_TIMEOUT
+            )
+        self.client.post('/admin/mailqueue/queuedmessage/', {
+            'action': 'retry_messages',
+            '_selected_action': list(QueuedMessage.objects.values_list(
+                'pk',
+                flat=True
+            ))
+        })
+        self.assertEqual(dict(QueuedMessage.objects.values_list(
+            'subject',
+            'attempts'
+        )), {
+            QueuedMessage.PENDING: 1,
+            QueuedMessage.SENT: 1,
+            QueuedMessage.FAILED: 0
+        })
+        self.assertEqual(QueuedMessage.objects.get(
+            subject=QueuedMessage.FAILED
+        ).status, QueuedMessage.PENDING)
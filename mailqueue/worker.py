@@ -0,0 +1,145 @@
+'''
+Delivery of queued messages.
+
+Workers claim batches of due messages by locking their rows and pushing
+their next attempt into the future, so that concurrent workers never
+claim the same message, and messages claimed by a worker that dies are
+eventually retried. Failed messages are retried with exponential
+backoff, up to MAX_ATTEMPTS times.
+'''
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import QueuedMessage
+
+DEFAULT_BATCH_SIZE = 50
+
+DEFAULT_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+MAX_ATTEMPTS = 6
+
+# How long a worker has to send the messages it claims before they may
+# be claimed again.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+BASE_RETRY_DELAY = 60
+
+MAX_RETRY_DELAY = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+def get_retry_delay(attempts):
+    '''
+    Return how long to wait before retrying a message that has failed
+    the given number of times.
+
+    >>> [get_retry_delay(n).seconds for n in range(1, 8)]
+    [60, 120, 240, 480, 960, 1920, 3600]
+    '''
+
+    return timedelta(seconds=min(BASE_RETRY_DELAY * 2 ** (attempts - 1),
+                                 MAX_RETRY_DELAY))
+
+def get_queue_connection():
+    return get_connection(
+        getattr(settings, 'MAILQUEUE_EMAIL_BACKEND', DEFAULT_EMAIL_BACKEND),
+        fail_silently=False
+    )
+
+def claim_batch(batch_size=DEFAULT_BATCH_SIZE):
+    # Rows we lock and update have to come from the primary database.
+    using = router.db_for_write(QueuedMessage)
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        messages = list(QueuedMessage.objects.using(using).select_for_update(
+        ).filter(
+            status=QueuedMessage.PENDING,
+            next_attempt__lte=now
+        ).order_by('next_attempt', 'pk')[:batch_size])
+        QueuedMessage.objects.using(using).filter(
+            pk__in=[queued.pk for queued in messages]
+        ).update(
+            attempts=F('attempts') + 1,
+            next_attempt=now + CLAIM_TIMEOUT,
+            modified=now
+        )
+    for queued in messages:
+        queued.attempts += 1
+    return messages
+
+def record_success(queued):
+    now = timezone.now()
+    QueuedMessage.objects.filter(pk=queued.pk).update(
+        status=QueuedMessage.SENT,
+        sent=now,
+        last_error='',
+        modified=now
+    )
+
+def record_failure(queued, error):
+    now = timezone.now()
+    queued.last_error = unicode(error) or error.__class__.__name__
+    if queued.attempts >= MAX_ATTEMPTS:
+        queued.status = QueuedMessage.FAILED
+    else:
+        queued.next_attempt = now + get_retry_delay(queued.attempts)
+    QueuedMessage.objects.filter(pk=queued.pk).update(
+        status=queued.status,
+        next_attempt=queued.next_attempt,
+        last_error=queued.last_error,
+        modified=now
+    )
+
+def send_batch(messages, connection):
+    '''
+    Send the given claimed messages over the given connection, which
+    is left open for the next batch. Returns the number of messages
+    that were sent and the number that failed.
+
+    Each message is marked as sent as soon as it's been sent, so that
+    if the worker dies partway through a batch, the messages it already
+    sent aren't sent again once their claims expire.
+    '''
+
+    sent = failed = 0
+    for queued in messages:
+        try:
+            # This is a no-op if the connection is already open.
+            connection.open()
+            if not connection.send_messages([queued.get_email_message()]):
+                raise Exception('the backend did not send the message')
+        except Exception, e:
+            logger.exception('failed to send queued message %d', queued.pk)
+            # The connection may be in a bad state, so start over with a
+            # new one for the next message.
+            try:
+                connection.close()
+            except Exception:
+                pass
+            record_failure(queued, e)
+            failed += 1
+        else:
+            record_success(queued)
+            sent += 1
+    return sent, failed
+
+def send_queued_messages(connection, batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Send batches of due messages until none are left, returning the
+    total number of messages that were sent and that failed.
+    '''
+
+    total_sent = total_failed = 0
+    while True:
+        messages = claim_batch(batch_size)
+        if not messages:
+            return total_sent, total_failed
+        sent, failed = send_batch(messages, connection)
+        total_sent += sent
+        total_failed += failed
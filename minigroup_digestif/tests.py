@@ -1,7 +1,9 @@
 from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
 from django.test import TestCase, Client
 from django.test.utils import override_settings
 from django.contrib.auth.models import User
+from mock import patch
 
 from directory.models import Membership
 
@@ -82,3 +84,60 @@ class EnabledEndpointTests(BaseTestCase):
         self.assertEqual(msg.bcc, ['bob@example.com'])
         self.assertEqual(msg.body, u'<p>hello!</p>')
         self.assertEqual(msg.content_subtype, 'html')
+
+@override_settings(MINIGROUP_DIGESTIF_USERPASS='user:pass',
+                   MINIGROUP_DIGESTIF_BATCH_SIZE=2)
+class BatchedDeliveryTests(BaseTestCase):
+    def setUp(self):
+        super(BatchedDeliveryTests, self).setUp()
+        for i in range(5):
+            user = User(username='user%d' % i,
+                        email='user%d@example.com' % i)
+            user.save()
+            user.membership.receives_minigroup_digest = True
+            user.membership.save()
+
+    def send(self):
+        return self.client.post(
+            '/minigroup_digestif/send',
+            {'html': '<p>hello!</p>'},
+            HTTP_AUTHORIZATION=userpass('user:pass')
+        )
+
+    def test_sends_digest_in_batches(self):
+        response = self.send()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            sorted(sum([msg.bcc for msg in mail.outbox], [])),
+            ['user%d@example.com' % i for i in range(5)]
+        )
+        self.assertIn('Batch 3: sent to 1 recipients.', response.content)
+
+    @patch('hive.bulk_mail.logger')
+    def test_total_failure_is_an_error(self, logger):
+        with patch.object(EmailBackend, 'send_messages',
+                          side_effect=IOError('nope')):
+            response = self.send()
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('Digest failed to send in 3 of 3 batches.',
+                      response.content)
+
+    @patch('hive.bulk_mail.logger')
+    def test_partial_failure_is_reported(self, logger):
+        send_messages = EmailBackend.send_messages
+
+        def fail_on_first_batch(self, messages):
+            if 'user0@example.com' in messages[0].bcc:
+                raise IOError('nope')
+            return send_messages(self, messages)
+
+        with patch.object(EmailBackend, 'send_messages',
+                          fail_on_first_batch):
+            response = self.send()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Digest failed to send in 1 of 3 batches.',
+                      response.content)
+        self.assertIn('Batch 1: failed to send to 2 recipients: nope',
+                      response.content)
+        self.assertEqual(len(mail.outbox), 2)
@@ -7,19 +7,13 @@ from django.conf import settings
 from django.core.mail import EmailMessage
 
 from directory.models import Membership
+from hive import bulk_mail
 
-def send_digest(request):
-    html = request.POST.get('html')
-    if not html:
-        return HttpResponse(status=400, reason='Bad Request')
-    memberships = Membership.objects.filter(
-        user__is_active=True,
-        receives_minigroup_digest=True
-    ).exclude(user__email='')
+def make_digest(html, recipients):
     msg = EmailMessage(
         subject="Your Minigroup digest for today",
         body=html,
-        bcc=[membership.user.email for membership in memberships],
+        bcc=recipients,
     )
     msg.content_subtype = "html"
 
@@ -27,8 +21,41 @@ def send_digest(request):
     # the outbound email; otherwise it probably won't do anything.
     msg.tags = ["minigroup_digestif"]
 
-    msg.send()
-    return HttpResponse('Digest sent.')
+    return msg
+
+def send_digest(request):
+    html = request.POST.get('html')
+    if not html:
+        return HttpResponse(status=400, reason='Bad Request')
+    recipients = Membership.objects.filter(
+        user__is_active=True,
+        receives_minigroup_digest=True
+    ).exclude(user__email='').order_by('pk').values_list(
+        'user__email',
+        flat=True
+    ).iterator()
+    results = bulk_mail.send_in_batches(
+        recipients,
+        lambda batch: make_digest(html, batch),
+        batch_size=getattr(settings, 'MINIGROUP_DIGESTIF_BATCH_SIZE',
+                           bulk_mail.DEFAULT_BATCH_SIZE),
+        max_workers=getattr(settings, 'MINIGROUP_DIGESTIF_MAX_WORKERS',
+                            bulk_mail.DEFAULT_MAX_WORKERS)
+    )
+    failed = [result for result in results if not result.succeeded]
+    if failed:
+        lines = ['Digest failed to send in %d of %d batches.' % (
+            len(failed), len(results)
+        )]
+    else:
+        lines = ['Digest sent.']
+    lines.extend(unicode(result) for result in results)
+    # Retrying after a partial failure would send the digest twice to
+    # the batches that succeeded, so only a total failure is an error.
+    total_failure = failed and len(failed) == len(results)
+    return HttpResponse('\n'.join(lines) + '\n',
+                        status=500 if total_failure else 200,
+                        content_type='text/plain')
 
 @csrf_exempt
 @require_POST